@@ -0,0 +1,220 @@
+#----------------------------------------------------------------------------#
+# Async read path (/async/...).
+#
+# The venue, artist and show listings, both searches and both profile pages,
+# served through SQLAlchemy's asyncio extension (asyncpg on PostgreSQL,
+# aiosqlite locally) with the same statements and templates as the sync
+# views. Independent queries of a page run concurrently, each on its own
+# connection: a profile's row, genres, past shows and upcoming shows, or a
+# search's match count and result page. At most ASYNC_QUERY_CONCURRENCY of
+# them run at once, which caps the pooled connections one request holds.
+#
+# Flask would run every async view in an event loop of its own (asgiref),
+# and pooled connections cannot outlive their loop. Instead, each worker
+# process keeps one event loop running in a background thread, and the
+# request thread waits on its view there, so the async engine keeps a
+# connection pool (SQLALCHEMY_ENGINE_OPTIONS sizes it) across requests.
+#----------------------------------------------------------------------------#
+
+import asyncio
+import datetime
+import os
+import threading
+
+from flask import Blueprint, current_app, request, abort
+from sqlalchemy.engine import make_url
+
+from models import db, Show, Genre, Venue, Artist, venue_genre, artist_genre, venue_search, artist_search
+import artists as artist_pages
+import shows as show_pages
+import venues as venue_pages
+
+
+aio = Blueprint('aio', __name__, url_prefix='/async')
+
+# The sync view each async view renders like: the layout marks the active tab
+# and search form, and links pages, by these endpoints
+SYNC_ENDPOINTS = {
+  'aio.venues': 'venues.index',
+  'aio.search_venues': 'venues.search_venues',
+  'aio.show_venue': 'venues.show_venue',
+  'aio.artists': 'artists.index',
+  'aio.search_artists': 'artists.search_artists',
+  'aio.show_artist': 'artists.show_artist',
+  'aio.shows': 'shows.index',
+}
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+
+
+
+class LoopThread:
+  # One event loop per process, running in a daemon thread and started on
+  # first use (after gunicorn has forked the worker)
+
+  def __init__(self):
+    self.loop = None
+    self.pid = None
+    self.lock = threading.Lock()
+
+
+  def start(self):
+    with self.lock:
+      if self.loop is None or self.pid != os.getpid():
+        self.loop = asyncio.new_event_loop()
+        self.pid = os.getpid()
+        threading.Thread(target=self.loop.run_forever, name='aio-loop', daemon=True).start()
+    return self.loop
+
+
+  def async_to_sync(self, func):
+    # Replaces Flask.async_to_sync. The coroutine is scheduled from the request
+    # thread, so its task runs in a copy of that thread's context, where
+    # current_app and request are bound.
+    def run(*args, **kwargs):
+      return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self.start()).result()
+    return run
+
+
+loop_thread = LoopThread()
+
+
+def init_app(app):
+  app.config.setdefault('ASYNC_QUERY_CONCURRENCY', 2)
+  app.async_to_sync = loop_thread.async_to_sync
+  app.register_blueprint(aio)
+
+
+def page_endpoint():
+  return SYNC_ENDPOINTS.get(request.endpoint, request.endpoint)
+
+
+@aio.context_processor
+def sync_page():
+  return {'page_endpoint': page_endpoint()}
+
+
+def async_engine():
+  # One engine per app, on SQLALCHEMY_ASYNC_DATABASE_URI or else on the sync
+  # database URI with the dialect's async driver
+  engine = current_app.extensions.get('async_engine')
+  if engine is None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    url = current_app.config.get('SQLALCHEMY_ASYNC_DATABASE_URI')
+    if not url:
+      url = make_url(current_app.config['SQLALCHEMY_DATABASE_URI'])
+      url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    url = make_url(url)
+
+    # Same pool settings as the sync engine, and pooled on SQLite too, where
+    # file databases would otherwise get a connection per query
+    engine = current_app.extensions['async_engine'] = create_async_engine(
+      url, poolclass=AsyncAdaptedQueuePool, **current_app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    )
+  return engine
+
+
+async def fetch(statement):
+  async with async_engine().connect() as connection:
+    return (await connection.execute(statement)).all()
+
+
+async def fetch_all(*statements):
+  # Results of the statements, in order, fetched on at most
+  # ASYNC_QUERY_CONCURRENCY connections at a time
+  limit = asyncio.Semaphore(current_app.config['ASYNC_QUERY_CONCURRENCY'])
+
+  async def limited(statement):
+    async with limit:
+      return await fetch(statement)
+
+  return await asyncio.gather(*(limited(statement) for statement in statements))
+
+
+
+
+#----------------------------------------------------------------------------#
+# Shared steps.
+#----------------------------------------------------------------------------#
+
+async def search(search_engine, model):
+  # (search term, page, per page, match count, result rows) for the posted form
+  search_term = request.form.get('search_term', '').lower()
+  page = max(request.form.get('page', 1, type=int), 1)
+  per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+
+  if async_engine().dialect.name == 'postgresql':
+    matches, page_rows = search_engine.search_trigram(search_term, page, per_page)
+    counted, rows = await fetch_all(
+      matches.with_entities(db.func.count(model.id)).statement,
+      Show.upcoming_counts_query(page_rows, model)
+    )
+    return search_term, page, per_page, counted[0][0], rows
+
+  if search_engine.index is None:
+    async with async_engine().connect() as connection:
+      await connection.run_sync(search_engine.load_index)
+  count, page_rows = search_engine.search_ngram_index(search_term, page, per_page)
+  return search_term, page, per_page, count, await fetch(Show.upcoming_counts_query(page_rows, model))
+
+
+async def profile(model, id, association, key, counterpart, prefix):
+  # (row, genre names, timeline) of a venue or artist from four queries
+  owner_key = getattr(Show, key)
+  now = datetime.datetime.utcnow()
+  rows, genres, past, upcoming = await fetch_all(
+    db.select(model.__table__).where(model.id == id),
+    Genre.names_by_owner_query(association, key, [id]),
+    Show.timeline_query(owner_key, id, counterpart, prefix, upcoming=False, now=now),
+    Show.timeline_query(owner_key, id, counterpart, prefix, upcoming=True, now=now),
+  )
+  if not rows:
+    abort(404)
+  return rows[0], [name for owner_id, name in genres], Show.partition_timeline(past + upcoming, prefix)
+
+
+
+
+#----------------------------------------------------------------------------#
+# Views.
+#----------------------------------------------------------------------------#
+
+@aio.route('/venues')
+async def venues():
+  return venue_pages.render_directory(await fetch(Venue.directory_query()))
+
+
+@aio.route('/venues/search', methods=['POST'])
+async def search_venues():
+  return venue_pages.render_search(*await search(venue_search, Venue))
+
+
+@aio.route('/venues/<int:venue_id>')
+async def show_venue(venue_id):
+  return venue_pages.render_profile(*await profile(Venue, venue_id, venue_genre, 'venue_id', Artist, 'artist'))
+
+
+@aio.route('/artists')
+async def artists():
+  return artist_pages.render_listing(await fetch(Artist.listing_query()))
+
+
+@aio.route('/artists/search', methods=['POST'])
+async def search_artists():
+  return artist_pages.render_search(*await search(artist_search, Artist))
+
+
+@aio.route('/artists/<int:artist_id>')
+async def show_artist(artist_id):
+  return artist_pages.render_profile(*await profile(Artist, artist_id, artist_genre, 'artist_id', Venue, 'venue'))
+
+
+@aio.route('/shows')
+async def shows():
+  filters, after, start, end = show_pages.listing_args()
+  limit = current_app.config['SHOWS_PER_PAGE']
+  rows = await fetch(Show.listing_query(after=after, start=start, end=end, limit=limit))
+  return show_pages.render_listing(*Show.listing_page(rows, limit), filters)
@@ -0,0 +1,297 @@
+#----------------------------------------------------------------------------#
+# JSON API (/api/v1).
+#
+# Venues, artists and shows as JSON for the mobile client and partners, built
+# on the same model query layer as the HTML views. Collections are paged with
+# an ?after= cursor, and ?fields=a,b,c picks the attributes returned:
+# only the matching columns are selected, and genres or shows are only loaded
+# when asked for.
+#----------------------------------------------------------------------------#
+
+import datetime
+import json
+
+from flask import Blueprint, current_app, request, abort, url_for, stream_with_context
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Show, Genre, Venue, Artist, venue_genre, artist_genre, show_schedule
+from querystats import query_budget
+from replicas import replica_reads
+import exporter
+import importer
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_PAGE_SIZE = 100
+
+VENUE_FIELDS = (
+  'id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'image_link',
+  'website_link', 'facebook_link', 'seeking_talent', 'seeking_description',
+  'upcoming_shows_count', 'past_shows_count',
+)
+ARTIST_FIELDS = (
+  'id', 'name', 'genres', 'city', 'state', 'phone', 'image_link',
+  'website_link', 'facebook_link', 'seeking_venue', 'seeking_description',
+  'upcoming_shows_count', 'past_shows_count',
+)
+SHOW_FIELDS = (
+  'id', 'start_time', 'end_time', 'venue_id', 'venue_name', 'artist_id', 'artist_name', 'artist_image_link',
+)
+TIMELINE_FIELDS = ('past_shows', 'upcoming_shows')
+
+
+
+
+#----------------------------------------------------------------------------#
+# Serialization.
+#----------------------------------------------------------------------------#
+
+def default(value):
+  if isinstance(value, (datetime.datetime, datetime.date)):
+    return value.isoformat()
+  raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def dumps(payload):
+  # Compact JSON; orjson when installed, otherwise the stdlib encoder
+  if orjson is not None:
+    return orjson.dumps(payload, default=default)
+  return json.dumps(payload, separators=(',', ':'), default=default).encode()
+
+
+def respond(payload, status=200):
+  return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+
+# Registered per status code, since the app's own 404 and 500 pages would
+# otherwise take precedence over a blueprint-wide handler
+@api.errorhandler(400)
+@api.errorhandler(404)
+@api.errorhandler(409)
+@api.errorhandler(500)
+def http_error(error):
+  return respond({"error": {"code": error.code, "message": error.description}}, error.code)
+
+
+
+
+#----------------------------------------------------------------------------#
+# Query parameters.
+#----------------------------------------------------------------------------#
+
+def requested_fields(available):
+  # ?fields=name,city -> ('id', 'name', 'city'); every field when omitted.
+  # The id is always included so clients can follow up on a row.
+  if not request.args.get('fields'):
+    return available
+  fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+  unknown = [field for field in fields if field not in available]
+  if unknown:
+    abort(400, 'Unknown fields: {}'.format(', '.join(unknown)))
+  return tuple(dict.fromkeys(['id'] + fields))
+
+
+def page_size():
+  limit = request.args.get('limit', 30, type=int)
+  if not 1 <= limit <= MAX_PAGE_SIZE:
+    abort(400, 'limit must be between 1 and {}'.format(MAX_PAGE_SIZE))
+  return limit
+
+
+def next_link(cursor):
+  if cursor is None:
+    return None
+  args = request.args.to_dict()
+  args['after'] = cursor
+  return url_for(request.endpoint, **args)
+
+
+
+
+#----------------------------------------------------------------------------#
+# Venues and artists.
+#----------------------------------------------------------------------------#
+
+def collection(model, association, key, available):
+  # One page of venues or artists ordered by id, selecting only the requested
+  # columns; genre names for the whole page come from one extra query
+  fields = requested_fields(available)
+  limit = page_size()
+  columns = [field for field in fields if field != 'genres']
+
+  query = model.query.with_entities(*(getattr(model, column) for column in columns))
+  if request.args.get('after'):
+    try:
+      query = query.filter(model.id > int(request.args['after']))
+    except ValueError:
+      abort(400, 'Invalid cursor')
+
+  rows = query.order_by(model.id).limit(limit + 1).all()
+  next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+  data = [dict(zip(columns, row)) for row in rows[:limit]]
+
+  if 'genres' in fields:
+    genres = Genre.names_by_owner(association, key, [item['id'] for item in data])
+    for item in data:
+      item['genres'] = genres[item['id']]
+
+  return respond({"data": data, "next": next_link(next_cursor)})
+
+
+def detail(model, id, available):
+  # A single venue or artist; its shows, split into past and upcoming by the
+  # same query as the profile page, only when requested
+  fields = requested_fields(available + TIMELINE_FIELDS)
+  entity = model.query.get(id)
+  if entity is None:
+    abort(404, '{} {} not found'.format(model.__name__, id))
+
+  data = {field: getattr(entity, field) for field in fields if field in available and field != 'genres'}
+  if 'genres' in fields:
+    data['genres'] = [genre.name for genre in entity.genres]
+  if any(field in TIMELINE_FIELDS for field in fields):
+    timeline = entity.shows_by_time()
+    data.update((field, timeline[field]) for field in fields if field in TIMELINE_FIELDS)
+
+  return respond({"data": data})
+
+
+@api.route('/venues')
+@query_budget(2)
+@replica_reads
+def venues():
+  return collection(Venue, venue_genre, 'venue_id', VENUE_FIELDS)
+
+
+@api.route('/venues/<int:venue_id>')
+@query_budget(3)
+@replica_reads
+def venue(venue_id):
+  return detail(Venue, venue_id, VENUE_FIELDS)
+
+
+@api.route('/venues/available')
+@query_budget(2)
+@replica_reads
+def available_venues():
+  # Venues with no show overlapping ?start=...&end=... (YYYY-MM-DD HH:MM),
+  # optionally in one ?city=&state=
+  try:
+    start = datetime.datetime.strptime(request.args.get('start', ''), "%Y-%m-%d %H:%M")
+    end = datetime.datetime.strptime(request.args.get('end', ''), "%Y-%m-%d %H:%M")
+  except ValueError:
+    abort(400, 'start and end must look like YYYY-MM-DD HH:MM')
+  if end <= start:
+    abort(400, 'end must be after start')
+
+  candidates = Venue.query.with_entities(Venue.id, Venue.name, Venue.city, Venue.state)
+  for column in ('city', 'state'):
+    if request.args.get(column):
+      candidates = candidates.filter(getattr(Venue, column) == request.args[column])
+  candidates = candidates.order_by(Venue.name, Venue.id)
+
+  rows = show_schedule.free(Venue, 'venue_id', candidates, start, end)
+  return respond({"data": [dict(row._mapping) for row in rows]})
+
+
+@api.route('/artists')
+@query_budget(2)
+@replica_reads
+def artists():
+  return collection(Artist, artist_genre, 'artist_id', ARTIST_FIELDS)
+
+
+@api.route('/artists/<int:artist_id>')
+@query_budget(3)
+@replica_reads
+def artist(artist_id):
+  return detail(Artist, artist_id, ARTIST_FIELDS)
+
+
+
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+@api.route('/shows')
+@query_budget(1)
+@replica_reads
+def shows():
+  # Same keyset listing as /shows, with ?from=YYYY-MM-DD&to=YYYY-MM-DD filters
+  fields = requested_fields(SHOW_FIELDS)
+  limit = page_size()
+
+  try:
+    after = Show.decode_cursor(request.args['after']) if request.args.get('after') else None
+    start = datetime.datetime.strptime(request.args['from'], "%Y-%m-%d") if request.args.get('from') else None
+    end = datetime.datetime.strptime(request.args['to'], "%Y-%m-%d") + datetime.timedelta(days=1) if request.args.get('to') else None
+  except ValueError:
+    abort(400, 'Invalid cursor or date')
+
+  rows, next_cursor = Show.listing(after=after, start=start, end=end, limit=limit)
+  data = [{field: getattr(row, field) for field in fields} for row in rows]
+
+  return respond({"data": data, "next": next_link(next_cursor)})
+
+
+
+
+@api.route('/shows', methods=['POST'])
+@query_budget(6)
+def create_shows():
+  # A JSON array of {"venue_id", "artist_id", "start_time": "YYYY-MM-DD HH:MM:SS"}
+  # created in one transaction: every show is listed, or none is. Validation
+  # and the foreign-key check are shared with `flask import`.
+  payload = request.get_json(silent=True)
+  if not isinstance(payload, list) or not payload or not all(isinstance(item, dict) for item in payload):
+    abort(400, 'Expected a non-empty JSON array of shows')
+
+  try:
+    rejected, pages = importer.load_shows(enumerate(payload))
+    if rejected:
+      db.session.rollback()
+      return respond({"error": {
+        "code": 400,
+        "message": "{} of {} shows are invalid; none were created".format(len(rejected), len(payload)),
+        "rows": [{"index": index, "errors": errors} for index, record, errors in sorted(rejected, key=lambda row: row[0])]
+      }}, 400)
+    db.session.commit()
+  except IntegrityError:
+    # A venue or artist was deleted, or booked, between the checks and the insert
+    db.session.rollback()
+    abort(409, 'A venue or artist of these shows no longer exists or was just booked; none were created')
+
+  current_app.extensions['page_cache'].invalidate(*pages)
+  return respond({"created": len(payload)}, 201)
+
+
+
+
+#----------------------------------------------------------------------------#
+# Export.
+#----------------------------------------------------------------------------#
+
+@api.route('/export/<dataset>')
+@replica_reads
+def export(dataset):
+  # The whole table, streamed from a server-side cursor as it is encoded
+  file_format = request.args.get('format', 'csv')
+  if dataset not in exporter.DATASETS:
+    abort(404, 'Unknown dataset {}'.format(dataset))
+  if file_format not in exporter.formats():
+    abort(400, 'format must be one of: {}'.format(', '.join(exporter.formats())))
+
+  response = current_app.response_class(
+    stream_with_context(exporter.export(dataset, file_format)),
+    mimetype=exporter.MIMETYPES[file_format]
+  )
+  response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(dataset, file_format)
+  return response
@@ -0,0 +1,283 @@
+#----------------------------------------------------------------------------#
+# Artist pages: directory, search, profile and the create/edit/delete forms.
+#
+# Forms are imported by the views that use them, which keeps wtforms out of
+# worker start-up.
+#----------------------------------------------------------------------------#
+
+import sys
+
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+
+from extensions import page_cache
+from models import db, Show, Genre, Artist
+from querystats import query_budget
+from replicas import replica_reads
+from conditional import conditional
+
+
+artists = Blueprint('artists', __name__)
+
+
+#  Page cache keys
+#  ----------------------------------------------------------------
+
+def artist_page_keys(artist_id):
+  # Pages showing this artist: its profile, the artist list, the show listing,
+  # the venue directory (upcoming show counts) and the profile of every venue
+  # they are booked at
+  venue_ids = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+  
+  return ['artists', 'shows', 'venues', 'artist:{}'.format(artist_id)] + [
+    'venue:{}'.format(venue_id) for (venue_id,) in venue_ids
+  ]
+
+
+
+#  Artists
+#  ----------------------------------------------------------------
+@artists.route('/artists')
+@query_budget(2)
+@replica_reads
+@conditional(Artist.listing_version)
+@page_cache.cached('artists')
+def index():
+  # TODO: replace with real data returned from querying the database
+  return render_listing(db.session.execute(Artist.listing_query()))
+
+
+def render_listing(artistData):
+  data = [
+    {
+      "id": artist.id, 
+      "name": artist.name
+    } for artist in artistData
+  ]
+  
+
+  return render_template('pages/artists.html', artists=data)
+
+
+
+
+@artists.route('/artists/search', methods=['POST'])
+@query_budget(3)
+@replica_reads
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+  search_term=request.form.get('search_term', '').lower()
+  page = max(request.form.get('page', 1, type=int), 1)
+  per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+  
+  count, rows = Artist.search(search_term, page=page, per_page=per_page)
+  
+  return render_search(search_term, page, per_page, count, rows)
+
+
+def render_search(search_term, page, per_page, count, rows):
+  response={
+    "count": count,
+    "page": page,
+    "pages": (count + per_page - 1) // per_page,
+    "data": [
+      {
+        "id": row.id, 
+        "name": row.name, 
+        "num_upcoming_shows": row.num_upcoming_shows
+      } for row in rows
+    ]
+  }
+  
+  return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+
+
+
+@artists.route('/artists/<int:artist_id>')
+@query_budget(4)
+@replica_reads
+@conditional(lambda artist_id: Artist.profile_version(artist_id))
+@page_cache.cached('artist:{artist_id}')
+def show_artist(artist_id):
+  # shows the artist page with the given artist_id
+  # TODO: replace with real artist data from the artist table, using artist_id
+  
+  artist = Artist.query.get(artist_id)
+  
+  return render_profile(artist, [genre.name for genre in artist.genres], artist.shows_by_time())
+
+
+def render_profile(artist, genres, timeline):
+  # artist: the Artist or a row of its columns
+  data={
+    "id": artist.id,
+    "name": artist.name,
+    "genres": genres,
+    "city": artist.city,
+    "state": artist.state,
+    "phone": artist.phone,
+    "website": artist.website_link,
+    "facebook_link":  artist.facebook_link,
+    "seeking_venue":  artist.phone,
+    "seeking_description":  artist.seeking_description,
+    "image_link":  artist.image_link,
+  }
+  data.update(timeline)
+  
+  return render_template('pages/show_artist.html', artist=data)
+
+
+
+
+#  Update
+#  ----------------------------------------------------------------
+@artists.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  
+  # TODO: populate form with values from artist with ID <artist_id>
+  
+  data = Artist.query.get(artist_id)
+  genres = [genre.name for genre in data.genres]
+  from forms import ArtistForm
+  form = ArtistForm(obj=data)
+
+  form.genres.data = genres
+  
+  
+  artist={
+    "id": data.id,
+    "name": data.name,
+    "genres": genres,
+    "city": data.city,
+    "state": data.state,
+    "phone": data.phone,
+    "website": data.website_link,
+    "facebook_link":  data.facebook_link,
+    "seeking_venue":  data.phone,
+    "seeking_description":  data.seeking_description,
+    "image_link":  data.image_link,
+  }
+  # TODO: populate form with fields from artist with ID <artist_id>
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+
+
+@artists.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+  
+  artist = Artist.query.get(artist_id)
+  
+  from forms import ArtistForm
+  form = ArtistForm(request.form)
+
+  try:
+    artist.name=form.name.data
+    artist.city=form.city.data
+    artist.state= form.state.data
+    artist.phone=form.phone.data
+    artist.genres=Genre.lookup(form.genres.data)
+    artist.facebook_link=form.facebook_link.data
+    artist.image_link=form.image_link.data
+    artist.website_link=form.website_link.data
+    artist.seeking_venue=form.seeking_venue.data
+    artist.seeking_description=form.seeking_description.data
+  
+    db.session.add(artist)
+    db.session.commit()
+    page_cache.invalidate(*artist_page_keys(artist_id))
+    
+    # on successful db insert, flash success
+    flash('Artist ' + form.name.data + ' was successfully update!')
+    
+  except:
+    print(sys.exc_info())
+    db.session.rollback()
+    
+  finally:
+    db.session.close()
+  
+
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@artists.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@artists.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  from forms import ArtistForm
+  form = ArtistForm(request.form)
+  
+  try:
+    artist = Artist(
+        name=form.name.data,
+        city=form.city.data,
+        state= form.state.data,
+        phone=form.phone.data,
+        genres=Genre.lookup(form.genres.data),
+        facebook_link=form.facebook_link.data,
+        image_link=form.image_link.data,
+        website_link=form.website_link.data,
+        seeking_description=form.seeking_description.data,
+        seeking_venue=form.seeking_venue.data
+    )
+    
+    db.session.add(artist)
+    db.session.commit()
+    page_cache.invalidate('artists')
+    flash('Artist ' + request.form.get('name') + ' was successfully listed!')
+    
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+    flash('An error occurred. Artist ' + request.form.get('name') + ' could not be listed.')
+  
+  finally:
+    db.session.close()
+    
+  
+  # on successful db insert, flash success
+  return render_template('pages/home.html')
+
+
+
+
+@artists.route('/artists/delete/<artist_id>', methods=['DELETE', 'GET'])
+def delete_artist(artist_id):
+  # TODO: Complete this endpoint for taking a artist_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  try: 
+    artist = Artist.query.get(artist_id)
+    stale_pages = artist_page_keys(artist.id)
+    db.session.delete(artist)
+    db.session.commit()
+    page_cache.invalidate(*stale_pages)
+  except:
+    db.session.rollback()
+  finally: 
+    db.session.close()
+    
+  
+  # BONUS CHALLENGE: Implement a button to delete a artist on a artist Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return redirect(url_for('artists.index'))
+
+
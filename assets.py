@@ -0,0 +1,348 @@
+#----------------------------------------------------------------------------#
+# Static asset build and serving.
+#
+# `flask build-assets` writes static/dist/: every file under static/ copied
+# under a content-hashed name, the CSS and JS bundles of the layout (joined
+# and minified), resized variants of the images for srcset, and gzip (and,
+# with the brotli package, brotli) copies of the text files. A manifest maps
+# each logical name ('css/app.css', 'img/front-splash.jpg') to its hashed
+# file. Templates link assets through asset_url(), bundle_urls() and
+# asset_srcset(); without a manifest, or in debug mode, they fall back to the
+# source files. Hashed files never change, so they are served with a one
+# year immutable Cache-Control and the precompressed copy the client accepts.
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import importlib.util
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+try:
+  import rjsmin
+except ImportError:
+  rjsmin = None
+
+
+DIST = 'dist'
+
+# Bundle name: source files under static/, in load order
+BUNDLES = {
+  'css/app.css': [
+    'css/bootstrap.min.css',
+    'css/layout.main.css',
+    'css/main.css',
+    'css/main.responsive.css',
+    'css/main.quickfix.css',
+  ],
+  # Needed before the body renders
+  'js/head.js': [
+    'js/libs/modernizr-2.8.2.min.js',
+    'js/libs/moment.min.js',
+  ],
+  # Loaded with defer at the end of the body
+  'js/app.js': [
+    'js/libs/jquery-1.11.1.min.js',
+    'js/libs/bootstrap-3.1.1.min.js',
+    'js/plugins.js',
+    'js/script.js',
+  ],
+}
+
+# Widths of the resized image variants; only those narrower than the image
+IMAGE_WIDTHS = (480, 960, 1440)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Precompressed when the compressed copy saves at least a tenth
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ttf', '.otf', '.eot', '.json', '.txt', '.map')
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+def hashed_name(name, content):
+  root, extension = posixpath.splitext(name)
+  return '{}.{}{}'.format(root, hashlib.sha256(content).hexdigest()[:12], extension)
+
+
+def write(dist, name, content):
+  path = os.path.join(dist, name)
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, 'wb') as stream:
+    stream.write(content)
+
+
+CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*!.*?\*/)|(/\*.*?\*/)|(\s+)''', re.S)
+CSS_PUNCTUATION = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(\s*;\s*(?=})|(?<=:)\s+)|\s*([{};,>])\s*|\s+''')
+
+
+def minify_css(text):
+  # Drops comments (but keeps /*! license */ ones) and whitespace that does
+  # not separate tokens; strings are left alone. Spaces before a colon are
+  # kept, since 'a :hover' and 'a:hover' are different selectors, and so are
+  # spaces around + and -, which calc() needs.
+  def tokens(match):
+    string, license, comment, space = match.groups()
+    return match.group(0) if string or license else ' '
+
+  def punctuation(match):
+    string, dropped, mark = match.groups()
+    if string:
+      return string
+    if mark:
+      return mark
+    return '' if dropped else ' '
+
+  return CSS_PUNCTUATION.sub(punctuation, CSS_TOKENS.sub(tokens, text)).strip()
+
+
+def minify_js(name, text):
+  # Already minified libraries are used as they are; the rest only when
+  # rjsmin is installed
+  if name.endswith('.min.js') or rjsmin is None:
+    return text
+  return rjsmin.jsmin(text)
+
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def rewrite_css_urls(text, source, bundle, assets, static_url_path):
+  # Relative url()s in a source file point next to it; in the bundle they are
+  # rewritten to the hashed copy, or to the original under /static when the
+  # file is not there
+  def replace(match):
+    url = match.group(2)
+    if re.match(r'^(data:|[a-z]+://|/)', url):
+      return match.group(0)
+    path, suffix = re.match(r'^([^?#]*)(.*)$', url).groups()
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+    if target in assets:
+      url = posixpath.relpath(assets[target], posixpath.dirname(bundle)) + suffix
+    else:
+      url = '{}/{}{}'.format(static_url_path, target, suffix)
+    return 'url("{}")'.format(url)
+
+  return CSS_URL.sub(replace, text)
+
+
+def resized_variants(path, name):
+  # (width, name, bytes) of an image's variant for each narrower IMAGE_WIDTHS
+  from PIL import Image
+  import io
+
+  variants = []
+  with Image.open(path) as image:
+    root, extension = posixpath.splitext(name)
+    for width in IMAGE_WIDTHS:
+      if width >= image.width:
+        continue
+      resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+      buffer = io.BytesIO()
+      if extension == '.png':
+        resized.save(buffer, 'PNG', optimize=True)
+      else:
+        resized.convert('RGB').save(buffer, 'JPEG', quality=80, optimize=True, progressive=True)
+      variants.append((width, '{}-{}w{}'.format(root, width, extension), buffer.getvalue()))
+  return variants
+
+
+def source_files(static_folder):
+  # Logical names of every file under static/ except the build output
+  for directory, subdirectories, files in os.walk(static_folder):
+    subdirectories[:] = sorted(d for d in subdirectories if os.path.join(directory, d) != os.path.join(static_folder, DIST))
+    for filename in sorted(files):
+      if filename.startswith('.'):
+        continue
+      path = os.path.join(directory, filename)
+      yield os.path.relpath(path, static_folder).replace(os.sep, '/')
+
+
+def build(static_folder, static_url_path, images=True):
+  # Rebuilds static/dist and returns the manifest
+  dist = os.path.join(static_folder, DIST)
+  shutil.rmtree(dist, ignore_errors=True)
+  manifest = {'assets': {}, 'srcsets': {}, 'encodings': {}}
+  assets = manifest['assets']
+  # Resized variants need Pillow
+  resize = images and importlib.util.find_spec('PIL') is not None
+
+  for name in source_files(static_folder):
+    with open(os.path.join(static_folder, name), 'rb') as stream:
+      content = stream.read()
+    assets[name] = hashed_name(name, content)
+    write(dist, assets[name], content)
+
+    if resize and name.lower().endswith(IMAGE_EXTENSIONS):
+      srcset = []
+      for width, variant, data in resized_variants(os.path.join(static_folder, name), name):
+        assets[variant] = hashed_name(variant, data)
+        write(dist, assets[variant], data)
+        srcset.append((width, assets[variant]))
+      if srcset:
+        manifest['srcsets'][name] = srcset
+
+  for bundle, sources in BUNDLES.items():
+    parts = []
+    for source in sources:
+      with open(os.path.join(static_folder, source), encoding='utf-8') as stream:
+        text = stream.read()
+      if bundle.endswith('.css'):
+        parts.append(minify_css(rewrite_css_urls(text, source, bundle, assets, static_url_path)))
+      else:
+        # Source map comments would point at maps that no longer match
+        text = re.sub(r'^\s*//[#@] sourceMappingURL=.*$', '', text, flags=re.M)
+        parts.append(minify_js(source, text).strip().rstrip(';') + ';')
+    content = '\n'.join(parts).encode()
+    assets[bundle] = hashed_name(bundle, content)
+    write(dist, assets[bundle], content)
+
+  for name in sorted(set(assets.values())):
+    if name.endswith(COMPRESSIBLE):
+      manifest['encodings'][name] = compress(dist, name)
+
+  with open(os.path.join(dist, 'manifest.json'), 'w') as stream:
+    json.dump(manifest, stream, indent=1, sort_keys=True)
+  return manifest
+
+
+def compress(dist, name):
+  # Writes name.gz (and name.br) next to the file; returns the encodings kept
+  path = os.path.join(dist, name)
+  with open(path, 'rb') as stream:
+    content = stream.read()
+
+  encoded = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+  if brotli is not None:
+    encoded['br'] = brotli.compress(content, quality=11)
+
+  kept = []
+  for encoding, data in encoded.items():
+    if len(data) <= len(content) * 0.9:
+      write(dist, name + ENCODING_SUFFIXES[encoding], data)
+      kept.append(encoding)
+  return kept
+
+
+
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+def manifest():
+  return current_app.extensions['assets'].manifest
+
+
+def asset_url(filename, width=None):
+  # URL of a static file: its hashed copy (or its resized variant of the
+  # given width) when built, else the source file
+  entries = manifest()
+  if entries is None:
+    return url_for('static', filename=filename)
+  if width is not None:
+    for variant_width, name in entries['srcsets'].get(filename, ()):
+      if variant_width == width:
+        return url_for('static', filename=DIST + '/' + name)
+  if filename in entries['assets']:
+    return url_for('static', filename=DIST + '/' + entries['assets'][filename])
+  return url_for('static', filename=filename)
+
+
+def bundle_urls(bundle):
+  # One hashed bundle when built; the source files one by one otherwise
+  if manifest() is None:
+    return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+  return [asset_url(bundle)]
+
+
+def asset_srcset(filename):
+  # "url 480w, url 960w, ..." for an image's resized variants, or ''
+  entries = manifest()
+  if entries is None:
+    return ''
+  return ', '.join(
+    '{} {}w'.format(url_for('static', filename=DIST + '/' + name), width)
+    for width, name in entries['srcsets'].get(filename, ())
+  )
+
+
+def send_static(filename):
+  # The app's static view. Hashed files get the best precompressed copy the
+  # client accepts and are cached for good; the manifest and other unhashed
+  # files under dist/ are revalidated on every use, and anything else is
+  # served as usual.
+  if not filename.startswith(DIST + '/') or manifest() is None:
+    return current_app.send_static_file(filename)
+
+  name = filename[len(DIST) + 1:]
+  if name not in current_app.extensions['assets'].hashed:
+    response = send_from_directory(os.path.join(current_app.static_folder, DIST), name)
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = None
+    return response
+
+  suffix, encoding = '', None
+  for candidate in manifest()['encodings'].get(name, ()):
+    if candidate in request.accept_encodings and (encoding is None or candidate == 'br'):
+      suffix, encoding = ENCODING_SUFFIXES[candidate], candidate
+
+  response = send_from_directory(
+    os.path.join(current_app.static_folder, DIST), name + suffix,
+    mimetype=mimetypes.guess_type(name)[0],
+    max_age=current_app.config['ASSETS_MAX_AGE'],
+  )
+  if encoding:
+    response.headers['Content-Encoding'] = encoding
+  if manifest()['encodings'].get(name):
+    response.vary.add('Accept-Encoding')
+  response.cache_control.public = True
+  response.cache_control.immutable = True
+  return response
+
+
+
+
+class Assets:
+
+  def __init__(self, app=None):
+    self.manifest = None
+    self.hashed = frozenset()
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    # Debug mode reads the source files, so edits show without a rebuild
+    app.config.setdefault('ASSETS_USE_MANIFEST', not app.debug)
+    app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+
+    self.manifest = None
+    self.hashed = frozenset()
+    path = os.path.join(app.static_folder, DIST, 'manifest.json')
+    if app.config['ASSETS_USE_MANIFEST'] and os.path.exists(path):
+      with open(path) as stream:
+        self.manifest = json.load(stream)
+      # Only these names are ever reused for the same content
+      self.hashed = frozenset(self.manifest['assets'].values())
+
+    app.extensions['assets'] = self
+    app.view_functions['static'] = send_static
+    app.add_template_global(asset_url)
+    app.add_template_global(bundle_urls)
+    app.add_template_global(asset_srcset)
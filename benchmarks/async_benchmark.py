@@ -0,0 +1,64 @@
+#----------------------------------------------------------------------------#
+# Sync views against the async read path (/async/...) under load.
+#
+#   python benchmarks/async_benchmark.py --seed-shows 100000
+#   python benchmarks/async_benchmark.py --database-url postgresql://.../fyyur_bench \
+#     --configs gthread:4x16 --concurrency 128 --duration 30
+#
+# Runs the loadtest.py harness twice per gunicorn configuration, once on the
+# listing and profile pages and once on their /async twins, with the page
+# cache off so both sides hit the database on every request. Set
+# DB_POOL_SIZE to at least the threads per worker, as both engines share it.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest import seed_database, start_server, run_load
+
+PATHS = ['/venues', '/artists', '/shows', '/venues/1', '/artists/1', '/venues/2', '/artists/2']
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--database-url', default='sqlite:////tmp/fyyur_loadtest.db')
+  parser.add_argument('--seed-shows', type=int, default=0, help='Reseed with this many shows first.')
+  parser.add_argument('--configs', default='gthread:2x16')
+  parser.add_argument('--concurrency', type=int, default=64)
+  parser.add_argument('--duration', type=float, default=15)
+  parser.add_argument('--port', type=int, default=8765)
+  args = parser.parse_args()
+
+  if args.seed_shows:
+    seed_database(args.database_url, args.seed_shows)
+
+  env = dict(os.environ, FYYUR_ENV='production', SECRET_KEY='benchmark', DATABASE_URL=args.database_url, PAGE_CACHE_BACKEND='')
+
+  print('{:<16} {:<7} {:>10} {:>10} {:>10} {:>8}'.format('config', 'path', 'req/s', 'p50 ms', 'p95 ms', 'errors'))
+  for spec in args.configs.split(','):
+    for variant, prefix in (('sync', ''), ('async', '/async')):
+      server = start_server(spec, args.port, env)
+      try:
+        paths = [prefix + path for path in PATHS]
+        run_load(args.port, paths, args.concurrency, 1)
+        latencies, errors = run_load(args.port, paths, args.concurrency, args.duration)
+      finally:
+        server.terminate()
+        server.wait()
+
+      latencies.sort()
+      print('{:<16} {:<7} {:>10.1f} {:>10.2f} {:>10.2f} {:>8}'.format(
+        spec, variant,
+        len(latencies) / args.duration,
+        statistics.median(latencies) * 1000 if latencies else 0,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        errors
+      ))
+
+
+if __name__ == '__main__':
+  main()
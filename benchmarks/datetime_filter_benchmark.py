@@ -0,0 +1,64 @@
+#----------------------------------------------------------------------------#
+# The `datetime` template filter, per call.
+#
+#   python benchmarks/datetime_filter_benchmark.py --calls 20000
+#
+# Compares the original filter (dateutil parses a string the view built with
+# strftime, then Babel parses the pattern) with the current one, given both a
+# string and the datetime the views now pass, for the 'full' and 'medium'
+# formats. A /shows page renders one call per show tile.
+#----------------------------------------------------------------------------#
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def original_format_datetime(value, format='medium'):
+  import babel.dates
+  import dateutil.parser
+
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format, locale='en')
+
+
+def per_call(function, values, format):
+  started = time.perf_counter()
+  for value in values:
+    function(value, format)
+  return (time.perf_counter() - started) / len(values) * 1e6
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--calls', type=int, default=20000)
+  args = parser.parse_args()
+
+  from app import format_datetime
+
+  start = datetime.datetime(2027, 1, 1, 20, 0)
+  datetimes = [start + datetime.timedelta(hours=i * 7) for i in range(args.calls)]
+  strings = [value.strftime('%Y-%m-%d %H:%M:%S') for value in datetimes]
+
+  for value, text in zip(datetimes[:50], strings[:50]):
+    for format in ('full', 'medium'):
+      assert format_datetime(value, format) == original_format_datetime(text, format)
+
+  print('{:<8} {:>16} {:>16} {:>16} {:>9}'.format('format', 'original us', 'string us', 'datetime us', 'speed-up'))
+  for format in ('full', 'medium'):
+    original = per_call(original_format_datetime, strings, format)
+    string = per_call(format_datetime, strings, format)
+    fast = per_call(format_datetime, datetimes, format)
+    print('{:<8} {:>16.1f} {:>16.1f} {:>16.1f} {:>8.1f}x'.format(format, original, string, fast, original / fast))
+
+
+if __name__ == '__main__':
+  main()
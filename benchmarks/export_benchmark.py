@@ -0,0 +1,68 @@
+#----------------------------------------------------------------------------#
+# Streaming export throughput and memory.
+#
+#   python benchmarks/export_benchmark.py --database-url postgresql://.../fyyur_bench
+#   python benchmarks/export_benchmark.py --shows 1000000 --formats csv,ndjson
+#
+# Seeds venues, artists and the requested number of shows with seed.py, then
+# exports the shows in every format to /dev/null, reporting rows/s and the
+# peak Python memory allocated while exporting (which should not grow with
+# --shows).
+# The target database is dropped and recreated, so never point it at real data.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--database-url', default='sqlite:////tmp/fyyur_export_benchmark.db')
+  parser.add_argument('--shows', type=int, default=1000000)
+  parser.add_argument('--formats', default='csv,ndjson,parquet')
+  parser.add_argument('--chunk-size', type=int, default=5000)
+  args = parser.parse_args()
+
+  from app import create_app
+  app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+  from models import db
+  import exporter
+  import seed
+
+  with app.app_context():
+    db.drop_all()
+    db.create_all()
+    stats = seed.populate(args.shows)
+    db.session.commit()
+    print('seeded {shows} shows in {seconds:.1f}s'.format(**stats))
+
+    print('{:<8} {:>10} {:>12} {:>12} {:>14}'.format('format', 'seconds', 'rows/s', 'MB written', 'peak MB (py)'))
+    for file_format in args.formats.split(','):
+      if file_format not in exporter.formats():
+        print('{:<8} skipped, not available'.format(file_format))
+        continue
+
+      written = 0
+      tracemalloc.start()
+      started = time.perf_counter()
+      with open(os.devnull, 'wb') as output:
+        for block in exporter.export('shows', file_format, chunk_size=args.chunk_size):
+          written += len(block)
+          output.write(block)
+      seconds = time.perf_counter() - started
+      peak = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      db.session.rollback()
+
+      print('{:<8} {:>10.2f} {:>12.0f} {:>12.1f} {:>14.1f}'.format(
+        file_format, seconds, stats['shows'] / seconds, written / 1e6, peak / 1e6
+      ))
+
+
+if __name__ == '__main__':
+  main()
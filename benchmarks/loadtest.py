@@ -0,0 +1,150 @@
+#----------------------------------------------------------------------------#
+# Throughput per gunicorn worker configuration.
+#
+#   python benchmarks/loadtest.py --seed-shows 100000
+#   python benchmarks/loadtest.py --database-url postgresql://.../fyyur_bench \
+#     --configs sync:4,gthread:4x8,gevent:4x100 --concurrency 64 --duration 30
+#
+# Each configuration is "<worker class>:<workers>[x<threads or greenlets>]".
+# For every one, gunicorn is started with gunicorn.conf.py on a local port
+# and a pool of keep-alive client threads requests the read routes in a loop
+# for --duration seconds; requests/s, p50/p95 latency and errors are printed.
+# --seed-shows drops and reseeds the database first, so never point it at
+# real data.
+#----------------------------------------------------------------------------#
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ['/venues', '/artists', '/shows', '/venues/1', '/artists/1', '/api/v1/shows?limit=30']
+
+
+def seed_database(database_url, shows):
+  from app import create_app
+  app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+  from models import db
+  import seed
+
+  with app.app_context():
+    db.drop_all()
+    db.create_all()
+    seed.populate(shows)
+    db.session.commit()
+
+
+def start_server(spec, port, env):
+  worker_class, _, size = spec.partition(':')
+  workers, _, per_worker = size.partition('x')
+  env = dict(env, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=workers or '1',
+             GUNICORN_BIND='127.0.0.1:{}'.format(port), GUNICORN_ACCESS_LOG='')
+  if per_worker:
+    env['GUNICORN_THREADS' if worker_class == 'gthread' else 'GUNICORN_WORKER_CONNECTIONS'] = per_worker
+    if worker_class == 'gthread':
+      env.setdefault('DB_POOL_SIZE', per_worker)
+
+  server = subprocess.Popen(
+    [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application'],
+    cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+  )
+  deadline = time.monotonic() + 30
+  while time.monotonic() < deadline:
+    try:
+      socket.create_connection(('127.0.0.1', port), timeout=1).close()
+      return server
+    except OSError:
+      time.sleep(0.2)
+  server.kill()
+  raise RuntimeError('gunicorn did not start for {}'.format(spec))
+
+
+def run_load(port, paths, concurrency, duration):
+  latencies, errors = [], [0]
+  lock = threading.Lock()
+  deadline = time.monotonic() + duration
+
+  def client(offset):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    mine, failed, i = [], 0, offset
+    while time.monotonic() < deadline:
+      path = paths[i % len(paths)]
+      i += 1
+      started = time.perf_counter()
+      try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 400:
+          failed += 1
+      except (OSError, http.client.HTTPException):
+        failed += 1
+        connection.close()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        continue
+      mine.append(time.perf_counter() - started)
+    with lock:
+      latencies.extend(mine)
+      errors[0] += failed
+
+  threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return latencies, errors[0]
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--database-url', default='sqlite:////tmp/fyyur_loadtest.db')
+  parser.add_argument('--seed-shows', type=int, default=0, help='Reseed with this many shows first.')
+  parser.add_argument('--configs', default='sync:4,gthread:2x8,gevent:2x100')
+  parser.add_argument('--concurrency', type=int, default=32)
+  parser.add_argument('--duration', type=float, default=15)
+  parser.add_argument('--port', type=int, default=8765)
+  parser.add_argument('--paths', default=','.join(PATHS))
+  parser.add_argument('--no-page-cache', action='store_true', help='Measure without the rendered-page cache.')
+  args = parser.parse_args()
+
+  if args.seed_shows:
+    seed_database(args.database_url, args.seed_shows)
+
+  env = dict(os.environ, FYYUR_ENV='production', SECRET_KEY='benchmark', DATABASE_URL=args.database_url)
+  if args.no_page_cache:
+    env['PAGE_CACHE_BACKEND'] = ''
+  elif 'REDIS_URL' not in env:
+    # Production shares the page cache between workers through Redis
+    parser.error('set REDIS_URL for the page cache, or pass --no-page-cache')
+  paths = args.paths.split(',')
+
+  print('{:<16} {:>10} {:>10} {:>10} {:>8}'.format('config', 'req/s', 'p50 ms', 'p95 ms', 'errors'))
+  for spec in args.configs.split(','):
+    server = start_server(spec, args.port, env)
+    try:
+      run_load(args.port, paths, args.concurrency, 1)
+      latencies, errors = run_load(args.port, paths, args.concurrency, args.duration)
+    finally:
+      server.terminate()
+      server.wait()
+
+    latencies.sort()
+    print('{:<16} {:>10.1f} {:>10.2f} {:>10.2f} {:>8}'.format(
+      spec,
+      len(latencies) / args.duration,
+      statistics.median(latencies) * 1000 if latencies else 0,
+      latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+      errors
+    ))
+
+
+if __name__ == '__main__':
+  main()
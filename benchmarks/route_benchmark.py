@@ -0,0 +1,302 @@
+#----------------------------------------------------------------------------#
+# Latency, query count and memory of every route at growing data volumes.
+#
+#   python benchmarks/route_benchmark.py
+#   python benchmarks/route_benchmark.py --scales 1000,10000 --requests 50
+#   python benchmarks/route_benchmark.py --database-url postgresql://.../fyyur_bench
+#   python benchmarks/route_benchmark.py --save-baseline
+#
+# For each scale (number of shows) the database is rebuilt with the
+# migrations and filled by seed.py, then every route of the app is requested
+# through the Flask test client: reads first, then the create, edit and
+# delete forms on rows of their own. The page cache is off. Per route it
+# reports p50/p95 latency, the queries issued and the peak Python memory of
+# one request. The results are compared with the saved baseline
+# (benchmarks/route_baseline.json), and the run exits non-zero when a route
+# issues more queries than its baseline, or its p95 latency or memory grows
+# beyond --tolerance. The database is dropped and recreated, so never point
+# it at real data.
+#----------------------------------------------------------------------------#
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'route_baseline.json')
+
+# Seeding is anchored to a fixed date so every run sees the same rows
+NOW = datetime.datetime(2026, 1, 1)
+
+# Latency and memory regressions smaller than these are noise
+MIN_LATENCY_MS = 1.0
+MIN_MEMORY_KB = 256
+
+
+def rebuild(app, db):
+  # Empty database at the latest migration, with the same indexes and
+  # constraints as production
+  from flask_migrate import upgrade
+
+  with app.app_context():
+    db.drop_all()
+    db.session.execute(db.text('DROP TABLE IF EXISTS alembic_version'))
+    db.session.commit()
+    upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+
+def sample(db, Venue, Artist, Genre):
+  # The busiest venue and artist (the largest profile pages) and a genre
+  busiest = lambda model: db.session.query(model.id).order_by(
+    (model.upcoming_shows_count + model.past_shows_count).desc(), model.id
+  ).limit(1).scalar()
+  return {
+    'venue_id': busiest(Venue),
+    'artist_id': busiest(Artist),
+    'genre': db.session.query(Genre.name).order_by(Genre.id).limit(1).scalar(),
+  }
+
+
+# (endpoint, method, path, test client keyword arguments); the path is filled
+# in with the ids sample() picks and is the route's name in the results
+READS = [
+  ('pages.index', 'GET', '/', {}),
+  ('pages.browse_genre', 'GET', '/genres/{genre}', {}),
+  ('venues.index', 'GET', '/venues', {}),
+  ('venues.search_venues', 'POST', '/venues/search', {'data': {'search_term': 'music'}}),
+  ('venues.show_venue', 'GET', '/venues/{venue_id}', {}),
+  ('venues.create_venue_form', 'GET', '/venues/create', {}),
+  ('venues.edit_venue', 'GET', '/venues/{venue_id}/edit', {}),
+  ('artists.index', 'GET', '/artists', {}),
+  ('artists.search_artists', 'POST', '/artists/search', {'data': {'search_term': 'band'}}),
+  ('artists.show_artist', 'GET', '/artists/{artist_id}', {}),
+  ('artists.create_artist_form', 'GET', '/artists/create', {}),
+  ('artists.edit_artist', 'GET', '/artists/{artist_id}/edit', {}),
+  ('shows.index', 'GET', '/shows', {}),
+  ('shows.index', 'GET', '/shows?from=2025-06-01&to=2025-06-30', {}),
+  ('shows.create_shows', 'GET', '/shows/create', {}),
+  ('api.venues', 'GET', '/api/v1/venues', {}),
+  ('api.venue', 'GET', '/api/v1/venues/{venue_id}', {}),
+  ('api.available_venues', 'GET', '/api/v1/venues/available?start=2026-02-06 20:00&end=2026-02-06 23:00', {}),
+  ('api.artists', 'GET', '/api/v1/artists', {}),
+  ('api.artist', 'GET', '/api/v1/artists/{artist_id}', {}),
+  ('api.shows', 'GET', '/api/v1/shows', {}),
+  ('api.export', 'GET', '/api/v1/export/venues?format=csv', {}),
+  ('aio.venues', 'GET', '/async/venues', {}),
+  ('aio.search_venues', 'POST', '/async/venues/search', {'data': {'search_term': 'music'}}),
+  ('aio.show_venue', 'GET', '/async/venues/{venue_id}', {}),
+  ('aio.artists', 'GET', '/async/artists', {}),
+  ('aio.search_artists', 'POST', '/async/artists/search', {'data': {'search_term': 'band'}}),
+  ('aio.show_artist', 'GET', '/async/artists/{artist_id}', {}),
+  ('aio.shows', 'GET', '/async/shows', {}),
+]
+
+
+VENUE_FORM = {
+  'city': 'Austin', 'state': 'TX', 'address': '1 Main St', 'phone': '512-555-0100',
+  'genres': ['Jazz', 'Blues'], 'seeking_talent': 'y', 'seeking_description': 'Benchmark',
+}
+ARTIST_FORM = {
+  'city': 'Austin', 'state': 'TX', 'phone': '512-555-0100', 'genres': ['Jazz'],
+  'seeking_venue': 'y', 'seeking_description': 'Benchmark',
+}
+
+
+def start(day):
+  # Show times after every seeded show
+  return (NOW + datetime.timedelta(days=400 + day)).strftime('%Y-%m-%d 20:00:00')
+
+
+# (endpoint, function of (iteration, ids of the venues and artists the run
+# created) returning one request), in the order they have to run. Each
+# iteration works on its own venue and artist.
+WRITES = [
+  ('venues.create_venue_submission', lambda i, new: (
+    'POST', '/venues/create', {'data': dict(VENUE_FORM, name='Benchmark Venue {}'.format(i))})),
+  ('artists.create_artist_submission', lambda i, new: (
+    'POST', '/artists/create', {'data': dict(ARTIST_FORM, name='Benchmark Artist {}'.format(i))})),
+  ('venues.edit_venue_submission', lambda i, new: (
+    'POST', '/venues/{}/edit'.format(new['venues'][i]), {'data': dict(VENUE_FORM, name='Benchmark Venue {}'.format(i))})),
+  ('artists.edit_artist_submission', lambda i, new: (
+    'POST', '/artists/{}/edit'.format(new['artists'][i]), {'data': dict(ARTIST_FORM, name='Benchmark Artist {}'.format(i))})),
+  ('shows.create_show_submission', lambda i, new: (
+    'POST', '/shows/create', {'data': {
+      'venue_id': new['venues'][i], 'artist_id': new['artists'][i], 'start_time': start(0),
+    }})),
+  ('api.create_shows', lambda i, new: (
+    'POST', '/api/v1/shows', {'json': [
+      {'venue_id': new['venues'][i], 'artist_id': new['artists'][i], 'start_time': start(1)},
+    ]})),
+  ('artists.delete_artist', lambda i, new: ('GET', '/artists/delete/{}'.format(new['artists'][i]), {})),
+  ('venues.delete_venue', lambda i, new: ('GET', '/venues/delete/{}'.format(new['venues'][i]), {})),
+]
+
+
+def check_coverage(app):
+  endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != 'static'}
+  missing = endpoints - {read[0] for read in READS} - {write[0] for write in WRITES}
+  if missing:
+    raise SystemExit('No benchmark request for: {}'.format(', '.join(sorted(missing))))
+
+
+
+
+def timed(client, method, path, kwargs):
+  started = time.perf_counter()
+  response = client.open(path, method=method, **kwargs)
+  response.get_data()
+  elapsed = time.perf_counter() - started
+  if response.status_code >= 400:
+    raise RuntimeError('{} {} answered {}'.format(method, path, response.status_code))
+
+  match = re.search(r'desc="(\d+) queries"', response.headers.get('Server-Timing', ''))
+  return elapsed, int(match.group(1)) if match else 0
+
+
+def traced(client, method, path, kwargs):
+  # Peak Python memory of one request, in KB above what was allocated before it
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  timed(client, method, path, kwargs)
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return (peak - before) / 1024
+
+
+def summary(latencies, queries, peak_kb):
+  latencies = sorted(latencies)
+  return {
+    'p50_ms': round(statistics.median(latencies) * 1000, 2),
+    'p95_ms': round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 2),
+    'queries': max(queries),
+    'peak_kb': round(peak_kb, 1),
+  }
+
+
+def run_scale(app, db, shows, count):
+  import seed
+  from models import Venue, Artist, Genre
+
+  rebuild(app, db)
+  with app.app_context():
+    stats = seed.populate(shows, now=NOW)
+    db.session.commit()
+    ids = sample(db, Venue, Artist, Genre)
+  print('\n{venues} venues, {artists} artists, {shows} shows (seeded in {seconds:.1f}s)'.format(**stats))
+
+  client = app.test_client()
+  results = {}
+
+  for endpoint, method, route, kwargs in READS:
+    path = route.format(**ids)
+    timed(client, method, path, kwargs)
+    peak_kb = traced(client, method, path, kwargs)
+    measured = [timed(client, method, path, kwargs) for _ in range(count)]
+    results['{} {}'.format(method, route)] = summary(
+      [elapsed for elapsed, queries in measured], [queries for elapsed, queries in measured], peak_kb
+    )
+
+  # Iteration 0 of each write is traced, the next count are timed
+  new = {'venues': [], 'artists': []}
+  for endpoint, request in WRITES:
+    measured, peak_kb = [], 0
+    for i in range(count + 1):
+      method, path, kwargs = request(i, new)
+      if i == 0:
+        peak_kb = traced(client, method, path, kwargs)
+      else:
+        measured.append(timed(client, method, path, kwargs))
+
+    for key, model in (('venues', Venue), ('artists', Artist)):
+      if endpoint == '{}.create_{}_submission'.format(key, key[:-1]):
+        with app.app_context():
+          new[key] = [id for (id,) in db.session.query(model.id).filter(
+            model.name.like('Benchmark %')
+          ).order_by(model.id)]
+    results[endpoint] = summary(
+      [elapsed for elapsed, queries in measured], [queries for elapsed, queries in measured], peak_kb
+    )
+
+  return results
+
+
+
+
+def compare(scale, results, baseline, tolerance):
+  # Regression messages for this scale against the baseline
+  regressions = []
+  for route, result in results.items():
+    before = baseline.get(str(scale), {}).get(route)
+    if before is None:
+      continue
+    if result['queries'] > before['queries']:
+      regressions.append('{} {}: {} queries, baseline {}'.format(scale, route, result['queries'], before['queries']))
+    if result['p95_ms'] > before['p95_ms'] * tolerance and result['p95_ms'] - before['p95_ms'] > MIN_LATENCY_MS:
+      regressions.append('{} {}: p95 {:.2f} ms, baseline {:.2f} ms'.format(scale, route, result['p95_ms'], before['p95_ms']))
+    if result['peak_kb'] > before['peak_kb'] * tolerance and result['peak_kb'] - before['peak_kb'] > MIN_MEMORY_KB:
+      regressions.append('{} {}: peak {:.0f} KB, baseline {:.0f} KB'.format(scale, route, result['peak_kb'], before['peak_kb']))
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--database-url', default='sqlite:////tmp/fyyur_route_benchmark.db')
+  parser.add_argument('--scales', default='1000,10000,100000', help='Numbers of shows.')
+  parser.add_argument('--requests', type=int, default=30, help='Timed requests per route.')
+  parser.add_argument('--baseline', default=BASELINE)
+  parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline.')
+  parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed p95 and memory growth factor.')
+  args = parser.parse_args()
+
+  from app import create_app
+  from models import db
+  app = create_app({
+    'SQLALCHEMY_DATABASE_URI': args.database_url,
+    'DEBUG': False,
+    'PAGE_CACHE_BACKEND': None,
+    'WTF_CSRF_ENABLED': False,
+  })
+  # Only budget overruns and errors, not a line per request
+  app.logger.setLevel(logging.WARNING)
+
+  check_coverage(app)
+
+  baseline = {}
+  if os.path.exists(args.baseline):
+    with open(args.baseline) as stream:
+      baseline = json.load(stream)
+
+  regressions, report = [], {}
+  for scale in [int(scale) for scale in args.scales.split(',')]:
+    results = run_scale(app, db, scale, args.requests)
+    report[str(scale)] = results
+
+    print('{:<70} {:>9} {:>9} {:>8} {:>10}'.format('route', 'p50 ms', 'p95 ms', 'queries', 'peak KB'))
+    for route, result in results.items():
+      print('{:<70} {p50_ms:>9.2f} {p95_ms:>9.2f} {queries:>8} {peak_kb:>10.1f}'.format(route[:70], **result))
+    regressions += compare(scale, results, baseline, args.tolerance)
+
+  if args.save_baseline:
+    baseline.update(report)
+    with open(args.baseline, 'w') as stream:
+      json.dump(baseline, stream, indent=2, sort_keys=True)
+      stream.write('\n')
+    print('\nbaseline written to {}'.format(args.baseline))
+  elif regressions:
+    print('\nregressions against {}:'.format(args.baseline))
+    for regression in regressions:
+      print('  ' + regression)
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# Venue search latency at growing catalogue sizes.
+#
+#   python benchmarks/search_benchmark.py --database-url postgresql://.../fyyur_bench
+#   python benchmarks/search_benchmark.py --sizes 10000,100000
+#
+# Each size gets a freshly seeded venue table (seed.py). On PostgreSQL the
+# pg_trgm extension and GIN index are created like the migration does; on
+# SQLite the in-process trigram index is used and its build time is reported
+# separately.
+# The target database is dropped and recreated, so never point it at real data.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Words of the venue names, cities and genres seed.py generates, a misspelling
+# and a one-letter term
+TERMS = ['hall', 'music hall', 'musc hall', 'jazz', 'san francisco, ca', 'the wild cellar', 'a']
+
+
+def seed_venues(db, size):
+  import seed
+
+  db.drop_all()
+  db.create_all()
+  seed.populate(0, venues=size, artists=1)
+  db.session.commit()
+
+
+def create_trigram_index(db, venue_search):
+  from sqlalchemy.dialects import postgresql
+
+  document = venue_search.document().compile(
+    dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+  )
+  db.session.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+  db.session.execute(
+    'CREATE INDEX ix_venue_search_trgm ON venue USING gin (({}) gin_trgm_ops)'.format(document)
+  )
+  db.session.execute('CREATE INDEX ix_genre_name_trgm ON genre USING gin (lower(name) gin_trgm_ops)')
+  db.session.execute('ANALYZE')
+  db.session.commit()
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--database-url', default='sqlite:////tmp/fyyur_search_benchmark.db')
+  parser.add_argument('--sizes', default='10000,100000,1000000')
+  parser.add_argument('--repeat', type=int, default=20)
+  args = parser.parse_args()
+
+  from app import create_app
+  app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+  from models import db, Venue, venue_search
+
+  print('{:>9}  {:<20} {:>10} {:>10} {:>8}'.format('rows', 'term', 'p50 ms', 'p95 ms', 'matches'))
+  with app.app_context():
+    for size in (int(value) for value in args.sizes.split(',')):
+      seed_venues(db, size)
+
+      if db.engine.dialect.name == 'postgresql':
+        create_trigram_index(db, venue_search)
+      else:
+        started = time.perf_counter()
+        venue_search.invalidate()
+        Venue.search('warm up')
+        print('{:>9}  {:<20} {:>10.1f}'.format(size, '(index build)', (time.perf_counter() - started) * 1000))
+
+      for term in TERMS:
+        timings = []
+        for _ in range(args.repeat):
+          started = time.perf_counter()
+          count, rows = Venue.search(term)
+          timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print('{:>9}  {:<20} {:>10.2f} {:>10.2f} {:>8}'.format(
+          size, term, statistics.median(timings), timings[int(len(timings) * 0.95) - 1], count
+        ))
+
+
+if __name__ == '__main__':
+  main()
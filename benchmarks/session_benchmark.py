@@ -0,0 +1,96 @@
+#----------------------------------------------------------------------------#
+# Session backends: request time, cookie size and cross-worker state.
+#
+#   python benchmarks/session_benchmark.py
+#   python benchmarks/session_benchmark.py --backends cookie,filesystem --requests 2000
+#
+# For every backend two app instances with the same SECRET_KEY stand in for
+# two gunicorn workers. A client gets a CSRF token and a flash message from
+# the first, and the second has to validate the token and show the message.
+# The client, now carrying a session cookie, then requests the home page
+# repeatedly; the mean time per request (session load and save included) and
+# the size of the session cookie are printed.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def create_worker(backend, directory):
+  from app import create_app
+  from flask import flash, get_flashed_messages
+  from flask_wtf.csrf import generate_csrf, validate_csrf
+
+  app = create_app({
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'SECRET_KEY': 'benchmark',
+    'SESSION_BACKEND': None if backend == 'cookie' else backend,
+    'SESSION_FILE_DIR': directory,
+    'PAGE_CACHE_BACKEND': None,
+  })
+  app.logger.disabled = True
+
+  @app.route('/benchmark/flash')
+  def set_flash():
+    flash('Venue was successfully listed!')
+    return generate_csrf()
+
+  @app.route('/benchmark/check/<token>')
+  def check(token):
+    validate_csrf(token)
+    return '|'.join(get_flashed_messages())
+
+  return app
+
+
+def cross_worker(client, second):
+  # Whether a CSRF token and a flash message from one worker work on the other
+  token = client.get('/benchmark/flash').get_data(as_text=True)
+  cookie = next(c.value for c in client.cookie_jar if c.name == 'session')
+
+  other = second.test_client()
+  other.set_cookie('localhost', 'session', cookie)
+  try:
+    return other.get('/benchmark/check/' + token).get_data(as_text=True) == 'Venue was successfully listed!'
+  except Exception:
+    return False
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--backends', default='cookie,memory,filesystem,redis')
+  parser.add_argument('--requests', type=int, default=1000)
+  args = parser.parse_args()
+
+  directory = tempfile.mkdtemp(prefix='fyyur-sessions-')
+  print('{:<12} {:>14} {:>14} {:>14}'.format('backend', 'us/request', 'cookie bytes', 'cross-worker'))
+  try:
+    for backend in args.backends.split(','):
+      first, second = create_worker(backend, directory), create_worker(backend, directory)
+      if backend == 'redis':
+        # Both workers talk to the same (fake) server
+        second.session_interface.store.client = first.session_interface.store.client
+      client = first.test_client()
+      shared = cross_worker(client, second)
+
+      cookie = next(c.value for c in client.cookie_jar if c.name == 'session')
+      started = time.perf_counter()
+      for _ in range(args.requests):
+        client.get('/')
+      elapsed = time.perf_counter() - started
+
+      print('{:<12} {:>14.0f} {:>14} {:>14}'.format(
+        backend, elapsed / args.requests * 1e6, len(cookie), 'yes' if shared else 'no'
+      ))
+  finally:
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+  main()
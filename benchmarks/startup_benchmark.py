@@ -0,0 +1,92 @@
+#----------------------------------------------------------------------------#
+# Cold start: importing app.py and calling create_app().
+#
+#   python benchmarks/startup_benchmark.py
+#   python benchmarks/startup_benchmark.py --budget-ms 600 --runs 10
+#
+# Each run is a fresh interpreter started with -X importtime, as a new
+# gunicorn worker or test process would be. Prints the median wall time and
+# the slowest imports, and exits non-zero (for CI) when the median is over
+# --budget-ms or when a module that should only load on demand (--deferred)
+# was imported at start-up.
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only migrations, Parquet exports, forms and date formatting need these
+DEFERRED = 'alembic,flask_migrate,pyarrow,wtforms,flask_wtf,babel,dateutil'
+
+# Median cold start the test suite allows (tests/test_startup.py); about 600 ms
+# on a developer laptop, with headroom for slower CI machines
+BUDGET_MS = 1000
+
+PROGRAM = '''
+import time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(time.perf_counter() - started)
+'''
+
+
+def run_once(cwd=ROOT):
+  # (seconds, {top-level package: cumulative microseconds}) of one cold start;
+  # cwd is where the app writes error.log
+  env = dict(os.environ, FYYUR_ENV='production', SECRET_KEY='benchmark', DATABASE_URL='sqlite://')
+  env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+  result = subprocess.run(
+    [sys.executable, '-X', 'importtime', '-c', PROGRAM],
+    cwd=cwd, env=env, capture_output=True, text=True, check=True
+  )
+
+  packages = defaultdict(int)
+  for line in result.stderr.splitlines():
+    if not line.startswith('import time:') or 'cumulative' in line:
+      continue
+    self_us, cumulative_us, name = line[len('import time:'):].split('|')
+    packages[name.strip().split('.')[0]] += int(self_us)
+  return float(result.stdout.strip().splitlines()[-1]), packages
+
+
+def median_ms(runs, cwd=ROOT):
+  # Median of several cold starts, and the imports of the last one
+  results = [run_once(cwd) for _ in range(runs)]
+  return statistics.median(seconds for seconds, packages in results) * 1000, results[-1][1]
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--runs', type=int, default=5)
+  parser.add_argument('--budget-ms', type=float, help='Fail when the median start-up is slower.')
+  parser.add_argument('--deferred', default=DEFERRED, help='Packages that must not load at start-up.')
+  parser.add_argument('--top', type=int, default=10)
+  args = parser.parse_args()
+
+  median, packages = median_ms(args.runs)
+
+  print('create_app() cold start: median {:.0f} ms over {} runs'.format(median, args.runs))
+  print('{:<24} {:>10}'.format('package', 'import ms'))
+  for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+    print('{:<24} {:>10.1f}'.format(name, micros / 1000))
+
+  failures = []
+  if args.budget_ms is not None and median > args.budget_ms:
+    failures.append('median {:.0f} ms is over the {:.0f} ms budget'.format(median, args.budget_ms))
+  loaded = [name for name in args.deferred.split(',') if name in packages]
+  if loaded:
+    failures.append('imported at start-up: {}'.format(', '.join(loaded)))
+
+  for failure in failures:
+    print('FAIL: ' + failure)
+  sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+  main()
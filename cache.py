@@ -0,0 +1,323 @@
+#----------------------------------------------------------------------------#
+# Rendered-page cache.
+#
+# Listing and profile views store their rendered HTML under a key naming the
+# route and entity ('venues', 'venue:3', ...). Create/edit/delete views
+# invalidate exactly the keys their commit affected; the TTL only bounds how
+# long a page may lag behind shows moving from upcoming to past.
+#
+# Backends: an in-process LRU with TTL, or any Redis-compatible client (a
+# dict-backed FakeRedis stands in for one locally and in tests). The session
+# store (sessions.py) uses the same backends, plus files in a directory.
+#----------------------------------------------------------------------------#
+
+import functools
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, request, session
+
+
+class LRUCache:
+  # Thread-safe in-process LRU with per-entry expiry
+
+  def __init__(self, max_entries=1024, ttl=300):
+    self.max_entries = max_entries
+    self.ttl = ttl
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        return None
+      value, expires = entry
+      if expires < time.monotonic():
+        del self.entries[key]
+        return None
+      self.entries.move_to_end(key)
+      return value
+
+
+  def set(self, key, value):
+    with self.lock:
+      self.entries[key] = (value, time.monotonic() + self.ttl)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+
+  def delete(self, *keys):
+    with self.lock:
+      for key in keys:
+        self.entries.pop(key, None)
+
+
+  def incr(self, key):
+    with self.lock:
+      value, expires = self.entries.get(key, (0, None))
+      self.entries[key] = (value + 1, float('inf'))
+      return value + 1
+
+
+
+
+class FakeRedis:
+  # The subset of the redis-py client API the caches use, kept in a dict
+
+  def __init__(self):
+    self.data = {}
+    self.lock = threading.Lock()
+
+
+  def get(self, name):
+    with self.lock:
+      value, expires = self.data.get(name, (None, None))
+      if expires is not None and expires < time.monotonic():
+        del self.data[name]
+        return None
+      return value
+
+
+  def set(self, name, value, ex=None):
+    if isinstance(value, str):
+      value = value.encode()
+    with self.lock:
+      self.data[name] = (value, time.monotonic() + ex if ex else None)
+    return True
+
+
+  def delete(self, *names):
+    with self.lock:
+      return sum(self.data.pop(name, None) is not None for name in names)
+
+
+  def incr(self, name):
+    with self.lock:
+      value, expires = self.data.get(name, (b'0', None))
+      value = int(value) + 1
+      self.data[name] = (str(value).encode(), expires)
+      return value
+
+
+
+
+class RedisCache:
+  # Cache backend on a Redis-compatible client, namespaced by a key prefix
+
+  def __init__(self, client, prefix='fyyur:page:', ttl=300):
+    self.client = client
+    self.prefix = prefix
+    self.ttl = ttl
+
+
+  def get(self, key):
+    value = self.client.get(self.prefix + key)
+    return value.decode() if value is not None else None
+
+
+  def set(self, key, value):
+    self.client.set(self.prefix + key, value, ex=self.ttl)
+
+
+  def delete(self, *keys):
+    if keys:
+      self.client.delete(*(self.prefix + key for key in keys))
+
+
+  def incr(self, key):
+    return self.client.incr(self.prefix + key)
+
+
+
+
+class FileCache:
+  # Entries as files in one directory, shared by every worker process on the
+  # host. Values are written to a temporary file and renamed into place, so
+  # readers never see half an entry; expiry goes by modification time. There
+  # is no atomic incr, so it only backs the session store.
+
+  def __init__(self, directory, ttl=300):
+    self.directory = directory
+    self.ttl = ttl
+    self.purged = time.time()
+    # Sessions are read back as trusted data: no other user may see or add entries
+    private_directory(directory)
+
+
+  def path(self, key):
+    return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+
+  def get(self, key):
+    try:
+      with open(self.path(key), encoding='utf-8') as stream:
+        if os.fstat(stream.fileno()).st_mtime + self.ttl < time.time():
+          return None
+        return stream.read()
+    except FileNotFoundError:
+      return None
+
+
+  def set(self, key, value):
+    descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix='.')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as stream:
+      stream.write(value)
+    os.replace(temporary, self.path(key))
+
+    # Expired entries nobody reads again are swept about once per TTL
+    if self.purged + self.ttl < time.time():
+      self.purged = time.time()
+      self.purge()
+
+
+  def delete(self, *keys):
+    for key in keys:
+      try:
+        os.remove(self.path(key))
+      except FileNotFoundError:
+        pass
+
+
+  def purge(self):
+    cutoff = time.time() - self.ttl
+    for entry in os.scandir(self.directory):
+      try:
+        if entry.stat().st_mtime < cutoff:
+          os.remove(entry.path)
+      except FileNotFoundError:
+        pass
+
+
+
+
+def private_directory(path):
+  # Creates path for this user only, or checks that an existing one is ours:
+  # other local users must not be able to read or plant entries in it
+  os.makedirs(path, mode=0o700, exist_ok=True)
+  status = os.lstat(path)
+  if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid():
+    raise RuntimeError('{} is not a directory owned by this user'.format(path))
+  # A directory others can write to is shared (like /tmp): refuse it rather
+  # than take it over
+  if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+    raise RuntimeError('{} is writable by other users'.format(path))
+  if stat.S_IMODE(status.st_mode) != 0o700:
+    os.chmod(path, 0o700)
+  return path
+
+
+def redis_client(url):
+  # Real client for redis:// URLs, or the in-process fake for 'fakeredis://'
+  if url.startswith('fakeredis://'):
+    return FakeRedis()
+  import redis
+  return redis.Redis.from_url(url)
+
+
+def create_backend(config):
+  backend = config['PAGE_CACHE_BACKEND']
+  ttl = config['PAGE_CACHE_TTL']
+
+  if backend == 'lru':
+    return LRUCache(max_entries=config['PAGE_CACHE_MAX_ENTRIES'], ttl=ttl)
+  if backend == 'redis':
+    return RedisCache(redis_client(config['PAGE_CACHE_REDIS_URL']), ttl=ttl)
+  if backend is None:
+    return None
+  raise ValueError('Unknown PAGE_CACHE_BACKEND {!r}'.format(backend))
+
+
+def in_process(config):
+  # True when the configured page cache lives in this process only
+  backend = config['PAGE_CACHE_BACKEND']
+  return backend == 'lru' or (backend == 'redis' and config['PAGE_CACHE_REDIS_URL'].startswith('fakeredis://'))
+
+
+
+
+class PageCache:
+
+  def __init__(self, app=None):
+    self.backend = None
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    app.config.setdefault('PAGE_CACHE_BACKEND', 'lru')
+    app.config.setdefault('PAGE_CACHE_TTL', 300)
+    app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 1024)
+    app.config.setdefault('PAGE_CACHE_REDIS_URL', 'fakeredis://')
+    app.config.setdefault('WORKER_PROCESSES', 1)
+    # Invalidations have to reach every worker, and the flask commands too
+    if app.config['WORKER_PROCESSES'] > 1 and in_process(app.config):
+      raise RuntimeError(
+        'PAGE_CACHE_BACKEND {!r} is private to each of the {} worker processes; '
+        'set REDIS_URL, or an empty PAGE_CACHE_BACKEND to disable the page cache'.format(
+          app.config['PAGE_CACHE_BACKEND'], app.config['WORKER_PROCESSES'])
+      )
+    self.backend = create_backend(app.config)
+    app.extensions['page_cache'] = self
+
+
+  def cached(self, key, vary_query=False):
+    # Caches the view's rendered HTML under key, formatted with the view's
+    # arguments. Views paged through the query string (vary_query) store each
+    # page under a generation number, so one invalidation drops every page.
+    # Under @conditional each entry carries the ETag it was rendered for and
+    # is only served while that ETag is current, so a cached body never goes
+    # out with a newer ETag.
+    def decorator(view):
+      @functools.wraps(view)
+      def wrapper(*args, **kwargs):
+        # Pages carrying flash messages are one-offs; never serve or store them
+        if self.backend is None or session.get('_flashes'):
+          return view(*args, **kwargs)
+
+        entry = self.entry_key(key.format(**kwargs), vary_query)
+        etag = g.get('etag', '')
+        stored = self.backend.get(entry)
+        if stored is not None:
+          stored_etag, _, page = stored.partition('\n')
+          if stored_etag == etag:
+            return page
+
+        page = view(*args, **kwargs)
+        if isinstance(page, str) and not self.maybe_stale():
+          self.backend.set(entry, etag + '\n' + page)
+        return page
+      return wrapper
+    return decorator
+
+
+  def maybe_stale(self):
+    # A page read from a replica soon after an invalidation may predate the
+    # write behind it (the replica lags), so it is served but not stored
+    if not g.get('read_replica'):
+      return False
+    invalidated = float(self.backend.get('invalidated_at') or 0)
+    return invalidated + current_app.config['READ_YOUR_WRITES_SECONDS'] > time.time()
+
+
+  def entry_key(self, key, vary_query):
+    if not vary_query:
+      return key
+    generation = self.backend.get('generation:' + key) or 0
+    return '{}:{}:{}'.format(key, generation, request.query_string.decode())
+
+
+  def invalidate(self, *keys):
+    if self.backend is None:
+      return
+    self.backend.delete(*keys)
+    self.backend.set('invalidated_at', repr(time.time()))
+    for key in keys:
+      self.backend.incr('generation:' + key)
@@ -0,0 +1,199 @@
+#----------------------------------------------------------------------------#
+# flask CLI commands, added to the app by create_app().
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import sys
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# The commands run in a process of their own: their invalidations reach the
+# server's pages through the shared page cache backend (see config.py)
+from extensions import page_cache
+from models import db, Show, Genre, Venue, Artist
+import assets
+import explain
+import rendering
+import exporter
+import importer
+import seed
+
+
+@click.command('explain-routes')
+@with_appcontext
+def explain_routes_command():
+  """Fail when a read route's queries fall back to full table scans."""
+  routes = explain.sample_routes(db, Venue, Artist, Genre)
+  report = explain.explain_routes(current_app, db, routes)
+  
+  for (method, path), offenders in report.items():
+    print('{:<4} {:<45} {}'.format(method, path, 'FULL SCAN' if offenders else 'ok'))
+    for table, statement in offenders:
+      print('       {}: {}'.format(table, ' '.join(statement.split())))
+  
+  if any(report.values()):
+    sys.exit(1)
+
+
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(importer.LOADERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(sorted(importer.READERS)),
+              help='File format; guessed from the extension when omitted.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per insert and transaction.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Write rejected rows here as NDJSON instead of to stderr.')
+@with_appcontext
+def import_command(kind, path, file_format, chunk_size, errors_path):
+  """Bulk load venues, artists or shows from a CSV or NDJSON file."""
+  file_format = file_format or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+  errors = open(errors_path, 'w') if errors_path else sys.stderr
+  
+  def report_error(line, record, messages):
+    errors.write(json.dumps({'line': line, 'errors': messages, 'row': record}, default=str) + '\n')
+  
+  try:
+    with open(path, newline='', encoding='utf-8') as stream:
+      rows = importer.READERS[file_format](stream)
+      stats = importer.import_rows(kind, rows, chunk_size=chunk_size, on_error=report_error)
+  finally:
+    if errors_path:
+      errors.close()
+  
+  page_cache.invalidate(*stats['pages'])
+  
+  print('{}: {} rows, {} imported, {} rejected in {:.2f}s ({:.0f} rows/s)'.format(
+    kind, stats['rows'], stats['imported'], stats['rejected'], stats['seconds'],
+    stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+  ))
+  
+  if stats['rejected']:
+    sys.exit(1)
+
+
+
+
+@click.command('export')
+@click.argument('dataset', type=click.Choice(sorted(exporter.DATASETS)))
+@click.option('--format', 'file_format', type=click.Choice(sorted(exporter.ENCODERS)), default='csv', show_default=True)
+@click.option('--output', type=click.File('wb'), default='-', help='Output file; stdout when omitted.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows fetched and encoded at a time.')
+@with_appcontext
+def export_command(dataset, file_format, output, chunk_size):
+  """Stream every venue, artist or show to CSV, NDJSON or Parquet."""
+  try:
+    for block in exporter.export(dataset, file_format, chunk_size=chunk_size):
+      output.write(block)
+  except RuntimeError as error:
+    raise click.ClickException(str(error))
+
+
+
+
+@click.command('roll-shows')
+@click.option('--recount', is_flag=True, help='Also recompute every counter from scratch.')
+@with_appcontext
+def roll_shows_command(recount):
+  """Move shows that have started from upcoming to past show counts.
+
+  Run it periodically (e.g. every few minutes from cron); listings and
+  search read the counters instead of counting shows.
+  """
+  rolled = Show.roll()
+  if recount:
+    Show.recount()
+  db.session.commit()
+  
+  if rolled or recount:
+    page_cache.invalidate('venues', 'artists')
+  print('{} shows rolled to past'.format(rolled))
+
+
+
+
+@click.command('seed')
+@click.option('--shows', default=1000, show_default=True)
+@click.option('--venues', type=int, help='Defaults to one per 20 shows.')
+@click.option('--artists', type=int, help='Defaults to one per 10 shows.')
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='The same seed generates the same rows.')
+@click.option('--now', type=click.DateTime(), help='Date the shows are placed around; today when omitted.')
+@click.option('--reset', is_flag=True, help='Delete every venue, artist, show and genre first.')
+@with_appcontext
+def seed_command(shows, venues, artists, random_seed, now, reset):
+  """Fill the database with a reproducible synthetic dataset.
+
+  Refuses to add to a database that already has venues unless --reset is
+  given, which deletes all of them first. Meant for development and
+  benchmark databases only.
+  """
+  if reset:
+    seed.clear()
+  elif db.session.query(Venue.query.exists()).scalar():
+    raise click.ClickException('The database already has venues; pass --reset to replace them.')
+  
+  stats = seed.populate(shows, venues=venues, artists=artists, seed=random_seed, now=now)
+  db.session.commit()
+  page_cache.invalidate('venues', 'artists', 'shows')
+  
+  print('{venues} venues, {artists} artists and {shows} shows in {seconds:.1f}s'.format(**stats))
+
+
+
+
+@click.command('build-assets')
+@click.option('--no-images', is_flag=True, help='Skip the resized image variants.')
+@with_appcontext
+def build_assets_command(no_images):
+  """Build the hashed, bundled and compressed static files.
+
+  Writes static/dist/ and its manifest.json, which the app reads at start-up
+  outside debug mode; run it on every deploy after the static files change.
+  Resized images need Pillow, brotli copies the brotli package.
+  """
+  manifest = assets.build(current_app.static_folder, current_app.static_url_path, images=not no_images)
+  dist = os.path.join(current_app.static_folder, assets.DIST)
+  
+  for bundle in assets.BUNDLES:
+    sizes = [os.path.getsize(os.path.join(current_app.static_folder, source)) for source in assets.BUNDLES[bundle]]
+    name = manifest['assets'][bundle]
+    encoded = ['{} {}'.format(encoding, os.path.getsize(os.path.join(dist, name + assets.ENCODING_SUFFIXES[encoding])))
+      for encoding in manifest['encodings'].get(name, ())]
+    print('{}: {} files, {} -> {} bytes ({})'.format(
+      bundle, len(sizes), sum(sizes), os.path.getsize(os.path.join(dist, name)), ', '.join(encoded) or 'uncompressed'
+    ))
+  print('{} files in {}'.format(len(manifest['assets']), dist))
+
+
+
+
+@click.command('warm-templates')
+@with_appcontext
+def warm_templates_command():
+  """Compile every template into the template cache.
+
+  Run at deploy time, after the templates change, so that new workers load
+  compiled templates from TEMPLATE_CACHE_BACKEND instead of compiling them.
+  """
+  if current_app.jinja_env.bytecode_cache is None:
+    raise click.ClickException('TEMPLATE_CACHE_BACKEND is not set; there is no cache to warm.')
+  
+  names = rendering.warm(current_app)
+  print('{} templates compiled into the {} cache'.format(len(names), current_app.config['TEMPLATE_CACHE_BACKEND']))
+
+
+
+
+COMMANDS = (
+  explain_routes_command, import_command, export_command, roll_shows_command, seed_command,
+  build_assets_command, warm_templates_command,
+)
+
+
+def init_app(app):
+  for command in COMMANDS:
+    app.cli.add_command(command)
@@ -0,0 +1,46 @@
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#
+# @conditional(versions) computes a strong ETag from a cheap "versions" query
+# (entity version counters, row counts, ...) and answers a matching
+# If-None-Match with 304 Not Modified before the view queries or renders
+# anything.
+#----------------------------------------------------------------------------#
+
+import functools
+import hashlib
+
+from flask import g, make_response, request, session
+
+
+def conditional(versions):
+  # versions(**view_kwargs) returns a value that changes whenever the page
+  # would, or None to skip conditional handling (e.g. an unknown id)
+  def decorator(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+      # Pages carrying flash messages are one-offs and are never revalidated
+      if session.get('_flashes'):
+        return view(*args, **kwargs)
+
+      state = versions(**kwargs)
+      if state is None:
+        return view(*args, **kwargs)
+
+      etag = hashlib.sha1(
+        repr((request.endpoint, request.query_string, state)).encode()
+      ).hexdigest()
+      # The page cache keeps each body with the ETag it was rendered under and
+      # only serves it while that ETag is current
+      g.etag = etag
+
+      if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+      else:
+        response = make_response(view(*args, **kwargs))
+
+      response.set_etag(etag)
+      response.headers['Cache-Control'] = 'no-cache'
+      return response
+    return wrapper
+  return decorator
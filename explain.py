@@ -0,0 +1,118 @@
+#----------------------------------------------------------------------------#
+# Index usage check for the read routes.
+#
+# Drives each route through the test client, captures the SELECT statements
+# it issues and runs EXPLAIN on them. Any full scan of one of our tables is
+# reported. On PostgreSQL, sequential scans are disabled for the EXPLAIN so
+# the check does not depend on how large the seeded dataset is: a remaining
+# Seq Scan means no usable index exists.
+#----------------------------------------------------------------------------#
+
+import json
+
+from sqlalchemy import event
+
+
+def sample_routes(db, Venue, Artist, Genre):
+  # (method, path, form data) for every read route, using ids from the database
+  venue_id = db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar()
+  artist_id = db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar()
+  genre_name = db.session.query(Genre.name).order_by(Genre.id).limit(1).scalar()
+
+  routes = [
+    ('GET', '/venues', None),
+    ('GET', '/artists', None),
+    ('GET', '/shows', None),
+    ('GET', '/shows?from=2020-01-01&to=2020-12-31', None),
+    ('POST', '/venues/search', {'search_term': 'music'}),
+    ('POST', '/artists/search', {'search_term': 'band'}),
+  ]
+  if venue_id is not None:
+    routes.append(('GET', '/venues/{}'.format(venue_id), None))
+  if artist_id is not None:
+    routes.append(('GET', '/artists/{}'.format(artist_id), None))
+  if genre_name is not None:
+    routes.append(('GET', '/genres/{}'.format(genre_name), None))
+  return routes
+
+
+def capture_statements(app, engine, method, path, data):
+  statements = []
+
+  def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith('SELECT'):
+      statements.append((statement, parameters))
+
+  event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+  try:
+    response = app.test_client().open(path, method=method, data=data)
+  finally:
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+  return response.status_code, statements
+
+
+def postgresql_full_scans(connection, statement, parameters, tables):
+  plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+  if isinstance(plan, str):
+    plan = json.loads(plan)
+
+  scans = []
+  nodes = [plan[0]['Plan']]
+  while nodes:
+    node = nodes.pop()
+    if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in tables:
+      scans.append(node['Relation Name'])
+    nodes.extend(node.get('Plans', []))
+  return scans
+
+
+def sqlite_full_scans(connection, statement, parameters, tables):
+  # "SCAN venue" is a full table scan; "SCAN venue USING INDEX ..." and
+  # "SEARCH venue ..." are index driven
+  scans = []
+  for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters):
+    words = row[-1].split()
+    if len(words) >= 2 and words[0] == 'SCAN' and words[1] in tables and 'USING' not in words:
+      scans.append(words[1])
+  return scans
+
+
+def explain_routes(app, db, routes):
+  # {(method, path): [(table, statement)]} of full scans per route
+  engine = db.engine
+  tables = set(db.metadata.tables)
+  full_scans = engine.dialect.name == 'postgresql' and postgresql_full_scans or sqlite_full_scans
+  captured = {}
+  report = {}
+
+  # The pages have to be rendered for their queries to run: the page cache is
+  # off for the check, and no request sends If-None-Match, so @conditional
+  # never answers 304 in their place either
+  page_cache = app.extensions['page_cache']
+  backend, page_cache.backend = page_cache.backend, None
+  try:
+    for method, path, data in routes:
+      # The first request warms lazily built state (such as the in-process search
+      # index outside PostgreSQL); only the steady-state queries are checked
+      capture_statements(app, engine, method, path, data)
+      captured[(method, path)] = capture_statements(app, engine, method, path, data)
+  finally:
+    page_cache.backend = backend
+
+  for (method, path), (status, statements) in captured.items():
+    if status >= 400:
+      raise RuntimeError('{} {} answered {}'.format(method, path, status))
+
+    offenders = []
+    with engine.connect() as connection:
+      if engine.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET enable_seqscan = off')
+      for statement, parameters in statements:
+        for table in full_scans(connection, statement, parameters, tables):
+          offenders.append((table, statement))
+      if engine.dialect.name == 'postgresql':
+        connection.exec_driver_sql('RESET enable_seqscan')
+
+    report[(method, path)] = offenders
+  return report
@@ -0,0 +1,181 @@
+#----------------------------------------------------------------------------#
+# Streaming export of venues, artists and shows.
+#
+# Rows come off a server-side cursor (yield_per, which also turns on
+# stream_results) a chunk at a time and each chunk is encoded and handed on
+# before the next one is fetched, so memory stays flat however many rows the
+# table has. CSV and NDJSON are always available; Parquet needs pyarrow,
+# imported on the first Parquet export, and is written as one row group per
+# chunk.
+#----------------------------------------------------------------------------#
+
+import csv
+import datetime
+import importlib.util
+import io
+import itertools
+import json
+
+from models import db, Show, Genre, Venue, Artist, venue_genre, artist_genre
+
+
+VENUE_COLUMNS = tuple(getattr(Venue, name) for name in (
+  'id', 'name', 'city', 'state', 'address', 'phone', 'image_link', 'website_link',
+  'facebook_link', 'seeking_talent', 'seeking_description', 'upcoming_shows_count',
+  'past_shows_count',
+))
+ARTIST_COLUMNS = tuple(getattr(Artist, name) for name in (
+  'id', 'name', 'city', 'state', 'phone', 'image_link', 'website_link',
+  'facebook_link', 'seeking_venue', 'seeking_description', 'upcoming_shows_count',
+  'past_shows_count',
+))
+SHOW_COLUMNS = (
+  Show.id, Show.start_time, Show.end_time, Show.venue_id, Venue.name.label('venue_name'),
+  Show.artist_id, Artist.name.label('artist_name'),
+)
+
+
+def chunks_of(query, chunk_size):
+  # Lists of row dicts, chunk_size rows at a time, off a server-side cursor
+  names = [column['name'] for column in query.column_descriptions]
+  rows = iter(query.yield_per(chunk_size))
+  while True:
+    chunk = [dict(zip(names, row)) for row in itertools.islice(rows, chunk_size)]
+    if not chunk:
+      return
+    yield chunk
+
+
+def tagged_rows(model, columns, association, key, chunk_size):
+  # Venues or artists with their genre names, looked up once per chunk
+  for chunk in chunks_of(db.session.query(*columns).order_by(model.id), chunk_size):
+    genres = Genre.names_by_owner(association, key, [row['id'] for row in chunk])
+    for row in chunk:
+      row['genres'] = ','.join(genres[row['id']])
+    yield chunk
+
+
+def show_rows(chunk_size):
+  # Every show with the names of its venue and artist
+  query = db.session.query(*SHOW_COLUMNS).join(
+    Venue, Venue.id == Show.venue_id
+  ).join(
+    Artist, Artist.id == Show.artist_id
+  ).order_by(Show.id)
+  return chunks_of(query, chunk_size)
+
+
+# dataset: (row chunks for a chunk size, (name, python type) of every column)
+DATASETS = {
+  'venues': (
+    lambda chunk_size: tagged_rows(Venue, VENUE_COLUMNS, venue_genre, 'venue_id', chunk_size),
+    [(column.key, column.type.python_type) for column in VENUE_COLUMNS] + [('genres', str)],
+  ),
+  'artists': (
+    lambda chunk_size: tagged_rows(Artist, ARTIST_COLUMNS, artist_genre, 'artist_id', chunk_size),
+    [(column.key, column.type.python_type) for column in ARTIST_COLUMNS] + [('genres', str)],
+  ),
+  'shows': (
+    show_rows,
+    [(column.key, column.type.python_type) for column in SHOW_COLUMNS],
+  ),
+}
+
+
+
+
+#----------------------------------------------------------------------------#
+# Encoders: chunks of row dicts in, bytes out.
+#----------------------------------------------------------------------------#
+
+def encode_csv(chunks, columns):
+  buffer = io.StringIO()
+  writer = csv.DictWriter(buffer, fieldnames=[name for name, python_type in columns])
+  writer.writeheader()
+  for chunk in chunks:
+    writer.writerows(chunk)
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+  if buffer.tell():
+    yield buffer.getvalue().encode()
+
+
+def isoformat(value):
+  return value.isoformat()
+
+
+def encode_ndjson(chunks, columns):
+  for chunk in chunks:
+    yield ''.join(
+      json.dumps(row, separators=(',', ':'), default=isoformat) + '\n' for row in chunk
+    ).encode()
+
+
+class Drain(io.RawIOBase):
+  # Write-only sink whose contents are taken out after every row group
+
+  def __init__(self):
+    self.parts = []
+
+
+  def writable(self):
+    return True
+
+
+  def write(self, data):
+    self.parts.append(bytes(data))
+    return len(data)
+
+
+  def take(self):
+    data, self.parts = b''.join(self.parts), []
+    return data
+
+
+def arrow_schema(columns):
+  import pyarrow
+  types = {
+    int: pyarrow.int64(),
+    str: pyarrow.string(),
+    bool: pyarrow.bool_(),
+    datetime.datetime: pyarrow.timestamp('us'),
+  }
+  return pyarrow.schema([(name, types[python_type]) for name, python_type in columns])
+
+
+def encode_parquet(chunks, columns):
+  if 'parquet' not in formats():
+    raise RuntimeError('Parquet export needs pyarrow (pip install pyarrow)')
+  import pyarrow
+  import pyarrow.parquet
+
+  # The schema comes from the column types, so a chunk where a column happens
+  # to be all NULL cannot change it between row groups
+  sink = Drain()
+  schema = arrow_schema(columns)
+  writer = pyarrow.parquet.ParquetWriter(sink, schema)
+  for chunk in chunks:
+    writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+    yield sink.take()
+  writer.close()
+  yield sink.take()
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson, 'parquet': encode_parquet}
+
+MIMETYPES = {
+  'csv': 'text/csv',
+  'ndjson': 'application/x-ndjson',
+  'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def formats():
+  return [name for name in ENCODERS if name != 'parquet' or importlib.util.find_spec('pyarrow') is not None]
+
+
+def export(dataset, file_format, chunk_size=5000):
+  # Iterator of encoded byte blocks, one per chunk of rows
+  rows, columns = DATASETS[dataset]
+  return ENCODERS[file_format](rows(chunk_size), columns)
@@ -0,0 +1,45 @@
+#----------------------------------------------------------------------------#
+# Extension instances.
+#
+# Created unbound so blueprints can import them (for decorators such as
+# @page_cache.cached) and bound to the app by create_app(). The database is
+# models.db.
+#----------------------------------------------------------------------------#
+
+from flask_moment import Moment
+
+from assets import Assets
+
+from cache import PageCache
+from querystats import QueryStats
+from replicas import ReadReplicas
+from rendering import Rendering
+from sessions import SessionStore
+
+
+moment = Moment()
+query_stats = QueryStats()
+page_cache = PageCache()
+session_store = SessionStore()
+assets = Assets()
+rendering = Rendering()
+read_replicas = ReadReplicas()
+
+
+
+
+class DeferredMigrate:
+  # Stands in for app.extensions['migrate']. Flask-Migrate imports alembic, by
+  # far the slowest import of the app, and only the `flask db` commands read
+  # this entry, so the real one is set up on their first read.
+
+  def __init__(self, app, db):
+    self.app = app
+    self.db = db
+    app.extensions['migrate'] = self
+
+
+  def __getattr__(self, name):
+    from flask_migrate import Migrate
+    Migrate(self.app, self.db)
+    return getattr(self.app.extensions['migrate'], name)
@@ -5,9 +5,12 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    # Route benchmark against the saved baseline, then the cold-start budget
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python benchmarks/route_benchmark.py --scales 1000,10000"
+            " && python benchmarks/startup_benchmark.py",
+            capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
@@ -39,8 +42,9 @@ def heroku():
 
 
 def heroku_test():
+    # The release boots with its production settings
     local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
+        "heroku run python -c 'import wsgi'"
     )
 
 
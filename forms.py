@@ -1,11 +1,19 @@
 from datetime import datetime
 from flask_wtf import Form
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import DataRequired, InputRequired, AnyOf, URL, Optional
 
 
 
 
+class ShowDateTimeField(DateTimeField):
+    # Says which format it expected when the value does not parse
+    def process_formdata(self, valuelist):
+        try:
+            super().process_formdata(valuelist)
+        except ValueError:
+            raise ValueError('Not a valid date and time; it must look like YYYY-MM-DD HH:MM:SS.')
+
 class ShowForm(Form):
     artist_id = StringField(
         'artist_id'
@@ -13,11 +21,17 @@ class ShowForm(Form):
     venue_id = StringField(
         'venue_id'
     )
-    start_time = DateTimeField(
+    # InputRequired: DataRequired would replace the format error of a value
+    # that does not parse with "This field is required."
+    start_time = ShowDateTimeField(
         'start_time',
-        validators=[DataRequired()],
+        validators=[InputRequired()],
         default= datetime.today()
     )
+    end_time = ShowDateTimeField(
+        'end_time',
+        validators=[Optional()]
+    )
 
 class VenueForm(Form):
     name = StringField(
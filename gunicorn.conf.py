@@ -0,0 +1,51 @@
+#----------------------------------------------------------------------------#
+# gunicorn settings, all overridable from the environment.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# GUNICORN_WORKER_CLASS picks the concurrency model:
+#   gthread  WEB_CONCURRENCY processes x GUNICORN_THREADS threads. Size the
+#            database pool (DB_POOL_SIZE) to at least the thread count.
+#   gevent   WEB_CONCURRENCY processes x GUNICORN_WORKER_CONNECTIONS
+#            greenlets; needs `pip install gevent psycogreen`. psycopg2 is
+#            made cooperative in each worker, and DB_POOL_SIZE +
+#            DB_MAX_OVERFLOW cap the concurrent queries per process.
+#   sync     one request at a time per process.
+#----------------------------------------------------------------------------#
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:{}'.format(os.environ.get('PORT', '8000')))
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# The app checks its caches against the worker count (config.WORKER_PROCESSES)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off (e.g. for load tests)
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+  # Each worker opens its own connections; with gevent, psycopg2 must also
+  # yield to other greenlets while it waits on the database (there is nothing
+  # to patch when running against SQLite without psycopg2 installed)
+  if worker_class == 'gevent':
+    try:
+      import psycopg2
+    except ImportError:
+      return
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
@@ -0,0 +1,251 @@
+#----------------------------------------------------------------------------#
+# Bulk import of venues, artists and shows.
+#
+# Rows stream in from CSV or NDJSON one chunk at a time, so memory stays flat
+# however large the file is. Each row goes through the same VenueForm,
+# ArtistForm or ShowForm rules as the HTML forms; rejected rows are reported
+# with their line number and the form errors. Valid rows are inserted with one
+# executemany per chunk and table, show foreign keys and double bookings are
+# checked with one query each per chunk, and every chunk is committed on its
+# own.
+#----------------------------------------------------------------------------#
+
+import csv
+import datetime
+import itertools
+import json
+import time
+from collections import defaultdict
+
+from werkzeug.datastructures import MultiDict
+
+from models import (
+  db, Show, Genre, Venue, Artist, DataVersion, venue_genre, artist_genre,
+  venue_search, artist_search, show_schedule, adjust_show_counts, DEFAULT_SHOW_DURATION
+)
+
+
+# Values an unchecked BooleanField may arrive as in a CSV cell
+FALSE_VALUES = ('', '0', 'false', 'no', 'n', 'off')
+
+
+def read_csv(stream):
+  # (line number, record); multi-valued cells such as genres are comma separated
+  reader = csv.DictReader(stream)
+  for record in reader:
+    yield reader.line_num, record
+
+
+def read_ndjson(stream):
+  for line_number, line in enumerate(stream, 1):
+    if line.strip():
+      yield line_number, json.loads(line)
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def chunked(iterable, size):
+  iterator = iter(iterable)
+  while True:
+    chunk = list(itertools.islice(iterator, size))
+    if not chunk:
+      return
+    yield chunk
+
+
+def unbound_form(form_class, formdata=None):
+  # Forms are filled from file rows, not from a request, so CSRF does not apply
+  return form_class(formdata=formdata, meta={'csrf': False})
+
+
+def form_data(field_types, record):
+  # The record as the MultiDict a form post would have produced
+  data = MultiDict()
+  for name, field_type in field_types.items():
+    value = record.get(name)
+    if value is None:
+      continue
+    if field_type == 'SelectMultipleField':
+      values = value if isinstance(value, list) else value.split(',')
+      data.setlist(name, [item.strip() for item in values if item.strip()])
+    elif field_type == 'BooleanField':
+      if str(value).strip().lower() not in FALSE_VALUES:
+        data[name] = 'y'
+    else:
+      data[name] = str(value)
+  return data
+
+
+def validate(form_class, rows):
+  # Splits (line, record) rows into [(line, record, form)] and [(line, record, errors)]
+  field_types = {name: field.type for name, field in unbound_form(form_class)._fields.items()}
+  valid, rejected = [], []
+  for line, record in rows:
+    form = unbound_form(form_class, form_data(field_types, record))
+    if form.validate():
+      valid.append((line, record, form))
+    else:
+      rejected.append((line, record, form.errors))
+  return valid, rejected
+
+
+def insert_rows(table, rows):
+  # Primary keys of the inserted rows, in order. Dialects that can return keys
+  # from an executemany (psycopg2) insert the whole chunk in one statement.
+  if not rows:
+    return []
+  if db.engine.dialect.insert_executemany_returning:
+    return db.session.execute(table.insert().returning(table.c.id), rows).scalars().all()
+  return [db.session.execute(table.insert(), row).inserted_primary_key[0] for row in rows]
+
+
+
+
+#----------------------------------------------------------------------------#
+# Loaders: one chunk of (line, record) rows in; the rejected rows and the
+# page cache keys the inserted rows show up on out.
+#----------------------------------------------------------------------------#
+
+def load_tagged(model, form_class, association, key, rows):
+  # Venues or artists with their genres
+  valid, rejected = validate(form_class, rows)
+  if not valid:
+    return rejected
+
+  columns = [column for column in model.__table__.columns.keys() if column in valid[0][2].data]
+  ids = insert_rows(model.__table__, [
+    {column: form.data[column] for column in columns} for line, record, form in valid
+  ])
+
+  genres = Genre.lookup(sorted({name for line, record, form in valid for name in form.genres.data}))
+  db.session.add_all(genres)
+  db.session.flush()
+  genre_ids = {genre.name: genre.id for genre in genres}
+
+  links = [
+    {key: id, 'genre_id': genre_ids[name]}
+    for id, (line, record, form) in zip(ids, valid) for name in dict.fromkeys(form.genres.data)
+  ]
+  if links:
+    db.session.execute(association.insert(), links)
+  return rejected
+
+
+# Forms are imported by the loaders, which keeps wtforms out of app start-up
+
+def load_venues(rows):
+  from forms import VenueForm
+  rejected = load_tagged(Venue, VenueForm, venue_genre, 'venue_id', rows)
+  DataVersion.bump('venues')
+  venue_search.invalidate()
+  return rejected, {'venues'}
+
+
+def load_artists(rows):
+  from forms import ArtistForm
+  rejected = load_tagged(Artist, ArtistForm, artist_genre, 'artist_id', rows)
+  DataVersion.bump('artists')
+  artist_search.invalidate()
+  return rejected, {'artists'}
+
+
+def load_shows(rows):
+  from forms import ShowForm
+  valid, rejected = validate(ShowForm, rows)
+
+  shows = []
+  for line, record, form in valid:
+    try:
+      shows.append((line, record, form, int(form.venue_id.data), int(form.artist_id.data)))
+    except (TypeError, ValueError):
+      rejected.append((line, record, {'venue_id': ['Venue and artist ids must be integers.']}))
+
+  # Both foreign keys of the whole chunk are resolved with one query
+  venue_ids, artist_ids = Show.existing_references(
+    {show[3] for show in shows}, {show[4] for show in shows}
+  )
+
+  candidates = []
+  for line, record, form, venue_id, artist_id in shows:
+    start_time = form.start_time.data
+    end_time = form.end_time.data or start_time + DEFAULT_SHOW_DURATION
+    errors = {}
+    if venue_id not in venue_ids:
+      errors['venue_id'] = ['No venue with id {}.'.format(venue_id)]
+    if artist_id not in artist_ids:
+      errors['artist_id'] = ['No artist with id {}.'.format(artist_id)]
+    if end_time <= start_time:
+      errors['end_time'] = ['The show must end after it starts.']
+    if errors:
+      rejected.append((line, record, errors))
+    else:
+      candidates.append((line, record, (venue_id, artist_id, start_time, end_time)))
+
+  # Double bookings, against stored shows and within the chunk, in one lookup
+  conflicts = show_schedule.conflicts([show for line, record, show in candidates])
+
+  inserts = []
+  pages = {'shows'}
+  now = datetime.datetime.utcnow()
+  for position, (line, record, (venue_id, artist_id, start_time, end_time)) in enumerate(candidates):
+    if position in conflicts:
+      key, id = conflicts[position]
+      rejected.append((line, record, {key: [show_schedule.describe(key, id)]}))
+      continue
+    inserts.append({
+      'venue_id': venue_id,
+      'artist_id': artist_id,
+      'start_time': start_time,
+      'end_time': end_time,
+      'counted_past': start_time < now,
+    })
+    pages.update(('venues', 'venue:{}'.format(venue_id), 'artist:{}'.format(artist_id)))
+
+  if inserts:
+    db.session.execute(Show.__table__.insert(), inserts)
+    DataVersion.bump('shows', 'venues')
+
+    # Core inserts skip the ORM events that maintain the show counters, so the
+    # chunk's counts are added in one UPDATE per table
+    connection = db.session.connection()
+    for owner, key in ((Venue, 'venue_id'), (Artist, 'artist_id')):
+      deltas = defaultdict(lambda: (0, 0))
+      for show in inserts:
+        upcoming, past = deltas[show[key]]
+        deltas[show[key]] = (upcoming, past + 1) if show['counted_past'] else (upcoming + 1, past)
+      adjust_show_counts(connection, owner, deltas)
+  return rejected, pages
+
+
+LOADERS = {'venues': load_venues, 'artists': load_artists, 'shows': load_shows}
+
+
+
+
+def import_rows(kind, rows, chunk_size=1000, on_error=None):
+  # Loads (line, record) rows chunk by chunk and returns the totals and the
+  # page cache keys to invalidate. Each chunk is its own transaction: a failure
+  # keeps the chunks committed before it.
+  loader = LOADERS[kind]
+  stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'seconds': 0.0, 'pages': set()}
+  started = time.perf_counter()
+
+  for chunk in chunked(rows, chunk_size):
+    try:
+      rejected, pages = loader(chunk)
+      db.session.commit()
+    except Exception:
+      db.session.rollback()
+      raise
+
+    stats['rows'] += len(chunk)
+    stats['rejected'] += len(rejected)
+    stats['imported'] += len(chunk) - len(rejected)
+    stats['pages'] |= pages
+    for line, record, errors in rejected:
+      if on_error is not None:
+        on_error(line, record, errors)
+
+  stats['seconds'] = time.perf_counter() - started
+  return stats
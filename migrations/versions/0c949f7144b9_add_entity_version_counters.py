@@ -0,0 +1,27 @@
+"""add version counters to venue, artist and show
+
+Revision ID: 0c949f7144b9
+Revises: 85db1b8c9fca
+Create Date: 2026-10-18 16:27:33.614082
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c949f7144b9'
+down_revision = '85db1b8c9fca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venue', 'artist', 'show'):
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in ('show', 'artist', 'venue'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,45 @@
+"""add pg_trgm GIN indexes for venue and artist search
+
+Revision ID: 1758b31af84c
+Revises: 208a68df8f79
+Create Date: 2026-10-18 11:40:05.301277
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1758b31af84c'
+down_revision = '208a68df8f79'
+branch_labels = None
+depends_on = None
+
+
+# Must stay the same expression as SearchEngine.document() in search.py
+SEARCH_DOCUMENTS = {
+    'venue': "lower(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || "
+             "coalesce(state, '') || ' ' || coalesce(genre, ''))",
+    'artist': "lower(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || "
+              "coalesce(state, '') || ' ' || coalesce(genres, ''))",
+}
+
+
+def upgrade():
+    # Trigram indexes are PostgreSQL only; other databases search in process
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, document in SEARCH_DOCUMENTS.items():
+        op.execute(
+            'CREATE INDEX ix_{0}_search_trgm ON {0} USING gin (({1}) gin_trgm_ops)'.format(table, document)
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in SEARCH_DOCUMENTS:
+        op.drop_index('ix_{}_search_trgm'.format(table), table_name=table)
@@ -0,0 +1,24 @@
+"""add show (start_time, id) index for keyset pagination
+
+Revision ID: 208a68df8f79
+Revises: f802bc87bd7b
+Create Date: 2026-10-18 10:03:17.540921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '208a68df8f79'
+down_revision = 'f802bc87bd7b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_start_time_id', 'show', ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
@@ -0,0 +1,50 @@
+"""add past/upcoming show counters to venue and artist
+
+Revision ID: 26ca244f5a76
+Revises: 79887d833efd
+Create Date: 2026-10-18 19:10:12.845301
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '26ca244f5a76'
+down_revision = '79887d833efd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venue', 'artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('show', sa.Column('counted_past', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index('ix_show_counted_past_start_time', 'show', ['counted_past', 'start_time'])
+
+    # Initial counts; from here on the application keeps them up to date
+    show = sa.table('show', sa.column('start_time', sa.DateTime()), sa.column('counted_past', sa.Boolean()))
+    # A show without a start time would count as upcoming for good
+    op.execute('DELETE FROM show WHERE start_time IS NULL')
+    # Start times are naive UTC; now() would be read in the server's time zone
+    cutoff = datetime.datetime.utcnow()
+    op.execute(show.update().where(show.c.start_time < cutoff).values(counted_past=True))
+    for table in ('venue', 'artist'):
+        op.execute(
+            'UPDATE {0} SET '
+            'upcoming_shows_count = (SELECT count(*) FROM show WHERE show.{0}_id = {0}.id AND NOT show.counted_past), '
+            'past_shows_count = (SELECT count(*) FROM show WHERE show.{0}_id = {0}.id AND show.counted_past)'.format(table)
+        )
+
+
+def downgrade():
+    op.drop_index('ix_show_counted_past_start_time', table_name='show')
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.drop_column('counted_past')
+    for table in ('artist', 'venue'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
@@ -0,0 +1,34 @@
+"""add data_version counters behind the listing ETags
+
+Revision ID: 4b1f0e7c9d2a
+Revises: 26ca244f5a76
+Create Date: 2026-10-18 19:52:40.118233
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1f0e7c9d2a'
+down_revision = '26ca244f5a76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table(
+        'data_version',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(data_version, [
+        {'name': name, 'version': int(time.time())} for name in ('shows', 'venues', 'artists')
+    ])
+
+
+def downgrade():
+    op.drop_table('data_version')
@@ -0,0 +1,69 @@
+"""add show end times and no-overlap exclusion constraints
+
+Revision ID: 79887d833efd
+Revises: 0c949f7144b9
+Create Date: 2026-10-18 18:02:41.532190
+
+Existing shows are given the default three hour length; shows without a
+start time cannot be given an end time and are deleted. On PostgreSQL the
+upgrade fails if a venue or artist is already double-booked; those shows
+have to be moved or removed first.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '79887d833efd'
+down_revision = '0c949f7144b9'
+branch_labels = None
+depends_on = None
+
+
+# Must stay the same as DEFAULT_SHOW_DURATION in models.py
+DEFAULT_DURATION_HOURS = 3
+
+
+def upgrade():
+    op.add_column('show', sa.Column('end_time', sa.DateTime(), nullable=True))
+
+    # Shows without a start time have no place on any listing, and would be
+    # left without an end time
+    op.execute('DELETE FROM show WHERE start_time IS NULL')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE show SET end_time = start_time + interval '{} hours'".format(DEFAULT_DURATION_HOURS)
+        )
+    else:
+        op.execute(
+            # Same text format SQLAlchemy stores SQLite datetimes in
+            "UPDATE show SET end_time = strftime('%Y-%m-%d %H:%M:%f000', start_time, '+{} hours')".format(
+                DEFAULT_DURATION_HOURS
+            )
+        )
+
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.alter_column('end_time', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_check_constraint('ck_show_end_after_start', 'end_time > start_time')
+
+    # A venue or an artist cannot be in two shows at once. The GiST indexes
+    # behind these constraints also serve the overlap lookups.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        for key in ('venue_id', 'artist_id'):
+            op.execute(
+                'ALTER TABLE show ADD CONSTRAINT ex_show_{0}_overlap '
+                'EXCLUDE USING gist ({0} WITH =, tsrange(start_time, end_time) WITH &&)'.format(key)
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for key in ('artist_id', 'venue_id'):
+            op.drop_constraint('ex_show_{}_overlap'.format(key), 'show')
+
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.drop_constraint('ck_show_end_after_start', type_='check')
+        batch_op.drop_column('end_time')
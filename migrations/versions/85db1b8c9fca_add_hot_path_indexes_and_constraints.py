@@ -0,0 +1,42 @@
+"""add listing/search indexes and NOT NULL show foreign keys
+
+Revision ID: 85db1b8c9fca
+Revises: dfe8ca21da52
+Create Date: 2026-10-18 14:51:09.772530
+
+show.venue_id, show.artist_id and show.start_time are already the leading
+columns of ix_show_venue_id_start_time, ix_show_artist_id_start_time and
+ix_show_start_time_id, so they get no single-column indexes of their own.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85db1b8c9fca'
+down_revision = 'dfe8ca21da52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venue_state_city_name', 'venue', ['state', 'city', 'name'], unique=False)
+    op.create_index('ix_venue_name_id', 'venue', ['name', 'id'], unique=False)
+    op.create_index('ix_artist_name_id', 'artist', ['name', 'id'], unique=False)
+
+    # Shows that lost their venue or artist cannot be listed anywhere
+    op.execute('DELETE FROM show WHERE venue_id IS NULL OR artist_id IS NULL')
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.alter_column('venue_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('artist_id', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.alter_column('artist_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('venue_id', existing_type=sa.Integer(), nullable=True)
+
+    op.drop_index('ix_artist_name_id', table_name='artist')
+    op.drop_index('ix_venue_name_id', table_name='venue')
+    op.drop_index('ix_venue_state_city_name', table_name='venue')
@@ -0,0 +1,127 @@
+"""move JSON-encoded genres into genre and association tables
+
+Revision ID: dfe8ca21da52
+Revises: 1758b31af84c
+Create Date: 2026-10-18 13:22:48.906113
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dfe8ca21da52'
+down_revision = '1758b31af84c'
+branch_labels = None
+depends_on = None
+
+
+# (table, JSON column, association table, association key)
+TAGGED = [
+    ('venue', 'genre', 'venue_genre', 'venue_id'),
+    ('artist', 'genres', 'artist_genre', 'artist_id'),
+]
+
+genre = sa.table('genre', sa.column('id', sa.Integer), sa.column('name', sa.String))
+
+
+def search_document(json_column=None):
+    # Must stay the same expression as SearchEngine.document() in search.py
+    columns = ['name', 'city', 'state'] + ([json_column] if json_column else [])
+    return 'lower({})'.format(" || ' ' || ".join("coalesce({}, '')".format(column) for column in columns))
+
+
+def parse_genres(value):
+    try:
+        genres = json.loads(value) if value else []
+    except ValueError:
+        genres = [value]
+    if isinstance(genres, str):
+        genres = [genres]
+    return [name for name in genres if name]
+
+
+def upgrade():
+    op.create_table('genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for table, column, association, key in TAGGED:
+        op.create_table(association,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([key], [table + '.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['genre.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(key, 'genre_id')
+        )
+        op.create_index('ix_{}_genre_id_{}'.format(association, key), association, ['genre_id', key], unique=False)
+
+    # Backfill from the JSON strings, creating each distinct genre once
+    bind = op.get_bind()
+    tagged = {}
+    for table, column, association, key in TAGGED:
+        rows = bind.execute(sa.text('SELECT id, {} FROM {}'.format(column, table))).fetchall()
+        tagged[table] = [(id, parse_genres(value)) for id, value in rows]
+
+    names = sorted({name for rows in tagged.values() for _, genres in rows for name in genres})
+    if names:
+        op.bulk_insert(genre, [{'name': name} for name in names])
+    genre_ids = dict((name, id) for id, name in bind.execute(sa.select(genre.c.id, genre.c.name)))
+
+    for table, column, association, key in TAGGED:
+        rows = [
+            {key: id, 'genre_id': genre_ids[name]}
+            for id, genres in tagged[table] for name in dict.fromkeys(genres)
+        ]
+        if rows:
+            op.bulk_insert(sa.table(association, sa.column(key, sa.Integer), sa.column('genre_id', sa.Integer)), rows)
+
+    postgresql = bind.dialect.name == 'postgresql'
+    for table, column, association, key in TAGGED:
+        if postgresql:
+            op.drop_index('ix_{}_search_trgm'.format(table), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column(column)
+        if postgresql:
+            op.execute('CREATE INDEX ix_{0}_search_trgm ON {0} USING gin (({1}) gin_trgm_ops)'.format(
+                table, search_document()
+            ))
+    if postgresql:
+        op.execute('CREATE INDEX ix_genre_name_trgm ON genre USING gin (lower(name) gin_trgm_ops)')
+
+
+def downgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+    if postgresql:
+        op.drop_index('ix_genre_name_trgm', table_name='genre')
+
+    for table, column, association, key in TAGGED:
+        if postgresql:
+            op.drop_index('ix_{}_search_trgm'.format(table), table_name=table)
+        op.add_column(table, sa.Column(column, sa.String(), nullable=True))
+
+        genres = {}
+        rows = bind.execute(sa.text(
+            'SELECT a.{key}, g.name FROM {association} a JOIN genre g ON g.id = a.genre_id '
+            'ORDER BY a.{key}, g.name'.format(key=key, association=association)
+        ))
+        for id, name in rows:
+            genres.setdefault(id, []).append(name)
+        for id, names in genres.items():
+            bind.execute(
+                sa.text('UPDATE {} SET {} = :genres WHERE id = :id'.format(table, column)),
+                {'genres': json.dumps(names), 'id': id}
+            )
+
+        if postgresql:
+            op.execute('CREATE INDEX ix_{0}_search_trgm ON {0} USING gin (({1}) gin_trgm_ops)'.format(
+                table, search_document(column)
+            ))
+        op.drop_index('ix_{}_genre_id_{}'.format(association, key), table_name=association)
+        op.drop_table(association)
+    op.drop_table('genre')
@@ -0,0 +1,715 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.attributes import flag_modified
+from search import SearchEngine
+from schedule import Schedule
+from replicas import RoutingSession
+import datetime
+import base64
+import time
+
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+  # SQLite ignores foreign keys, ON DELETE CASCADE included, unless asked on
+  # every connection; the show counters rely on the cascade
+  cursor = dbapi_connection.cursor()
+  cursor.execute('PRAGMA foreign_keys=ON')
+  cursor.close()
+
+
+class PooledSQLAlchemy(SQLAlchemy):
+  # SQLite gets a static (in memory) or null pool from Flask-SQLAlchemy, which
+  # reject the queue sizing options in SQLALCHEMY_ENGINE_OPTIONS
+  
+  def create_engine(self, sa_url, engine_opts):
+    if not sa_url.drivername.startswith('sqlite'):
+      return super().create_engine(sa_url, engine_opts)
+    engine_opts = {
+      option: value for option, value in engine_opts.items()
+      if option not in ('pool_size', 'max_overflow', 'pool_timeout')
+    }
+    engine = super().create_engine(sa_url, engine_opts)
+    db.event.listen(engine, 'connect', enable_foreign_keys)
+    return engine
+  
+  
+  def create_session(self, options):
+    # Sends the reads of @replica_reads views to a read replica
+    return sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = PooledSQLAlchemy()
+
+
+@compiles(ExcludeConstraint)
+def skip_exclude_constraint(constraint, compiler, **kwargs):
+  # Exclusion constraints only exist on PostgreSQL; elsewhere create_all()
+  # leaves them out (None drops the constraint from CREATE TABLE)
+  return None
+
+
+@compiles(ExcludeConstraint, 'postgresql')
+def compile_exclude_constraint(constraint, compiler, **kwargs):
+  return compiler.visit_exclude_constraint(constraint, **kwargs)
+
+
+def no_overlap(key):
+  # A venue or an artist cannot be in two shows at once
+  return ExcludeConstraint(
+    (key, '='),
+    (db.func.tsrange(db.column('start_time'), db.column('end_time')), '&&'),
+    name='ex_show_{}_overlap'.format(key),
+    using='gist',
+  )
+
+# Length of a show created without an end time
+DEFAULT_SHOW_DURATION = datetime.timedelta(hours=3)
+
+
+def default_end_time(context):
+  start_time = context.get_current_parameters().get('start_time')
+  return start_time + DEFAULT_SHOW_DURATION if start_time else None
+
+
+
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+class Show(db.Model):
+  __tablename__ = 'show'
+  __table_args__ = (
+    db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+    db.Index('ix_show_start_time_id', 'start_time', 'id'),
+    db.Index('ix_show_counted_past_start_time', 'counted_past', 'start_time'),
+    db.CheckConstraint('end_time > start_time', name='ck_show_end_after_start'),
+    no_overlap('venue_id'),
+    no_overlap('artist_id'),
+  )
+  id = db.Column(db.Integer, primary_key=True)
+  artist_id = db.Column(db.ForeignKey('artist.id', ondelete='CASCADE'), nullable=False)
+  venue_id =  db.Column(db.ForeignKey('venue.id',  ondelete='CASCADE'), nullable=False)
+  start_time = db.Column(db.DateTime(), default=datetime.datetime.utcnow())
+  end_time = db.Column(db.DateTime(), nullable=False, default=default_end_time)
+  # Whether the show is counted in its venue's and artist's past_shows_count
+  # (rather than upcoming_shows_count); flipped by Show.roll()
+  counted_past = db.Column(db.Boolean, nullable=False, default=False)
+  version = db.Column(db.Integer, nullable=False, default=1)
+  
+  __mapper_args__ = {'version_id_col': version}
+  
+  
+  @classmethod
+  def listing_version(cls):
+    # Changes whenever a show is added, removed or edited, or a venue or artist
+    # shown on the listing is edited or deleted: one primary key lookup
+    return DataVersion.current('shows')
+  
+  
+  @classmethod
+  def timeline(cls, owner_key, owner_id, counterpart, prefix):
+    # Past and upcoming shows of a single venue or artist, joined to the other side
+    # of the booking. The start_time comparison runs in SQL within the same query,
+    # and the (owner_key, start_time) index serves both the filter and the ordering.
+    rows = db.session.execute(cls.timeline_query(owner_key, owner_id, counterpart, prefix))
+    return cls.partition_timeline(rows, prefix)
+  
+  @classmethod
+  def timeline_query(cls, owner_key, owner_id, counterpart, prefix, upcoming=None, now=None):
+    # Both partitions, or only the upcoming (True) or past (False) shows
+    now = now or datetime.datetime.utcnow()
+    is_upcoming = (cls.start_time >= now).label('is_upcoming')
+    
+    query = db.select(
+      cls.start_time,
+      counterpart.id,
+      counterpart.name,
+      counterpart.image_link,
+      is_upcoming
+    ).join(
+      counterpart, counterpart.id == getattr(cls, prefix + '_id')
+    ).where(
+      owner_key == owner_id
+    )
+    if upcoming is not None:
+      query = query.where(cls.start_time >= now if upcoming else cls.start_time < now)
+    return query.order_by(cls.start_time)
+  
+  @staticmethod
+  def partition_timeline(rows, prefix):
+    timeline = {"past_shows": [], "upcoming_shows": []}
+    
+    for start_time, id, name, image_link, upcoming in rows:
+      timeline["upcoming_shows" if upcoming else "past_shows"].append({
+        prefix + "_id": id,
+        prefix + "_name": name,
+        prefix + "_image_link": image_link,
+        "start_time": start_time
+      })
+    
+    timeline["past_shows_count"] = len(timeline["past_shows"])
+    timeline["upcoming_shows_count"] = len(timeline["upcoming_shows"])
+    
+    return timeline
+  
+  
+  @classmethod
+  def listing(cls, after=None, start=None, end=None, limit=30):
+    # One page of shows with their venue and artist in a single joined query.
+    # Pages are keyed on (start_time, id) rather than OFFSET, so every page is the
+    # same bounded range scan on ix_show_start_time_id however deep it is.
+    rows = db.session.execute(cls.listing_query(after, start, end, limit)).all()
+    return cls.listing_page(rows, limit)
+  
+  @classmethod
+  def listing_query(cls, after=None, start=None, end=None, limit=30):
+    query = db.select(
+      cls.id,
+      cls.start_time,
+      cls.end_time,
+      cls.venue_id,
+      Venue.name.label('venue_name'),
+      cls.artist_id,
+      Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link')
+    ).join(
+      Venue, Venue.id == cls.venue_id
+    ).join(
+      Artist, Artist.id == cls.artist_id
+    )
+    
+    if start is not None:
+      query = query.where(cls.start_time >= start)
+    if end is not None:
+      query = query.where(cls.start_time < end)
+    if after is not None:
+      query = query.where(db.tuple_(cls.start_time, cls.id) > after)
+    
+    # Fetch one extra row to know whether a next page exists
+    return query.order_by(cls.start_time, cls.id).limit(limit + 1)
+  
+  @classmethod
+  def listing_page(cls, rows, limit):
+    # (rows of the page, cursor of the next page or None)
+    next_cursor = None
+    
+    if len(rows) > limit:
+      rows = rows[:limit]
+      next_cursor = cls.encode_cursor(rows[-1].start_time, rows[-1].id)
+    
+    return rows, next_cursor
+  
+  
+  @classmethod
+  def upcoming_counts(cls, page, owner):
+    # Upcoming show counts for a whole page of venues or artists (a subquery of
+    # id/name/rank rows), read from the owner's counter column and ordered like
+    # the page itself.
+    return db.session.execute(cls.upcoming_counts_query(page, owner)).all()
+  
+  @classmethod
+  def upcoming_counts_query(cls, page, owner):
+    return db.select(
+      page.c.id,
+      page.c.name,
+      owner.upcoming_shows_count.label('num_upcoming_shows')
+    ).join(
+      owner, owner.id == page.c.id
+    ).order_by(
+      page.c.rank.desc(), page.c.name, page.c.id
+    )
+  
+  
+  @classmethod
+  def roll(cls, now=None):
+    # Moves shows that have started since the last run from their venue's and
+    # artist's upcoming count to their past count: one grouped query and one
+    # UPDATE per table, then the shows are marked as counted. Returns how many
+    # shows were rolled.
+    now = now or datetime.datetime.utcnow()
+    due = db.and_(cls.counted_past.is_(False), cls.start_time < now)
+    
+    for owner, key in ((Venue, cls.venue_id), (Artist, cls.artist_id)):
+      counts = db.session.query(key, db.func.count(cls.id)).filter(due).group_by(key).all()
+      if counts:
+        adjust_show_counts(db.session.connection(), owner, {
+          id: (-count, count) for id, count in counts
+        })
+        if owner is Venue:
+          DataVersion.bump('venues')
+    
+    return db.session.query(cls).filter(due).update(
+      {cls.counted_past: True}, synchronize_session=False
+    )
+  
+  
+  @classmethod
+  def recount(cls, venue_ids=None, artist_ids=None):
+    # Recomputes the counters of the given venues and artists (all of them
+    # when None) from their shows, for writes that bypass the ORM events such
+    # as bulk imports, or to repair drift
+    for owner, key, ids in ((Venue, cls.venue_id, venue_ids), (Artist, cls.artist_id, artist_ids)):
+      if ids is not None and not ids:
+        continue
+      counts = {}
+      for column, past in (('upcoming_shows_count', False), ('past_shows_count', True)):
+        counts[column] = db.select(db.func.count(cls.id)).where(
+          key == owner.id, cls.counted_past.is_(past)
+        ).scalar_subquery()
+      update = owner.__table__.update().values(counts)
+      if ids is not None:
+        update = update.where(owner.__table__.c.id.in_(ids))
+      db.session.execute(update)
+    DataVersion.bump('venues')
+  
+  
+  @classmethod
+  def existing_references(cls, venue_ids, artist_ids):
+    # The venue ids and artist ids that exist among the given ones, from a
+    # single statement of two primary-key lookups
+    venues = db.select(db.literal('venue'), Venue.id).where(Venue.id.in_(venue_ids))
+    artists = db.select(db.literal('artist'), Artist.id).where(Artist.id.in_(artist_ids))
+    
+    found = {'venue': set(), 'artist': set()}
+    for kind, id in db.session.execute(db.union_all(venues, artists)):
+      found[kind].add(id)
+    
+    return found['venue'], found['artist']
+  
+  
+  @staticmethod
+  def encode_cursor(start_time, id):
+    token = '{}|{}'.format(start_time.isoformat(), id)
+    return base64.urlsafe_b64encode(token.encode()).decode()
+  
+  
+  @staticmethod
+  def decode_cursor(cursor):
+    start_time, id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.datetime.fromisoformat(start_time), int(id)
+  
+
+
+
+
+
+venue_genre = db.Table(
+  'venue_genre',
+  db.Column('venue_id', db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('genre_id', db.ForeignKey('genre.id', ondelete='CASCADE'), primary_key=True),
+  db.Index('ix_venue_genre_genre_id_venue_id', 'genre_id', 'venue_id'),
+)
+
+artist_genre = db.Table(
+  'artist_genre',
+  db.Column('artist_id', db.ForeignKey('artist.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('genre_id', db.ForeignKey('genre.id', ondelete='CASCADE'), primary_key=True),
+  db.Index('ix_artist_genre_genre_id_artist_id', 'genre_id', 'artist_id'),
+)
+
+
+
+
+class Genre(db.Model):
+  __tablename__ = 'genre'
+  id = db.Column(db.Integer, primary_key=True)
+  name = db.Column(db.String(120), nullable=False, unique=True)
+  
+  
+  @classmethod
+  def lookup(cls, names):
+    # Genre rows for the given names in one query, creating the ones not seen yet
+    names = list(dict.fromkeys(names or []))
+    existing = {genre.name: genre for genre in cls.query.filter(cls.name.in_(names))}
+    
+    return [existing.get(name) or cls(name=name) for name in names]
+  
+  
+  @classmethod
+  def catalogue(cls, genre_id, model, association, key):
+    # Venues or artists tagged with a genre, found through the association
+    # table's (genre_id, <model>_id) index rather than by scanning the model
+    return db.session.query(
+      model.id, model.name, model.city, model.state
+    ).join(
+      association, association.c[key] == model.id
+    ).filter(
+      association.c.genre_id == genre_id
+    ).order_by(model.name, model.id).all()
+  
+  
+  @classmethod
+  def names_by_owner(cls, association, key, ids):
+    # {venue or artist id: [genre names]} for a whole page of ids in one query
+    names = {id: [] for id in ids}
+    for id, name in db.session.execute(cls.names_by_owner_query(association, key, ids)):
+      names[id].append(name)
+    return names
+  
+  @classmethod
+  def names_by_owner_query(cls, association, key, ids):
+    return db.select(
+      association.c[key], cls.name
+    ).join(
+      cls, cls.id == association.c.genre_id
+    ).where(
+      association.c[key].in_(ids)
+    ).order_by(association.c[key], cls.name)
+  
+
+
+
+
+
+class Venue(db.Model):
+    __tablename__ = 'venue'
+    __table_args__ = (
+      db.Index('ix_venue_state_city_name', 'state', 'city', 'name'),
+      db.Index('ix_venue_name_id', 'name', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String())
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    website_link = db.Column(db.String(120))
+    facebook_link = db.Column(db.String(120))
+    seeking_description = db.Column(db.String(500))
+    seeking_talent = db.Column(db.Boolean, default=False)
+    # Maintained by the show mapper events below and by Show.roll()/recount()
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {'version_id_col': version}
+    
+    shows = db.relationship('Show', backref='venue', passive_deletes=True)
+    genres = db.relationship('Genre', secondary=venue_genre, order_by='Genre.name', passive_deletes=True)
+    
+    
+    
+    
+    def shows_by_time(self):
+      # Both show partitions and their counts from one joined query
+      return Show.timeline(Show.venue_id, self.id, Artist, 'artist')
+    
+    @classmethod
+    def search(cls, search_term, page=1, per_page=20):
+      # One page of ranked fuzzy matches on name, city, state and genre plus the
+      # total match count; upcoming show counts for the page come from a single
+      # grouped query.
+      count, page_rows = venue_search.search(search_term, page=page, per_page=per_page)
+      
+      return count, Show.upcoming_counts(page_rows, Venue)
+    
+    
+    @classmethod
+    def profile_version(cls, id):
+      # Changes whenever this venue, one of its shows or a artist it is booked
+      # with changes, and when one of its shows moves from upcoming to past.
+      # Shows only ever get higher ids, so count + sum(id) catches any change
+      # to the set of shows.
+      return db.session.query(
+        cls.version,
+        db.func.count(Show.id),
+        db.func.sum(Show.id),
+        db.func.sum(Show.version),
+        db.func.sum(Artist.version),
+        db.func.count(db.case((Show.start_time < datetime.datetime.utcnow(), Show.id)))
+      ).outerjoin(
+        Show, Show.venue_id == cls.id
+      ).outerjoin(
+        Artist, Artist.id == Show.artist_id
+      ).filter(
+        cls.id == id
+      ).group_by(cls.version).first()
+    
+    
+    @classmethod
+    def directory_version(cls):
+      # Changes whenever a venue is added, removed or edited, or the number of
+      # upcoming shows changes: one primary key lookup
+      return DataVersion.current('venues')
+    
+    
+    @classmethod
+    def directory(cls):
+      # One row per venue with its number of upcoming shows, ordered by
+      # (state, city) so the whole /venues page is served by a single query.
+      return db.session.execute(cls.directory_query()).all()
+    
+    @classmethod
+    def directory_query(cls):
+      return db.select(
+        cls.state,
+        cls.city,
+        cls.id,
+        cls.name,
+        cls.upcoming_shows_count.label('num_upcoming_shows')
+      ).order_by(
+        cls.state, cls.city, cls.name
+      )
+      
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+
+
+
+class Artist(db.Model):
+    __tablename__ = 'artist'
+    __table_args__ = (
+      db.Index('ix_artist_name_id', 'name', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String())
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    facebook_link = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    website_link = db.Column(db.String(120))
+    seeking_description = db.Column(db.String(500))
+    seeking_venue = db.Column(db.Boolean, default=False)
+    # Maintained by the show mapper events below and by Show.roll()/recount()
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {'version_id_col': version}
+    
+    shows = db.relationship('Show', backref='artist', passive_deletes=True)
+    genres = db.relationship('Genre', secondary=artist_genre, order_by='Genre.name', passive_deletes=True)
+    
+    
+    def shows_by_time(self):
+      # Both show partitions and their counts from one joined query
+      return Show.timeline(Show.artist_id, self.id, Venue, 'venue')
+    
+    @classmethod
+    def search(cls, search_term, page=1, per_page=20):
+      # One page of ranked fuzzy matches on name, city, state and genre plus the
+      # total match count; upcoming show counts for the page come from a single
+      # grouped query.
+      count, page_rows = artist_search.search(search_term, page=page, per_page=per_page)
+      
+      return count, Show.upcoming_counts(page_rows, Artist)
+    
+    
+    @classmethod
+    def profile_version(cls, id):
+      # Changes whenever this artist, one of its shows or a venue it is booked
+      # with changes, and when one of its shows moves from upcoming to past.
+      # Shows only ever get higher ids, so count + sum(id) catches any change
+      # to the set of shows.
+      return db.session.query(
+        cls.version,
+        db.func.count(Show.id),
+        db.func.sum(Show.id),
+        db.func.sum(Show.version),
+        db.func.sum(Venue.version),
+        db.func.count(db.case((Show.start_time < datetime.datetime.utcnow(), Show.id)))
+      ).outerjoin(
+        Show, Show.artist_id == cls.id
+      ).outerjoin(
+        Venue, Venue.id == Show.venue_id
+      ).filter(
+        cls.id == id
+      ).group_by(cls.version).first()
+    
+    
+    @classmethod
+    def listing_version(cls):
+      # Changes whenever an artist is added, removed or edited: one primary
+      # key lookup
+      return DataVersion.current('artists')
+    
+    @classmethod
+    def listing_query(cls):
+      # Every artist's id and name, as listed on /artists
+      return db.select(cls.id, cls.name).order_by(cls.name, cls.id)
+      
+    
+
+
+
+class DataVersion(db.Model):
+  # Named counters bumped by every write to the rows behind a page, so its
+  # ETag is a single-row read instead of an aggregate over whole tables
+  __tablename__ = 'data_version'
+  name = db.Column(db.String(32), primary_key=True)
+  version = db.Column(db.BigInteger, nullable=False)
+  
+  # /shows, /venues (names and upcoming show counts) and /artists
+  NAMES = ('shows', 'venues', 'artists')
+  
+  
+  @classmethod
+  def current(cls, name):
+    # None (no conditional GET) if the row is missing
+    return db.session.query(cls.version).filter(cls.name == name).scalar()
+  
+  
+  @classmethod
+  def bump(cls, *names):
+    db.session.execute(
+      cls.__table__.update().where(cls.__table__.c.name.in_(names)).values(version=cls.__table__.c.version + 1)
+    )
+  
+  
+  @staticmethod
+  def initial_rows():
+    # Counters start at the creation time, so a recreated database does not
+    # hand out the ETags of the one it replaced
+    return [{'name': name, 'version': int(time.time())} for name in DataVersion.NAMES]
+
+
+# The exclusion constraints compare integer ids with '=' in a GiST index
+db.event.listen(
+  Show.__table__, 'before_create',
+  db.DDL('CREATE EXTENSION IF NOT EXISTS btree_gist').execute_if(dialect='postgresql')
+)
+
+
+@db.event.listens_for(DataVersion.__table__, 'after_create')
+def create_data_versions(target, connection, **kwargs):
+  connection.execute(target.insert(), DataVersion.initial_rows())
+
+
+
+
+def adjust_show_counts(connection, owner, deltas):
+  # Applies {venue or artist id: (upcoming delta, past delta)} to the counter
+  # columns in one executemany. Plain UPDATEs: counters do not bump versions.
+  table = owner.__table__
+  connection.execute(
+    table.update().where(table.c.id == db.bindparam('owner_id')).values(
+      upcoming_shows_count=table.c.upcoming_shows_count + db.bindparam('upcoming'),
+      past_shows_count=table.c.past_shows_count + db.bindparam('past'),
+    ),
+    [{'owner_id': id, 'upcoming': upcoming, 'past': past} for id, (upcoming, past) in deltas.items()]
+  )
+
+
+def count_show(connection, venue_id, artist_id, past, delta):
+  change = (0, delta) if past else (delta, 0)
+  adjust_show_counts(connection, Venue, {venue_id: change})
+  adjust_show_counts(connection, Artist, {artist_id: change})
+
+
+@db.event.listens_for(Show, 'before_insert')
+def count_new_show(mapper, connection, show):
+  show.counted_past = show.start_time is not None and show.start_time < datetime.datetime.utcnow()
+  count_show(connection, show.venue_id, show.artist_id, show.counted_past, 1)
+
+
+@db.event.listens_for(Show, 'before_update')
+def recount_moved_show(mapper, connection, show):
+  # A show moved to another venue, artist or time leaves its old counters
+  state = db.inspect(show)
+  if not any(state.attrs[key].history.has_changes() for key in ('venue_id', 'artist_id', 'start_time')):
+    return
+  
+  def previous(key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(show, key)
+  
+  count_show(connection, previous('venue_id'), previous('artist_id'), previous('counted_past'), -1)
+  show.counted_past = show.start_time is not None and show.start_time < datetime.datetime.utcnow()
+  count_show(connection, show.venue_id, show.artist_id, show.counted_past, 1)
+
+
+@db.event.listens_for(Show, 'after_delete')
+def uncount_deleted_show(mapper, connection, show):
+  count_show(connection, show.venue_id, show.artist_id, show.counted_past, -1)
+
+
+def uncount_cascaded_shows(connection, key, owner_id, counterpart, counterpart_key):
+  # Deleting a venue (artist) takes its shows with it through ON DELETE
+  # CASCADE, without ORM events; the artists (venues) of those shows lose them
+  # from their counters here, in one grouped query and one UPDATE.
+  deltas = {}
+  for id, past, count in connection.execute(
+    db.select(counterpart_key, Show.counted_past, db.func.count(Show.id)).where(
+      key == owner_id
+    ).group_by(counterpart_key, Show.counted_past)
+  ):
+    upcoming_delta, past_delta = deltas.get(id, (0, 0))
+    deltas[id] = (upcoming_delta, past_delta - count) if past else (upcoming_delta - count, past_delta)
+  if deltas:
+    adjust_show_counts(connection, counterpart, deltas)
+
+
+@db.event.listens_for(Venue, 'before_delete')
+def uncount_venue_shows(mapper, connection, venue):
+  uncount_cascaded_shows(connection, Show.venue_id, venue.id, Artist, Show.artist_id)
+
+
+@db.event.listens_for(Artist, 'before_delete')
+def uncount_artist_shows(mapper, connection, artist):
+  uncount_cascaded_shows(connection, Show.artist_id, artist.id, Venue, Show.venue_id)
+
+
+
+
+# The listings each kind of row appears on: shows are listed with their
+# venue's and artist's names, and counted on /venues
+LISTED_ON = {Show: ('shows', 'venues'), Venue: ('shows', 'venues'), Artist: ('shows', 'artists')}
+
+
+@db.event.listens_for(Session, 'before_flush')
+def bump_data_versions(session, flush_context, instances):
+  # Each version at most once per transaction: it commits, or rolls back,
+  # with the writes
+  names = set()
+  for obj in (*session.new, *session.dirty, *session.deleted):
+    names.update(LISTED_ON.get(type(obj), ()))
+  # A deleted artist's shows leave their venues' upcoming counts
+  if any(isinstance(obj, Artist) for obj in session.deleted):
+    names.add('venues')
+
+  bumped = session.info.setdefault('data_versions_bumped', set())
+  if names - bumped:
+    DataVersion.bump(*sorted(names - bumped))
+    bumped.update(names)
+
+
+@db.event.listens_for(Session, 'after_transaction_end')
+def reset_data_versions(session, transaction):
+  if transaction.parent is None:
+    session.info.pop('data_versions_bumped', None)
+
+
+@db.event.listens_for(Session, 'before_flush')
+def bump_versions(session, flush_context, instances):
+  # Editing only a venue's or artist's genres changes no column of its own row,
+  # which would leave its version (and ETag) unchanged. Flag the row modified
+  # so the UPDATE, and with it the version increment, still happens.
+  for obj in session.dirty:
+    if isinstance(obj, (Venue, Artist)) and session.is_modified(obj):
+      state = db.inspect(obj)
+      if not any(state.attrs[column.key].history.has_changes() for column in state.mapper.column_attrs):
+        flag_modified(obj, 'name')
+
+
+
+
+venue_search = SearchEngine(db, Venue, ('city', 'state'), tags=(Venue.genres, Genre.name))
+artist_search = SearchEngine(db, Artist, ('city', 'state'), tags=(Artist.genres, Genre.name))
+show_schedule = Schedule(db, Show)
+    
+
+# TODO: implement any missing fields, as a database migration using Flask-Migrate
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
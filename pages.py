@@ -0,0 +1,42 @@
+#----------------------------------------------------------------------------#
+# Home page and genre browsing.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template
+
+from models import Genre, Venue, Artist, venue_genre, artist_genre
+from querystats import query_budget
+from replicas import replica_reads
+
+
+pages = Blueprint('pages', __name__)
+
+
+@pages.route('/')
+def index():
+  return render_template('pages/home.html')
+
+
+
+
+#  Genres
+#  ----------------------------------------------------------------
+
+@pages.route('/genres/<genre_name>')
+@query_budget(3)
+@replica_reads
+def browse_genre(genre_name):
+  # venues and artists tagged with a genre, answered from the genre indexes
+  genre = Genre.query.filter_by(name=genre_name).first_or_404()
+  
+  data={
+    "name": genre.name,
+    "venues": Genre.catalogue(genre.id, Venue, venue_genre, 'venue_id'),
+    "artists": Genre.catalogue(genre.id, Artist, artist_genre, 'artist_id'),
+  }
+  
+  return render_template('pages/genre.html', genre=data)
+
+
+
+
@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+#
+# Counts the statements each request issues, their total database time and
+# how often the same statement shape repeats (the signature of an N+1 loop).
+# Results go out as a Server-Timing header and one structured log line per
+# request. Views can declare a query budget with @query_budget(n); with
+# QUERY_BUDGET_ENFORCE on (tests), exceeding it fails the request. With
+# TEMPLATE_PROFILE on, the render time of each template and block
+# (rendering.py) is reported alongside.
+#----------------------------------------------------------------------------#
+
+import functools
+import json
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+  pass
+
+
+def fingerprint(statement):
+  # Statement shape with whitespace, bound parameters, literals and expanded
+  # IN lists collapsed, so the same query with other values compares equal
+  statement = re.sub(r'%\(\w+\)s|\?|:\w+', '?', statement)
+  statement = re.sub(r"'[^']*'|\b\d+(\.\d+)?\b", '?', statement)
+  statement = re.sub(r'\(\s*\?(\s*,\s*\?)*\s*\)', '(?)', statement)
+  return ' '.join(statement.split())
+
+
+def query_budget(limit):
+  # Declares the most statements a view may issue per request
+  def decorator(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+      g.query_budget = limit
+      return view(*args, **kwargs)
+    return wrapper
+  return decorator
+
+
+# The start time is kept on the statement's execution context, which is
+# dropped with it, so a statement that raises leaves nothing behind
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  context.query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  started = context.query_started
+  if not has_request_context() or 'query_count' not in g:
+    return
+  g.query_count += 1
+  g.query_time += time.perf_counter() - started
+  g.query_fingerprints[fingerprint(statement)] += 1
+
+
+
+
+class QueryStats:
+
+  def __init__(self, app=None):
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    app.config.setdefault('QUERY_BUDGET_ENFORCE', False)
+    app.config.setdefault('QUERY_REPEAT_THRESHOLD', 3)
+
+    # Every engine (primary, replicas, async) reports into the same counters
+    if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+      event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+      event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+
+    app.before_request(self.before_request)
+    app.after_request(self.after_request)
+
+
+  def before_request(self):
+    # Requests sharing an app context (as in tests) must not inherit a budget
+    g.pop('query_budget', None)
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+    g.query_fingerprints = Counter()
+
+
+  def after_request(self, response):
+    if 'query_count' not in g:
+      return response
+
+    config = current_app.config
+    budget = g.get('query_budget')
+    repeated = {
+      statement: count for statement, count in g.query_fingerprints.items()
+      if count >= config['QUERY_REPEAT_THRESHOLD']
+    }
+
+    response.headers.add('Server-Timing', 'db;dur={:.2f};desc="{} queries"'.format(
+      g.query_time * 1000, g.query_count
+    ))
+    response.headers.add('Server-Timing', 'app;dur={:.2f}'.format(
+      (time.perf_counter() - g.request_started) * 1000
+    ))
+    templates = g.get('template_timings', {})
+    for name, (duration, calls) in templates.items():
+      response.headers.add('Server-Timing', 'tpl;dur={:.2f};desc="{} x{}"'.format(duration, name, calls))
+
+    record = {
+      'event': 'request',
+      'method': request.method,
+      'path': request.path,
+      'endpoint': request.endpoint,
+      'status': response.status_code,
+      'queries': g.query_count,
+      'db_ms': round(g.query_time * 1000, 2),
+      'budget': budget,
+      'repeated': repeated,
+    }
+    if 'template_timings' in g:
+      record['templates'] = {name: round(duration, 2) for name, (duration, calls) in templates.items()}
+    current_app.logger.info(json.dumps(record))
+
+    if budget is not None and g.query_count > budget:
+      message = '{} issued {} queries, over its budget of {}'.format(request.endpoint, g.query_count, budget)
+      if config['QUERY_BUDGET_ENFORCE']:
+        raise QueryBudgetExceeded(message)
+      current_app.logger.warning(message)
+
+    return response
@@ -0,0 +1,106 @@
+#----------------------------------------------------------------------------#
+# Template compilation cache and render profiling.
+#
+# Jinja compiles each template to Python code the first time a worker renders
+# it. With TEMPLATE_CACHE_BACKEND set, the compiled code is kept in a
+# bytecode cache shared by the workers ('filesystem': TEMPLATE_CACHE_DIR, by
+# default in the instance folder and only accessible to the app's user;
+# 'redis': TEMPLATE_CACHE_REDIS_URL), so a new worker loads instead
+# of compiling; `flask warm-templates` fills it at deploy time. Entries are
+# keyed by the template source, so an edited template is compiled again.
+#
+# With TEMPLATE_PROFILE on, every template and every {% block %} is timed as
+# it renders (nested blocks and included templates count towards their
+# parent too). querystats reports the timings next to the request's queries.
+#----------------------------------------------------------------------------#
+
+import os
+import time
+
+from flask import g, has_request_context
+from jinja2 import FileSystemBytecodeCache, MemcachedBytecodeCache, Template
+
+from cache import private_directory, redis_client
+
+
+def create_bytecode_cache(app):
+  # Jinja runs the code it loads from the cache, so the cache has to be
+  # writable by the app's user only
+  config = app.config
+  backend = config['TEMPLATE_CACHE_BACKEND']
+
+  if backend == 'filesystem':
+    directory = config['TEMPLATE_CACHE_DIR'] or os.path.join(app.instance_path, 'template-cache')
+    return FileSystemBytecodeCache(private_directory(directory))
+  if backend == 'redis':
+    # Trusts everything in the store: anyone who can write to it can run code
+    # in the workers. Jinja's memcached cache only needs get(key) and set(key, value).
+    return MemcachedBytecodeCache(redis_client(config['TEMPLATE_CACHE_REDIS_URL']), prefix='fyyur:template:')
+  raise ValueError('Unknown TEMPLATE_CACHE_BACKEND {!r}'.format(backend))
+
+
+def timed(key, render):
+  # Wraps a template's or block's render function, which yields the output in
+  # pieces, and adds its time to g.template_timings[key] as [ms, calls]
+  def wrapper(context):
+    started = time.perf_counter()
+    try:
+      yield from render(context)
+    finally:
+      if has_request_context() and 'template_timings' in g:
+        timing = g.template_timings.setdefault(key, [0.0, 0])
+        timing[0] += (time.perf_counter() - started) * 1000
+        timing[1] += 1
+  return wrapper
+
+
+
+
+class ProfiledTemplate(Template):
+  # Template class of the Jinja environment while TEMPLATE_PROFILE is on
+
+  @classmethod
+  def _from_namespace(cls, environment, namespace, globals):
+    template = super()._from_namespace(environment, namespace, globals)
+    template.root_render_func = timed(template.name, template.root_render_func)
+    template.blocks = {
+      name: timed('{}#{}'.format(template.name, name), render)
+      for name, render in template.blocks.items()
+    }
+    return template
+
+
+
+
+def warm(app):
+  # Compiles every template (filling the bytecode cache); returns their names
+  names = app.jinja_env.list_templates(extensions=('html',))
+  for name in names:
+    app.jinja_env.get_template(name)
+  return names
+
+
+
+
+class Rendering:
+
+  def __init__(self, app=None):
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    app.config.setdefault('TEMPLATE_CACHE_BACKEND', None)
+    app.config.setdefault('TEMPLATE_CACHE_DIR', None)
+    app.config.setdefault('TEMPLATE_PROFILE', False)
+
+    if app.config['TEMPLATE_CACHE_BACKEND'] is not None:
+      app.jinja_env.bytecode_cache = create_bytecode_cache(app)
+
+    if app.config['TEMPLATE_PROFILE']:
+      app.jinja_env.template_class = ProfiledTemplate
+      app.before_request(self.before_request)
+
+
+  def before_request(self):
+    g.template_timings = {}
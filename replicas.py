@@ -0,0 +1,95 @@
+#----------------------------------------------------------------------------#
+# Read replica routing.
+#
+# Every URL in DATABASE_REPLICA_URLS becomes a SQLAlchemy bind ('replica_0',
+# 'replica_1', ...) holding a copy of the primary database. Views decorated
+# with @replica_reads (listings, searches, profiles, the read API) send their
+# queries to one replica, picked at random per request; writes, and every
+# other view, use the primary. A request that writes sets a cookie that keeps
+# the client's reads on the primary for READ_YOUR_WRITES_SECONDS, so the
+# client sees its own changes while the replicas catch up.
+#----------------------------------------------------------------------------#
+
+import functools
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy.sql.dml import UpdateBase
+
+
+def replica_reads(view):
+  # Lets the view's queries go to a read replica
+  @functools.wraps(view)
+  def wrapper(*args, **kwargs):
+    replicas = current_app.extensions['read_replicas']
+    if replicas.binds and not replicas.wrote_recently():
+      g.replica_bind = random.choice(replicas.binds)
+    return view(*args, **kwargs)
+  return wrapper
+
+
+
+
+class RoutingSession(SignallingSession):
+  # Session of models.db: reads of a @replica_reads view go to its replica,
+  # flushes and INSERT/UPDATE/DELETE statements always to the primary
+
+  def __init__(self, db, **options):
+    self.db = db
+    super().__init__(db, **options)
+
+
+  def get_bind(self, mapper=None, clause=None):
+    if has_request_context():
+      if self._flushing or isinstance(clause, UpdateBase):
+        g.wrote_primary = True
+      elif 'replica_bind' in g:
+        g.read_replica = True
+        return self.db.get_engine(self.app, g.replica_bind)
+    return super().get_bind(mapper, clause)
+
+
+
+
+class ReadReplicas:
+
+  def __init__(self, app=None):
+    self.binds = []
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    app.config.setdefault('READ_YOUR_WRITES_SECONDS', 5)
+    app.config.setdefault('READ_YOUR_WRITES_COOKIE', 'fyyur_primary')
+
+    self.binds = sorted(
+      bind for bind in app.config.get('SQLALCHEMY_BINDS') or ()
+      if bind.startswith('replica_')
+    )
+    app.extensions['read_replicas'] = self
+    app.after_request(self.after_request)
+
+
+  def wrote_recently(self):
+    # Whether the client's last write is younger than READ_YOUR_WRITES_SECONDS
+    try:
+      return float(request.cookies.get(current_app.config['READ_YOUR_WRITES_COOKIE'], 0)) > time.time()
+    except ValueError:
+      return False
+
+
+  def after_request(self, response):
+    if self.binds and g.get('wrote_primary'):
+      window = current_app.config['READ_YOUR_WRITES_SECONDS']
+      response.set_cookie(
+        current_app.config['READ_YOUR_WRITES_COOKIE'],
+        '{:.3f}'.format(time.time() + window),
+        max_age=window,
+        httponly=True,
+        secure=current_app.config['SESSION_COOKIE_SECURE'],
+        samesite='Lax',
+      )
+    return response
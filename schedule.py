@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Double-booking checks for shows.
+#
+# A venue or artist cannot have two shows whose [start_time, end_time) ranges
+# overlap. On PostgreSQL this is enforced by tsrange exclusion constraints,
+# and the checks below run as && lookups on their GiST indexes. Other
+# databases (SQLite in tests) rely on those same checks having kept each
+# calendar free of overlaps: the only stored show that can overlap
+# [start, end) is then the last one starting before end, found by one
+# descending probe of the (venue_id or artist_id, start_time) index.
+#----------------------------------------------------------------------------#
+
+class Schedule:
+  # Conflict checks for shows against the venue and artist calendars
+
+  # Lookups per statement: SQLite allows at most 500 SELECTs in a UNION ALL
+  LOOKUPS_PER_STATEMENT = 250
+
+  def __init__(self, db, show):
+    self.db = db
+    self.show = show
+    self.keys = ('venue_id', 'artist_id')
+
+
+  @staticmethod
+  def describe(key, id):
+    owner = key.split('_')[0]
+    if id is None:
+      return 'The {} has an overlapping show in the same batch.'.format(owner)
+    return 'The {} is already booked at that time (show {}).'.format(owner, id)
+
+
+  def conflicts(self, shows):
+    # {position: (key, conflicting show id)} for the new (venue_id, artist_id,
+    # start_time, end_time) shows that overlap a stored show, or (key, None)
+    # for those overlapping another show of the same batch
+    if not shows:
+      return {}
+    conflicts = self.batch_conflicts(shows)
+    if self.db.engine.dialect.name == 'postgresql':
+      conflicts.update(self.stored_conflicts_range(shows))
+    else:
+      conflicts.update(self.stored_conflicts_latest(shows))
+    return conflicts
+
+
+  def batch_conflicts(self, shows):
+    # Overlaps among the new shows themselves, found by sorting each calendar
+    conflicts = {}
+    for position_key, key in enumerate(self.keys):
+      latest = {}
+      for position in sorted(range(len(shows)), key=lambda i: (shows[i][position_key], shows[i][2])):
+        owner, start, end = shows[position][position_key], shows[position][2], shows[position][3]
+        if owner in latest and latest[owner][0] > start:
+          conflicts.setdefault(position, (key, None))
+        if owner not in latest or end > latest[owner][0]:
+          latest[owner] = (end, position)
+    return conflicts
+
+
+  def stored_conflicts_range(self, shows):
+    # One statement of indexed && lookups, at most one hit per show and calendar
+    show = self.show
+    window = self.db.func.tsrange(show.start_time, show.end_time)
+    lookups = []
+    for position, new in enumerate(shows):
+      for position_key, key in enumerate(self.keys):
+        lookups.append(
+          self.db.select(
+            self.db.literal(position), self.db.literal(key), show.id
+          ).where(
+            getattr(show, key) == new[position_key],
+            window.op('&&')(self.db.func.tsrange(new[2], new[3]))
+          ).limit(1).subquery().select()
+        )
+
+    conflicts = {}
+    for position, key, id in self.db.session.execute(self.db.union_all(*lookups)):
+      conflicts.setdefault(position, (key, id))
+    return conflicts
+
+
+  def latest_before(self, key, owner_id, end):
+    # The owner's last show starting before end, from the (key, start_time) index
+    show = self.show
+    return self.db.select(show.id, show.end_time).where(
+      getattr(show, key) == owner_id, show.start_time < end
+    ).order_by(show.start_time.desc()).limit(1)
+
+
+  def stored_conflicts_latest(self, shows):
+    # One probe per show and calendar, in as few statements as SQLite allows
+    lookups = []
+    for position, new in enumerate(shows):
+      for position_key, key in enumerate(self.keys):
+        latest = self.latest_before(key, new[position_key], new[3]).subquery()
+        lookups.append(
+          self.db.select(
+            self.db.literal(position), self.db.literal(key), latest.c.id
+          ).where(latest.c.end_time > new[2])
+        )
+
+    conflicts = {}
+    for first in range(0, len(lookups), self.LOOKUPS_PER_STATEMENT):
+      statement = self.db.union_all(*lookups[first:first + self.LOOKUPS_PER_STATEMENT])
+      for position, key, id in self.db.session.execute(statement):
+        conflicts.setdefault(position, (key, id))
+    return conflicts
+
+
+  def free(self, model, key, candidates, start, end):
+    # Rows of the candidates query (venues or artists with an id column) that
+    # have no show overlapping [start, end). On PostgreSQL this is an anti-join
+    # probing the exclusion constraint's GiST index once per candidate,
+    # elsewhere a correlated probe for each candidate's last show before end.
+    show = self.show
+    if self.db.engine.dialect.name == 'postgresql':
+      busy = self.db.exists().where(
+        getattr(show, key) == model.id,
+        self.db.func.tsrange(show.start_time, show.end_time).op('&&')(self.db.func.tsrange(start, end))
+      )
+      return candidates.filter(~busy).all()
+
+    latest_end = self.latest_before(key, model.id, end).with_only_columns(show.end_time).scalar_subquery()
+    return candidates.filter(self.db.func.coalesce(latest_end, start) <= start).all()
@@ -0,0 +1,223 @@
+#----------------------------------------------------------------------------#
+# Fuzzy search for venues and artists.
+#
+# On PostgreSQL, matches come from pg_trgm GIN indexes over a lower-cased
+# "search document" (name, city and state) and over genre names, and are
+# ranked with word_similarity(). Other databases (SQLite in tests) use an
+# in-process trigram index built from the same columns, following the same rules.
+#----------------------------------------------------------------------------#
+
+import re
+from collections import defaultdict
+
+from sqlalchemy import event
+
+
+# pg_trgm's default pg_trgm.word_similarity_threshold, used by the <% operator
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# Name matches rank above matches on city, state or genre
+DOCUMENT_WEIGHT = 0.8
+
+WORD = re.compile(r'[^\W_]+')
+LIKE_SPECIAL = re.compile(r'([\\%_])')
+
+
+def trigrams(text, padded=True):
+  # Same extraction as pg_trgm: lower-case alphanumeric words, each padded with
+  # two spaces in front and one behind before being cut into trigrams.
+  grams = set()
+  for word in WORD.findall(text.lower()):
+    if padded:
+      word = '  ' + word + ' '
+    grams.update(word[i:i + 3] for i in range(len(word) - 2))
+  return grams
+
+
+def word_similarity(term_grams, document_grams):
+  # Share of the term's trigrams found in the document; 1.0 when every word of
+  # the term appears in it, which is what pg_trgm's word_similarity() rewards.
+  if not term_grams:
+    return 0.0
+  return len(term_grams & document_grams) / len(term_grams)
+
+
+def contains_pattern(term):
+  # ILIKE pattern matching term anywhere, with its own %, _ and \ taken
+  # literally (escaped with \)
+  return '%{}%'.format(LIKE_SPECIAL.sub(r'\\\1', term))
+
+
+
+
+class NgramIndex:
+  # Inverted trigram index over (id, name, document) rows kept in memory
+
+  def __init__(self, rows):
+    self.names = {}
+    self.documents = {}
+    self.name_grams = {}
+    self.document_grams = {}
+    self.postings = defaultdict(set)
+    self.substring_postings = defaultdict(set)
+
+    for id, name, document in rows:
+      self.names[id] = name or ''
+      self.documents[id] = document
+      self.name_grams[id] = trigrams(name or '')
+      self.document_grams[id] = trigrams(document)
+      for gram in self.document_grams[id]:
+        self.postings[gram].add(id)
+      for gram in trigrams(document, padded=False):
+        self.substring_postings[gram].add(id)
+
+
+  def substring_matches(self, term):
+    # Documents containing the term verbatim, like ILIKE '%term%'. Terms of three
+    # characters or more are narrowed down through the unpadded trigram postings.
+    grams = [gram for word in WORD.findall(term) for gram in trigrams(word, padded=False)]
+    if grams:
+      candidates = set.intersection(*(self.substring_postings.get(gram, set()) for gram in grams))
+    else:
+      candidates = self.documents.keys()
+    return {id for id in candidates if term in self.documents[id]}
+
+
+  def fuzzy_matches(self, term_grams):
+    # Documents sharing enough trigrams with the term, like term <% document
+    hits = defaultdict(int)
+    for gram in term_grams:
+      for id in self.postings.get(gram, ()):
+        hits[id] += 1
+    needed = WORD_SIMILARITY_THRESHOLD * len(term_grams)
+    return {id for id, count in hits.items() if count >= needed}
+
+
+  def search(self, term):
+    # [(id, rank)] of every match, best first, ties broken by name then id
+    term = term.lower()
+    term_grams = trigrams(term)
+    matches = self.substring_matches(term) | self.fuzzy_matches(term_grams)
+
+    ranked = [
+      (id, max(
+        word_similarity(term_grams, self.name_grams[id]),
+        DOCUMENT_WEIGHT * word_similarity(term_grams, self.document_grams[id])
+      ))
+      for id in matches
+    ]
+    ranked.sort(key=lambda item: (-item[1], self.names[item[0]], item[0]))
+    return ranked
+
+
+
+
+class SearchEngine:
+  # Search over one model's name plus extra text columns (city, state, ...) and,
+  # optionally, a (relationship, column) pair of tags such as genre names
+
+  def __init__(self, db, model, fields, tags=None):
+    self.db = db
+    self.model = model
+    self.fields = fields
+    self.tags = tags
+    self.index = None
+
+    # Any write to the model makes the in-process index stale; it is rebuilt
+    # lazily by the next search rather than on every write.
+    for name in ('after_insert', 'after_update', 'after_delete'):
+      event.listen(model, name, self.invalidate)
+
+
+  def invalidate(self, *args):
+    self.index = None
+
+
+  def document(self):
+    # lower(coalesce(name, '') || ' ' || coalesce(city, '') || ...), the same
+    # expression the GIN index in the pg_trgm migration is built on
+    columns = [getattr(self.model, field) for field in ('name',) + self.fields]
+    document = self.db.func.coalesce(columns[0], '')
+    for column in columns[1:]:
+      document = document + ' ' + self.db.func.coalesce(column, '')
+    return self.db.func.lower(document)
+
+
+  def search(self, search_term, page=1, per_page=20):
+    # (total number of matches, subquery of id/name/rank for the requested page)
+    if self.db.engine.dialect.name == 'postgresql':
+      matches, page_rows = self.search_trigram(search_term, page, per_page)
+      return matches.count(), page_rows
+    if self.index is None:
+      # From the primary: the index outlives the request, and a lagging
+      # replica would leave it stale until the next write
+      with self.db.engine.connect() as connection:
+        self.load_index(connection)
+    return self.search_ngram_index(search_term, page, per_page)
+
+
+  def search_trigram(self, search_term, page, per_page):
+    # (query of every match, subquery of id/name/rank for the requested page)
+    model = self.model
+    document = self.document()
+    term = self.db.literal(search_term)
+    pattern = contains_pattern(search_term)
+
+    # Every predicate is answered by a gin_trgm_ops index, on the document or
+    # on the tag column
+    predicates = [
+      document.ilike(pattern, escape='\\'),
+      term.op('<%')(document)
+    ]
+    if self.tags:
+      relationship, column = self.tags
+      tag = self.db.func.lower(column)
+      predicates.append(relationship.any(self.db.or_(
+        tag.ilike(pattern, escape='\\'),
+        term.op('<%')(tag)
+      )))
+    matches = model.query.filter(self.db.or_(*predicates))
+
+    rank = self.db.func.greatest(
+      self.db.func.word_similarity(term, self.db.func.lower(model.name)),
+      DOCUMENT_WEIGHT * self.db.func.word_similarity(term, document)
+    )
+
+    page_rows = matches.with_entities(
+      model.id, model.name, rank.label('rank')
+    ).order_by(
+      rank.desc(), model.name, model.id
+    ).limit(per_page).offset((page - 1) * per_page).subquery()
+
+    return matches, page_rows
+
+
+  def load_index(self, connection):
+    # Builds the in-process index from a session or connection
+    model = self.model
+    tags = defaultdict(list)
+    if self.tags:
+      relationship, column = self.tags
+      for id, tag in connection.execute(self.db.select(model.id, column).join(relationship)):
+        tags[id].append(tag)
+
+    self.index = NgramIndex(
+      (id, name, ' '.join(value or '' for value in (name,) + tuple(values) + tuple(tags[id])).lower())
+      for id, name, *values in connection.execute(self.db.select(
+        model.id, model.name, *(getattr(model, field) for field in self.fields)
+      ))
+    )
+
+
+  def search_ngram_index(self, search_term, page, per_page):
+    # Needs the index loaded (load_index)
+    model = self.model
+    ranked = self.index.search(search_term)
+    ranks = dict(ranked[(page - 1) * per_page:page * per_page])
+    rank = self.db.case(ranks, value=model.id, else_=0.0) if ranks else self.db.literal(0.0)
+
+    page_rows = self.db.select(
+      model.id, model.name, rank.label('rank')
+    ).where(model.id.in_(ranks)).subquery()
+
+    return len(ranked), page_rows
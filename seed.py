@@ -0,0 +1,200 @@
+#----------------------------------------------------------------------------#
+# Synthetic dataset for load tests and benchmarks.
+#
+# The same arguments (and random seed) always generate the same rows. Venues
+# and artists are spread over cities and genres by weight, and a few of them
+# get most of the bookings (a Zipf-like skew). Shows are on evenings, mostly
+# Thursday to Saturday, between two years ago and a year from now. A venue or
+# artist plays at most one show per night, so none of their shows overlap.
+#----------------------------------------------------------------------------#
+
+import datetime
+import itertools
+import random
+import time
+from collections import Counter
+
+from models import (
+  db, Show, Genre, Venue, Artist, DataVersion, venue_genre, artist_genre,
+  venue_search, artist_search, adjust_show_counts
+)
+from importer import chunked, insert_rows
+
+
+# (city, state, weight), roughly following the size of each live music scene
+CITIES = [
+  ('New York', 'NY', 20), ('Los Angeles', 'CA', 15), ('Chicago', 'IL', 9),
+  ('San Francisco', 'CA', 8), ('Austin', 'TX', 6), ('Nashville', 'TN', 6),
+  ('Seattle', 'WA', 5), ('New Orleans', 'LA', 5), ('Atlanta', 'GA', 4),
+  ('Boston', 'MA', 4), ('Denver', 'CO', 4), ('Philadelphia', 'PA', 3),
+  ('Portland', 'OR', 3), ('Miami', 'FL', 3), ('Detroit', 'MI', 2),
+  ('Minneapolis', 'MN', 2),
+]
+CITY_WEIGHTS = list(itertools.accumulate(weight for city, state, weight in CITIES))
+# The genres of the venue and artist forms, weighted by popularity
+GENRES = [
+  ('Rock n Roll', 14), ('Pop', 12), ('Hip-Hop', 11), ('Jazz', 8), ('Electronic', 8),
+  ('Country', 7), ('R&B', 7), ('Alternative', 7), ('Blues', 5), ('Folk', 5),
+  ('Punk', 4), ('Soul', 4), ('Heavy Metal', 4), ('Funk', 3), ('Reggae', 3),
+  ('Classical', 3), ('Instrumental', 2), ('Musical Theatre', 2), ('Other', 1),
+]
+ADJECTIVES = [
+  'Blue', 'Wild', 'Velvet', 'Electric', 'Golden', 'Midnight', 'Red', 'Silver',
+  'Lucky', 'Crooked', 'Hidden', 'Lonesome', 'Broken', 'Northern', 'Musical', 'Iron',
+]
+VENUE_NOUNS = [
+  'Hall', 'Room', 'Lounge', 'Cellar', 'Garden', 'Theatre', 'Club', 'Tavern',
+  'Ballroom', 'Music Hall', 'Station', 'Factory', 'Attic', 'Basement', 'Coffee House',
+]
+ARTIST_NOUNS = [
+  'Foxes', 'Saints', 'Rivers', 'Ghosts', 'Horses', 'Sparrows', 'Kings', 'Band',
+  'Orchestra', 'Collective', 'Trio', 'Quartet', 'Brothers', 'Sisters', 'Echoes',
+]
+STREETS = ['Market', 'Main', 'Mission', 'Broadway', 'Elm', 'Oak', 'Pine', 'Union', 'Valencia']
+
+# Relative number of shows on Monday..Sunday, and starting at 18:00..22:00
+WEEKDAY_WEIGHTS = (1, 1, 2, 3, 5, 6, 3)
+HOUR_WEIGHTS = {18: 1, 19: 3, 20: 4, 21: 3, 22: 1}
+# Popularity of the n-th busiest venue or artist is proportional to 1 / n**SKEW
+SKEW = 0.6
+
+
+def cumulative(weights):
+  return list(itertools.accumulate(weights))
+
+
+def pick(rng, items, cum_weights, k=1):
+  return rng.choices(items, cum_weights=cum_weights, k=k)
+
+
+def phone(rng):
+  return '{}-{}-{:04d}'.format(rng.randint(201, 989), rng.randint(200, 999), rng.randint(0, 9999))
+
+
+def venue_row(rng):
+  (city, state, weight), = pick(rng, CITIES, CITY_WEIGHTS)
+  seeking = rng.random() < 0.3
+  return {
+    'name': 'The {} {}'.format(rng.choice(ADJECTIVES), rng.choice(VENUE_NOUNS)),
+    'city': city,
+    'state': state,
+    'address': '{} {} St'.format(rng.randint(1, 2999), rng.choice(STREETS)),
+    'phone': phone(rng),
+    'seeking_talent': seeking,
+    'seeking_description': 'Looking for local acts for our weekend nights.' if seeking else None,
+  }
+
+
+def artist_row(rng):
+  (city, state, weight), = pick(rng, CITIES, CITY_WEIGHTS)
+  seeking = rng.random() < 0.4
+  return {
+    'name': 'The {} {}'.format(rng.choice(ADJECTIVES), rng.choice(ARTIST_NOUNS)),
+    'city': city,
+    'state': state,
+    'phone': phone(rng),
+    'seeking_venue': seeking,
+    'seeking_description': 'Booking a tour for next season.' if seeking else None,
+  }
+
+
+def insert_owners(rng, model, row, association, key, count, chunk_size):
+  # Inserts count venues or artists with one to three genres each; returns their ids
+  genres = Genre.lookup([name for name, weight in GENRES])
+  db.session.add_all(genres)
+  db.session.flush()
+  genre_ids = [genre.id for genre in genres]
+  genre_weights = cumulative(weight for name, weight in GENRES)
+
+  ids = []
+  for chunk in chunked(range(count), chunk_size):
+    chunk_ids = insert_rows(model.__table__, [row(rng) for _ in chunk])
+    db.session.execute(association.insert(), [
+      {key: id, 'genre_id': genre_id}
+      for id in chunk_ids
+      for genre_id in set(pick(rng, genre_ids, genre_weights, k=rng.choice((1, 1, 2, 2, 3))))
+    ])
+    ids.extend(chunk_ids)
+  return ids
+
+
+def show_rows(rng, count, venue_ids, artist_ids, now):
+  # Shows as insert parameters; stops early if the calendars are too full to
+  # place the rest (over a thousand shows per venue or artist)
+  first_day = now.date() - datetime.timedelta(days=730)
+  days = [first_day + datetime.timedelta(days=offset) for offset in range(1096)]
+  day_weights = cumulative(WEEKDAY_WEIGHTS[day.weekday()] for day in days)
+  hours = list(HOUR_WEIGHTS)
+  hour_weights = cumulative(HOUR_WEIGHTS.values())
+
+  venue_ids, artist_ids = list(venue_ids), list(artist_ids)
+  rng.shuffle(venue_ids)
+  rng.shuffle(artist_ids)
+  venue_weights = cumulative(1 / rank ** SKEW for rank in range(1, len(venue_ids) + 1))
+  artist_weights = cumulative(1 / rank ** SKEW for rank in range(1, len(artist_ids) + 1))
+
+  booked = set()
+  for attempt in range(count * 20):
+    if count == 0:
+      return
+    venue_id, = pick(rng, venue_ids, venue_weights)
+    artist_id, = pick(rng, artist_ids, artist_weights)
+    day, = pick(rng, days, day_weights)
+    if ('venue', venue_id, day) in booked or ('artist', artist_id, day) in booked:
+      continue
+    booked.update((('venue', venue_id, day), ('artist', artist_id, day)))
+
+    hour, = pick(rng, hours, hour_weights)
+    start_time = datetime.datetime.combine(day, datetime.time(hour, rng.choice((0, 30))))
+    count -= 1
+    yield {
+      'venue_id': venue_id,
+      'artist_id': artist_id,
+      'start_time': start_time,
+      'end_time': start_time + datetime.timedelta(hours=rng.choice((2, 3, 4))),
+      'counted_past': start_time < now,
+    }
+
+
+def clear():
+  # Deletes every show, venue, artist and genre
+  for table in (Show.__table__, venue_genre, artist_genre, Venue.__table__, Artist.__table__, Genre.__table__):
+    db.session.execute(table.delete())
+  DataVersion.bump(*DataVersion.NAMES)
+
+
+def populate(shows, venues=None, artists=None, seed=0, now=None, chunk_size=10000):
+  # Adds the dataset to the session's transaction (the caller commits) and
+  # returns the number of rows of each kind. By default there is one venue per
+  # 20 shows and one artist per 10.
+  rng = random.Random(seed)
+  now = now or datetime.datetime.utcnow()
+  started = time.perf_counter()
+
+  venue_ids = insert_owners(rng, Venue, venue_row, venue_genre, 'venue_id', venues or max(shows // 20, 1), chunk_size)
+  artist_ids = insert_owners(rng, Artist, artist_row, artist_genre, 'artist_id', artists or max(shows // 10, 1), chunk_size)
+
+  inserted = 0
+  counts = Counter()
+  for chunk in chunked(show_rows(rng, shows, venue_ids, artist_ids, now), chunk_size):
+    db.session.execute(Show.__table__.insert(), chunk)
+    inserted += len(chunk)
+    for show in chunk:
+      counts['venue_id', show['venue_id'], show['counted_past']] += 1
+      counts['artist_id', show['artist_id'], show['counted_past']] += 1
+
+  # Core inserts skip the ORM events behind the show counters and caches, so
+  # the counters are set in one UPDATE per table
+  connection = db.session.connection()
+  for owner, key, ids in ((Venue, 'venue_id', venue_ids), (Artist, 'artist_id', artist_ids)):
+    adjust_show_counts(connection, owner, {id: (counts[key, id, False], counts[key, id, True]) for id in ids})
+  DataVersion.bump(*DataVersion.NAMES)
+  venue_search.invalidate()
+  artist_search.invalidate()
+
+  return {
+    'venues': len(venue_ids),
+    'artists': len(artist_ids),
+    'shows': inserted,
+    'seconds': time.perf_counter() - started,
+  }
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Server-side sessions.
+#
+# With SESSION_BACKEND set, the session cookie only carries a signed random
+# id and the session itself (flash messages, the Flask-WTF CSRF token) is
+# kept in a store: 'memory' (one process), 'filesystem' (every worker of a
+# host) or 'redis' (every host; 'fakeredis://' locally). The store is only
+# read for requests that send a session cookie and only written when the
+# session changed. Without SESSION_BACKEND, Flask's signed cookie sessions
+# are used.
+#----------------------------------------------------------------------------#
+
+import os
+import secrets
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from itsdangerous import BadSignature, Signer
+
+from cache import LRUCache, FileCache, RedisCache, redis_client
+
+
+class ServerSideSession(SecureCookieSession):
+
+  def __init__(self, initial=None, sid=None):
+    super().__init__(initial)
+    self.new = sid is None
+    self.sid = sid or secrets.token_urlsafe(32)
+
+
+
+
+class ServerSideSessionInterface(SessionInterface):
+  # Session data is stored with the tagged JSON of Flask's cookie sessions
+  serializer = session_json_serializer
+
+  def __init__(self, store):
+    self.store = store
+
+
+  def signer(self, app):
+    return Signer(app.secret_key, salt='session-id')
+
+
+  def open_session(self, app, request):
+    if not app.secret_key:
+      return None
+    cookie = request.cookies.get(self.get_cookie_name(app))
+    if not cookie:
+      return ServerSideSession()
+
+    try:
+      sid = self.signer(app).unsign(cookie).decode()
+    except BadSignature:
+      return ServerSideSession()
+
+    data = self.store.get(sid)
+    if data is None:
+      return ServerSideSession()
+    return ServerSideSession(self.serializer.loads(data), sid=sid)
+
+
+  def save_session(self, app, session, response):
+    name = self.get_cookie_name(app)
+    domain = self.get_cookie_domain(app)
+    path = self.get_cookie_path(app)
+
+    # Emptied (e.g. its flash messages were shown): drop it and its cookie
+    if not session:
+      if session.modified and not session.new:
+        self.store.delete(session.sid)
+        response.delete_cookie(name, domain=domain, path=path)
+      return
+
+    if session.accessed:
+      response.vary.add('Cookie')
+    if session.modified:
+      self.store.set(session.sid, self.serializer.dumps(dict(session)))
+
+    # An existing cookie only needs resending to push back its expiry
+    if session.new or (session.permanent and self.should_set_cookie(app, session)):
+      response.set_cookie(
+        name,
+        self.signer(app).sign(session.sid.encode()).decode(),
+        expires=self.get_expiration_time(app, session),
+        httponly=self.get_cookie_httponly(app),
+        domain=domain,
+        path=path,
+        secure=self.get_cookie_secure(app),
+        samesite=self.get_cookie_samesite(app),
+      )
+
+
+
+
+def create_store(app, ttl):
+  config = app.config
+  backend = config['SESSION_BACKEND']
+
+  if backend == 'memory':
+    return LRUCache(max_entries=config['SESSION_MAX_ENTRIES'], ttl=ttl)
+  if backend == 'filesystem':
+    return FileCache(config['SESSION_FILE_DIR'] or os.path.join(app.instance_path, 'sessions'), ttl=ttl)
+  if backend == 'redis':
+    return RedisCache(redis_client(config['SESSION_REDIS_URL']), prefix='fyyur:session:', ttl=ttl)
+  raise ValueError('Unknown SESSION_BACKEND {!r}'.format(backend))
+
+
+
+
+class SessionStore:
+
+  def __init__(self, app=None):
+    if app is not None:
+      self.init_app(app)
+
+
+  def init_app(self, app):
+    app.config.setdefault('SESSION_BACKEND', None)
+    app.config.setdefault('SESSION_FILE_DIR', None)
+    app.config.setdefault('SESSION_MAX_ENTRIES', 10000)
+    if app.config['SESSION_BACKEND'] is None:
+      return
+
+    ttl = int(app.permanent_session_lifetime.total_seconds())
+    app.session_interface = ServerSideSessionInterface(create_store(app, ttl))
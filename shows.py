@@ -0,0 +1,147 @@
+#----------------------------------------------------------------------------#
+# Show pages: the paged listing and the create form.
+#
+# Forms are imported by the views that use them, which keeps wtforms out of
+# worker start-up.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+from flask import Blueprint, current_app, render_template, request, flash, url_for, abort
+from sqlalchemy.exc import IntegrityError
+
+from extensions import page_cache
+from models import db, Show, show_schedule, DEFAULT_SHOW_DURATION
+from querystats import query_budget
+from replicas import replica_reads
+from conditional import conditional
+
+
+shows = Blueprint('shows', __name__)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@shows.route('/shows')
+@query_budget(2)
+@replica_reads
+@conditional(Show.listing_version)
+@page_cache.cached('shows', vary_query=True)
+def index():
+  # displays list of shows at /shows, one keyset page at a time,
+  # optionally restricted to a ?from=YYYY-MM-DD&to=YYYY-MM-DD date range
+  filters, after, start, end = listing_args()
+  
+  rows, next_cursor = Show.listing(
+    after=after, start=start, end=end, limit=current_app.config['SHOWS_PER_PAGE']
+  )
+  
+  return render_listing(rows, next_cursor, filters)
+
+
+def listing_args():
+  # (filters, cursor, start, end) from the query string; 400 when malformed
+  filters = {key: request.args[key] for key in ('from', 'to') if request.args.get(key)}
+  
+  try:
+    after = Show.decode_cursor(request.args['after']) if request.args.get('after') else None
+    start = datetime.datetime.strptime(filters['from'], "%Y-%m-%d") if 'from' in filters else None
+    end = datetime.datetime.strptime(filters['to'], "%Y-%m-%d") + datetime.timedelta(days=1) if 'to' in filters else None
+  except ValueError:
+    abort(400)
+  
+  return filters, after, start, end
+
+
+def render_listing(rows, next_cursor, filters):
+  data = [
+    {
+      "venue_id": row.venue_id,
+      "venue_name": row.venue_name,
+      "artist_id": row.artist_id,
+      "artist_name": row.artist_name,
+      "artist_image_link": row.artist_image_link,
+      "start_time": row.start_time
+    } for row in rows
+  ]
+  
+  # /async/shows renders through here too, and pages on to /shows like it
+  next_url = url_for('shows.index', after=next_cursor, **filters) if next_cursor else None
+  
+  return render_template('pages/shows.html', shows=data, filters=filters, next_url=next_url)
+
+
+
+
+@shows.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+
+
+
+@shows.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  from forms import ShowForm
+  form = ShowForm(request.form)
+  
+  try:
+    try:
+      venue_id, artist_id = int(form.venue_id.data), int(form.artist_id.data)
+    except (TypeError, ValueError):
+      raise ValueError("Venue and artist IDs must be numbers.")
+    
+    start_time = form.start_time.data
+    if start_time is None:
+      raise ValueError("Start time must look like YYYY-MM-DD HH:MM:SS.")
+    end_time = form.end_time.data or start_time + DEFAULT_SHOW_DURATION
+    if end_time <= start_time:
+      raise ValueError("The show must end after it starts.")
+    
+    # Both ids are checked with one indexed existence query
+    venue_ids, artist_ids = Show.existing_references([venue_id], [artist_id])
+    if venue_id not in venue_ids:
+      raise ValueError("Venue ID {} does not exist.".format(venue_id))
+    if artist_id not in artist_ids:
+      raise ValueError("Artist ID {} does not exist.".format(artist_id))
+    
+    # Neither the venue nor the artist may already be booked at that time
+    conflict = show_schedule.conflicts([(venue_id, artist_id, start_time, end_time)]).get(0)
+    if conflict:
+      raise ValueError(show_schedule.describe(*conflict))
+    
+    show = Show(
+      artist_id=artist_id,
+      venue_id=venue_id,
+      start_time=start_time,
+      end_time=end_time
+    )
+    
+    db.session.add(show)
+    db.session.commit()
+    page_cache.invalidate(
+      'shows', 'venues', 'venue:{}'.format(venue_id), 'artist:{}'.format(artist_id)
+    )
+    
+    # on successful db insert, flash success
+    flash('Show was successfully listed!')
+  except ValueError as error:
+    db.session.rollback()
+    flash('An error occurred. Show could not be listed. ' + str(error))
+  except IntegrityError:
+    # The venue or artist was deleted, or booked, between the checks and the insert
+    db.session.rollback()
+    flash('An error occurred. Show could not be listed. Its venue or artist no longer exists or was just booked.')
+  finally:
+    db.session.close()
+  
+  return render_template('pages/home.html')
+
+
+
+
@@ -0,0 +1,72 @@
+#----------------------------------------------------------------------------#
+# Test fixtures: the app on an in-memory SQLite database.
+#
+#   FYYUR_ENV=testing python -m pytest tests
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read by config.py when it is imported
+os.environ.setdefault('FYYUR_ENV', 'testing')
+
+
+@pytest.fixture
+def app_config():
+  # Overridden by test modules that need other settings (e.g. a page cache)
+  return {}
+
+
+@pytest.fixture
+def app(app_config):
+  from app import create_app
+  from models import db
+
+  app = create_app({
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'TESTING': True,
+    # Debug keeps the app from writing error.log into the working directory
+    'DEBUG': True,
+    'WTF_CSRF_ENABLED': False,
+    'QUERY_BUDGET_ENFORCE': True,
+    'PAGE_CACHE_BACKEND': None,
+    'TEMPLATE_CACHE_BACKEND': None,
+    **app_config,
+  })
+  with app.app_context():
+    db.create_all()
+    yield app
+    db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+  return app.test_client()
+
+
+@pytest.fixture
+def seeded(app):
+  # A small synthetic dataset (seed.py), the same on every run
+  import datetime
+  import seed
+  from models import db
+
+  stats = seed.populate(300, now=datetime.datetime(2026, 1, 1))
+  db.session.commit()
+  return stats
+
+
+@pytest.fixture
+def venue_and_artist(app):
+  from models import db, Venue, Artist
+
+  venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+  artist = Artist(name='Guns N Petals', city='San Francisco', state='CA')
+  db.session.add_all([venue, artist])
+  db.session.commit()
+  return venue.id, artist.id
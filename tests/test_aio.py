@@ -0,0 +1,46 @@
+#----------------------------------------------------------------------------#
+# The /async pages (aio.py) render exactly like their sync twins.
+#----------------------------------------------------------------------------#
+
+import re
+
+import pytest
+
+from models import db, Venue, Artist
+
+
+@pytest.fixture
+def app_config(tmp_path):
+  # The async engine opens connections of its own: an in-memory database
+  # would be a different, empty one for each
+  return {'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'fyyur.db'), 'SHOWS_PER_PAGE': 5}
+
+
+def page(response):
+  assert response.status_code == 200
+  return re.sub(r'\s+', ' ', response.get_data(as_text=True))
+
+
+def test_async_pages_match_the_sync_pages(client, seeded):
+  venue_id = db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar()
+  artist_id = db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar()
+  paths = [
+    '/venues', '/artists', '/shows', '/shows?from=2025-12-01&to=2026-02-01',
+    '/venues/{}'.format(venue_id), '/artists/{}'.format(artist_id),
+  ]
+  for path in paths:
+    assert page(client.get('/async' + path)) == page(client.get(path)), path
+  for path, term in (('/venues/search', 'music'), ('/artists/search', 'band')):
+    assert page(client.post('/async' + path, data={'search_term': term})) == page(client.post(path, data={'search_term': term})), path
+
+
+def test_async_pages_keep_the_navigation(client, seeded):
+  listing = page(client.get('/async/shows'))
+  assert '<li class="active" ><a href="/shows">Shows</a></li>' in listing
+  # The next page link leads to the sync listing, like the sync page's does
+  assert re.search(r'href="/shows\?after=[^"]+"', listing)
+  assert '/async/' not in listing
+
+  venues = page(client.get('/async/venues'))
+  assert '<li class="active" ><a href="/venues">Venues</a></li>' in venues
+  assert 'action="/venues/search"' in venues
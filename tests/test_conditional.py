@@ -0,0 +1,90 @@
+#----------------------------------------------------------------------------#
+# Conditional GET (conditional.py) in front of the page cache: a 304 only for
+# the current ETag, and a body that always matches the ETag it is sent with.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+import pytest
+
+from models import db, Show
+
+
+@pytest.fixture
+def app_config():
+  return {'PAGE_CACHE_BACKEND': 'lru'}
+
+
+def book(venue_id, artist_id, start_time):
+  # Written straight to the database, as another worker would: this process's
+  # page cache is not told about it
+  show = Show(
+    venue_id=venue_id,
+    artist_id=artist_id,
+    start_time=start_time,
+    end_time=start_time + datetime.timedelta(hours=2)
+  )
+  db.session.add(show)
+  db.session.commit()
+  return show.id
+
+
+def test_a_matching_etag_gets_a_304(client, venue_and_artist):
+  venue_id, _ = venue_and_artist
+  first = client.get('/venues/{}'.format(venue_id))
+  assert first.status_code == 200 and first.get_etag()[0]
+
+  revalidated = client.get('/venues/{}'.format(venue_id), headers={'If-None-Match': first.headers['ETag']})
+  assert revalidated.status_code == 304
+  assert revalidated.get_etag() == first.get_etag()
+  assert revalidated.data == b''
+
+  other = client.get('/venues/{}'.format(venue_id), headers={'If-None-Match': '"stale"'})
+  assert other.status_code == 200 and other.data == first.data
+
+
+def test_a_write_elsewhere_changes_etag_and_body_together(client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  path = '/venues/{}'.format(venue_id)
+  before = client.get(path)
+  assert b'0 Upcoming Shows' in before.data
+
+  book(venue_id, artist_id, datetime.datetime.utcnow() + datetime.timedelta(days=7))
+
+  after = client.get(path)
+  assert after.get_etag() != before.get_etag()
+  assert b'1 Upcoming Show<' in after.data
+  assert client.get(path, headers={'If-None-Match': before.headers['ETag']}).status_code == 200
+  assert client.get(path, headers={'If-None-Match': after.headers['ETag']}).status_code == 304
+
+
+def test_a_show_that_starts_moves_to_past_shows(client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  path = '/venues/{}'.format(venue_id)
+  show_id = book(venue_id, artist_id, datetime.datetime.utcnow() + datetime.timedelta(days=7))
+  upcoming = client.get(path)
+  assert b'1 Upcoming Show<' in upcoming.data
+
+  # Time passing is not a write: nothing bumps a version or invalidates the cache
+  db.session.execute(
+    db.text('UPDATE show SET start_time = :start WHERE id = :id'),
+    {'start': datetime.datetime.utcnow() - datetime.timedelta(hours=1), 'id': show_id}
+  )
+  db.session.commit()
+
+  started = client.get(path)
+  assert started.get_etag() != upcoming.get_etag()
+  assert b'0 Upcoming Shows' in started.data and b'1 Past Show<' in started.data
+  assert client.get(path, headers={'If-None-Match': upcoming.headers['ETag']}).status_code == 200
+
+
+def test_listing_etag_and_body_agree_after_a_write(client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  before = client.get('/shows')
+  book(venue_id, artist_id, datetime.datetime.utcnow() + datetime.timedelta(days=7))
+
+  after = client.get('/shows')
+  assert after.get_etag() != before.get_etag()
+  assert b'The Musical Hop' in after.data and b'The Musical Hop' not in before.data
+  # The same ETag always comes with the same body
+  assert client.get('/shows').data == after.data
@@ -0,0 +1,127 @@
+#----------------------------------------------------------------------------#
+# The venue and artist show counters (models.py) agree with counting the
+# shows, after every kind of write and after `flask roll-shows`.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+import pytest
+
+from models import db, Show, Venue, Artist
+
+
+def counted(owner, key):
+  # {id: (upcoming, past)} counted from the shows table
+  now = datetime.datetime.utcnow()
+  counts = {id: [0, 0] for (id,) in db.session.query(owner.id)}
+  for id, start_time in db.session.query(key, Show.start_time):
+    counts[id][start_time < now] += 1
+  return {id: tuple(count) for id, count in counts.items()}
+
+
+def assert_counters_match():
+  db.session.expire_all()
+  for owner, key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+    counters = {
+      id: (upcoming, past) for id, upcoming, past in
+      db.session.query(owner.id, owner.upcoming_shows_count, owner.past_shows_count)
+    }
+    assert counters == counted(owner, key), owner.__name__
+
+
+def days(count):
+  return datetime.datetime.utcnow() + datetime.timedelta(days=count)
+
+
+@pytest.fixture
+def calendar(venue_and_artist):
+  # Two venues and two artists with an upcoming and a past show each
+  venue_id, artist_id = venue_and_artist
+  venue, artist = Venue(name='Park Square Live Music & Coffee'), Artist(name='The Wild Sax Band')
+  db.session.add_all([venue, artist])
+  db.session.flush()
+  shows = [
+    Show(venue_id=venue_id, artist_id=artist_id, start_time=days(7)),
+    Show(venue_id=venue_id, artist_id=artist.id, start_time=days(-7)),
+    Show(venue_id=venue.id, artist_id=artist_id, start_time=days(-14)),
+    Show(venue_id=venue.id, artist_id=artist.id, start_time=days(14)),
+  ]
+  db.session.add_all(shows)
+  db.session.commit()
+  return (venue_id, venue.id), (artist_id, artist.id), [show.id for show in shows]
+
+
+def test_inserted_shows_are_counted(calendar):
+  (venue_id, _), (artist_id, _), _ = calendar
+  assert_counters_match()
+  venue = Venue.query.get(venue_id)
+  assert (venue.upcoming_shows_count, venue.past_shows_count) == (1, 1)
+
+
+@pytest.mark.parametrize('change', ['venue', 'artist', 'both', 'to past', 'to upcoming'])
+def test_moved_shows_are_recounted(calendar, change):
+  (venue_id, other_venue_id), (artist_id, other_artist_id), show_ids = calendar
+  show = Show.query.get(show_ids[0])
+  if change in ('venue', 'both'):
+    show.venue_id = other_venue_id
+  if change in ('artist', 'both'):
+    show.artist_id = other_artist_id
+  if change == 'to past':
+    show.start_time, show.end_time = days(-30), days(-30) + datetime.timedelta(hours=2)
+  if change == 'to upcoming':
+    show = Show.query.get(show_ids[1])
+    show.start_time, show.end_time = days(30), days(30) + datetime.timedelta(hours=2)
+  db.session.commit()
+
+  assert_counters_match()
+
+
+def test_deleted_shows_are_uncounted(calendar):
+  _, _, show_ids = calendar
+  db.session.delete(Show.query.get(show_ids[0]))
+  db.session.delete(Show.query.get(show_ids[1]))
+  db.session.commit()
+
+  assert_counters_match()
+
+
+@pytest.mark.parametrize('owner', [Venue, Artist])
+def test_shows_deleted_with_their_venue_or_artist_are_uncounted(calendar, owner):
+  venue_ids, artist_ids, _ = calendar
+  db.session.delete(owner.query.get((venue_ids if owner is Venue else artist_ids)[0]))
+  db.session.commit()
+
+  assert Show.query.count() == 2
+  assert_counters_match()
+
+
+def test_roll_shows_moves_started_shows_to_past(app, calendar):
+  _, _, show_ids = calendar
+  # The upcoming shows start; nothing writes to them until roll-shows runs
+  db.session.execute(
+    db.text('UPDATE show SET start_time = :start WHERE id IN (:first, :last)'),
+    {'start': days(-1), 'first': show_ids[0], 'last': show_ids[3]}
+  )
+  db.session.commit()
+  with pytest.raises(AssertionError):
+    assert_counters_match()
+
+  result = app.test_cli_runner().invoke(args=['roll-shows'])
+  assert result.exit_code == 0 and '2 shows rolled to past' in result.output
+  assert_counters_match()
+
+
+def test_roll_shows_recount_repairs_drifted_counters(app, calendar):
+  db.session.execute(db.text('UPDATE venue SET upcoming_shows_count = 5, past_shows_count = -1'))
+  db.session.execute(db.text('UPDATE artist SET upcoming_shows_count = 0'))
+  db.session.commit()
+
+  result = app.test_cli_runner().invoke(args=['roll-shows', '--recount'])
+  assert result.exit_code == 0, result.output
+  assert_counters_match()
+
+
+def test_seeded_and_rolled_counters_match(app, seeded):
+  # seed.py inserts through Core and sets the counters itself
+  assert app.test_cli_runner().invoke(args=['roll-shows']).exit_code == 0
+  assert_counters_match()
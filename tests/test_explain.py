@@ -0,0 +1,51 @@
+#----------------------------------------------------------------------------#
+# The read routes' queries are answered from indexes (`flask explain-routes`).
+#----------------------------------------------------------------------------#
+
+import pytest
+
+import explain
+from models import db, Venue, Artist, Genre
+
+
+def test_read_routes_use_indexes(app, seeded):
+  report = explain.explain_routes(app, db, explain.sample_routes(db, Venue, Artist, Genre))
+
+  assert report
+  assert {route: offenders for route, offenders in report.items() if offenders} == {}
+
+
+@pytest.mark.parametrize('app_config', [{'PAGE_CACHE_BACKEND': 'lru'}])
+def test_cached_pages_are_rendered_for_the_check(app, client, seeded, monkeypatch):
+  routes = explain.sample_routes(db, Venue, Artist, Genre)
+  for method, path, data in routes:
+    client.open(path, method=method, data=data)
+
+  captured = {}
+  capture_statements = explain.capture_statements
+  def capture(app, engine, method, path, data):
+    status, captured[path] = capture_statements(app, engine, method, path, data)
+    return status, captured[path]
+  monkeypatch.setattr(explain, 'capture_statements', capture)
+  explain.explain_routes(app, db, routes)
+
+  # More than the version query behind the ETag: the page's own queries ran
+  profiles = [path for _, path, _ in routes if path.rsplit('/', 1)[-1].isdigit()]
+  assert len(profiles) == 2
+  for path in ['/venues', '/artists', '/shows'] + profiles:
+    assert len(captured[path]) >= 2, path
+  assert app.extensions['page_cache'].backend is not None
+
+
+def test_full_scans_are_reported(app):
+  tables = set(db.metadata.tables)
+  with db.engine.connect() as connection:
+    assert explain.sqlite_full_scans(connection, 'SELECT id FROM venue WHERE phone = ?', ('555',), tables) == ['venue']
+    assert explain.sqlite_full_scans(connection, 'SELECT id FROM venue WHERE id = ?', (1,), tables) == []
+
+
+def test_explain_routes_command(app, seeded):
+  result = app.test_cli_runner().invoke(args=['explain-routes'])
+
+  assert result.exit_code == 0, result.output
+  assert 'FULL SCAN' not in result.output
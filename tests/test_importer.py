@@ -0,0 +1,39 @@
+#----------------------------------------------------------------------------#
+# Show validation shared by `flask import` and POST /api/v1/shows.
+#----------------------------------------------------------------------------#
+
+import pytest
+
+import importer
+from models import Show
+
+
+def test_unparseable_start_time_names_the_format(venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  rejected, pages = importer.load_shows([(2, {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': 'bad'})])
+
+  [(line, record, errors)] = rejected
+  assert errors == {'start_time': ['Not a valid date and time; it must look like YYYY-MM-DD HH:MM:SS.']}
+
+
+@pytest.mark.parametrize('record', [{}, {'start_time': ''}])
+def test_missing_start_time_is_required(venue_and_artist, record):
+  venue_id, artist_id = venue_and_artist
+  rejected, pages = importer.load_shows([(2, dict(record, venue_id=venue_id, artist_id=artist_id))])
+
+  [(line, record, errors)] = rejected
+  assert errors == {'start_time': ['This field is required.']}
+
+
+def test_api_rejects_the_batch_with_the_format(client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  response = client.post('/api/v1/shows', json=[
+    {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '2030-01-01 20:00:00'},
+    {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '01/02/2030 8pm'},
+  ])
+
+  assert response.status_code == 400
+  assert response.get_json()['error']['rows'] == [
+    {'index': 1, 'errors': {'start_time': ['Not a valid date and time; it must look like YYYY-MM-DD HH:MM:SS.']}}
+  ]
+  assert Show.query.count() == 0
@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# Page cache invalidation (cache.py): the pages a write changes are dropped,
+# and a cache private to each worker is refused when there are several.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+import pytest
+
+from artists import artist_page_keys
+from extensions import page_cache
+from models import db, Show
+
+
+@pytest.fixture
+def app_config():
+  return {'PAGE_CACHE_BACKEND': 'lru'}
+
+
+def test_invalidate_drops_every_page_of_a_key(app, client, seeded):
+  client.get('/venues')
+  client.get('/shows?page=1')
+  client.get('/shows?page=2')
+  assert page_cache.backend.get('venues') is not None
+  assert len([key for key in page_cache.backend.entries if key.startswith('shows:')]) == 2
+
+  page_cache.invalidate('venues', 'shows')
+  assert page_cache.backend.get('venues') is None
+  # Paged views are stored under a generation number the invalidation bumped
+  with app.test_request_context('/shows?page=1'):
+    assert page_cache.backend.get(page_cache.entry_key('shows', True)) is None
+
+
+def test_artist_pages_include_the_venue_directory_and_their_venues(venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  db.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=datetime.datetime(2030, 1, 1, 20)))
+  db.session.commit()
+
+  keys = artist_page_keys(artist_id)
+  assert {'artists', 'shows', 'venues', 'artist:{}'.format(artist_id), 'venue:{}'.format(venue_id)} == set(keys)
+
+
+def test_deleting_an_artist_drops_the_pages_showing_them(client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  db.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=datetime.datetime(2030, 1, 1, 20)))
+  db.session.commit()
+  for path in ('/venues', '/artists', '/shows', '/venues/{}'.format(venue_id)):
+    assert client.get(path).status_code == 200
+
+  assert client.delete('/artists/delete/{}'.format(artist_id)).status_code == 302
+  assert page_cache.backend.get('venues') is None
+  assert page_cache.backend.get('artists') is None
+  assert page_cache.backend.get('venue:{}'.format(venue_id)) is None
+  assert b'Guns N Petals' not in client.get('/venues/{}'.format(venue_id)).data
+
+
+def test_roll_shows_drops_the_listings(app, client, venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  show = Show(venue_id=venue_id, artist_id=artist_id, start_time=datetime.datetime.utcnow() + datetime.timedelta(days=1))
+  db.session.add(show)
+  db.session.commit()
+  # The show starts: nothing is written until roll-shows runs
+  db.session.execute(
+    db.text('UPDATE show SET start_time = :start WHERE id = :id'),
+    {'start': datetime.datetime.utcnow() - datetime.timedelta(hours=1), 'id': show.id}
+  )
+  db.session.commit()
+  client.get('/venues')
+  client.get('/artists')
+
+  result = app.test_cli_runner().invoke(args=['roll-shows'])
+  assert result.exit_code == 0 and '1 shows rolled' in result.output
+  assert page_cache.backend.get('venues') is None
+  assert page_cache.backend.get('artists') is None
+
+
+@pytest.mark.parametrize('backend', [
+  {'PAGE_CACHE_BACKEND': 'lru'},
+  {'PAGE_CACHE_BACKEND': 'redis', 'PAGE_CACHE_REDIS_URL': 'fakeredis://'},
+])
+def test_an_in_process_cache_is_refused_with_several_workers(backend):
+  from app import create_app
+
+  with pytest.raises(RuntimeError, match='private to each of the 4 worker processes'):
+    create_app(dict(backend, SQLALCHEMY_DATABASE_URI='sqlite://', WORKER_PROCESSES=4))
+  # One worker, or no page cache, is fine
+  create_app(dict(backend, SQLALCHEMY_DATABASE_URI='sqlite://', WORKER_PROCESSES=1))
+  create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'PAGE_CACHE_BACKEND': None, 'WORKER_PROCESSES': 4})
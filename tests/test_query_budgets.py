@@ -0,0 +1,65 @@
+#----------------------------------------------------------------------------#
+# Every read route stays within its @query_budget (QUERY_BUDGET_ENFORCE is on
+# in the app fixture, so an overrun fails the request).
+#----------------------------------------------------------------------------#
+
+import copy
+
+import pytest
+
+import explain
+from models import db, Venue, Artist, Genre
+
+
+API_ROUTES = [
+  '/',
+  '/api/v1/venues?limit=10',
+  '/api/v1/venues/{venue_id}',
+  '/api/v1/venues/available?start=2026-02-01 20:00&end=2026-02-01 23:00',
+  '/api/v1/artists?limit=10',
+  '/api/v1/artists/{artist_id}',
+  '/api/v1/shows?limit=10',
+]
+
+
+def read_routes():
+  venue_id = db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar()
+  artist_id = db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar()
+  return explain.sample_routes(db, Venue, Artist, Genre) + [
+    ('GET', path.format(venue_id=venue_id, artist_id=artist_id), None) for path in API_ROUTES
+  ]
+
+
+def test_read_routes_stay_within_their_budgets(app, client, seeded):
+  assert app.config['QUERY_BUDGET_ENFORCE']
+  for method, path, data in read_routes():
+    response = client.open(path, method=method, data=data)
+    assert response.status_code == 200, '{} {}'.format(method, path)
+
+
+def test_an_overrun_fails_the_request(app, client, seeded):
+  from querystats import QueryBudgetExceeded, query_budget
+
+  @app.route('/over-budget')
+  @query_budget(1)
+  def over_budget():
+    return str(Venue.query.count() + Artist.query.count())
+
+  with pytest.raises(QueryBudgetExceeded):
+    client.get('/over-budget')
+
+
+def test_a_failing_statement_is_not_counted_or_left_behind(app):
+  from flask import g
+  from sqlalchemy.exc import OperationalError
+
+  with app.test_request_context('/'):
+    app.preprocess_request()
+    with db.engine.connect() as connection:
+      before = copy.deepcopy(connection.info)
+      with pytest.raises(OperationalError):
+        connection.exec_driver_sql('SELECT * FROM no_such_table')
+      connection.exec_driver_sql('SELECT 1')
+      # Nothing of the failed statement stays on the connection
+      assert connection.info == before
+    assert g.query_count == 1
@@ -0,0 +1,104 @@
+#----------------------------------------------------------------------------#
+# Double-booking checks (schedule.py) against stored shows and within a batch.
+#----------------------------------------------------------------------------#
+
+import datetime
+
+import pytest
+
+from models import db, Show, Venue, Artist, show_schedule
+
+
+EVENING = datetime.datetime(2030, 5, 1, 20)
+
+
+def hours(start, end):
+  return EVENING + datetime.timedelta(hours=start), EVENING + datetime.timedelta(hours=end)
+
+
+@pytest.fixture
+def booked(venue_and_artist):
+  # The venue and the artist each have a show from 20:00 to 23:00
+  venue_id, artist_id = venue_and_artist
+  show = Show(venue_id=venue_id, artist_id=artist_id, start_time=EVENING, end_time=EVENING + datetime.timedelta(hours=3))
+  db.session.add(show)
+  db.session.commit()
+  return venue_id, artist_id, show.id
+
+
+@pytest.mark.parametrize('start, end', [
+  (-1, 1),    # ends during the show
+  (2, 4),     # starts during it
+  (1, 2),     # inside it
+  (-1, 4),    # around it
+  (0, 3),     # the same hours
+])
+def test_overlapping_bookings_conflict(booked, start, end):
+  venue_id, artist_id, show_id = booked
+  other_artist = Artist(name='The Wild Sax Band')
+  db.session.add(other_artist)
+  db.session.commit()
+
+  conflicts = show_schedule.conflicts([(venue_id, other_artist.id, *hours(start, end))])
+  assert conflicts == {0: ('venue_id', show_id)}
+  assert show_schedule.describe(*conflicts[0]) == 'The venue is already booked at that time (show {}).'.format(show_id)
+
+
+@pytest.mark.parametrize('start, end', [(-2, 0), (3, 5), (-5, -1), (26, 29)])
+def test_adjacent_and_separate_bookings_are_free(booked, start, end):
+  venue_id, artist_id, show_id = booked
+  assert show_schedule.conflicts([(venue_id, artist_id, *hours(start, end))]) == {}
+
+
+def test_bookings_around_two_shows(booked):
+  venue_id, artist_id, show_id = booked
+  # A later show of the venue, the next morning, is the last one starting
+  # before the end of these bookings
+  morning = Show(venue_id=venue_id, artist_id=artist_id, start_time=hours(14, 15)[0], end_time=hours(14, 15)[1])
+  db.session.add(morning)
+  db.session.commit()
+
+  assert show_schedule.conflicts([(venue_id, artist_id, *hours(2, 16))]) == {0: ('venue_id', morning.id)}
+  assert show_schedule.conflicts([(venue_id, artist_id, *hours(2, 13))]) == {0: ('venue_id', show_id)}
+  assert show_schedule.conflicts([(venue_id, artist_id, *hours(3, 14))]) == {}
+
+
+def test_the_artist_calendar_is_checked_too(booked):
+  venue_id, artist_id, show_id = booked
+  other_venue = Venue(name='Park Square Live Music & Coffee')
+  db.session.add(other_venue)
+  db.session.commit()
+
+  assert show_schedule.conflicts([(other_venue.id, artist_id, *hours(2, 4))]) == {0: ('artist_id', show_id)}
+
+
+def test_overlaps_within_a_batch(venue_and_artist):
+  venue_id, artist_id = venue_and_artist
+  conflicts = show_schedule.conflicts([
+    (venue_id, artist_id, *hours(0, 3)),
+    (venue_id, artist_id, *hours(3, 4)),
+    (venue_id, artist_id, *hours(5, 7)),
+    (venue_id, artist_id, *hours(6, 8)),
+  ])
+  assert conflicts == {3: ('venue_id', None)}
+
+
+def test_batches_larger_than_one_statement(booked):
+  venue_id, artist_id, show_id = booked
+  # Nightly shows for over a year, and one in the booked slot near the end
+  batch = [(venue_id, artist_id, *hours(24 * day, 24 * day + 3)) for day in range(1, 400)]
+  batch.insert(350, (venue_id, artist_id, *hours(1, 2)))
+  assert len(batch) * 2 > show_schedule.LOOKUPS_PER_STATEMENT
+
+  assert show_schedule.conflicts(batch) == {350: ('venue_id', show_id)}
+
+
+def test_free_venues(booked):
+  venue_id, artist_id, show_id = booked
+  idle = Venue(name='The Dueling Pianos Bar')
+  db.session.add(idle)
+  db.session.commit()
+  candidates = Venue.query.with_entities(Venue.id).order_by(Venue.id)
+
+  assert [row.id for row in show_schedule.free(Venue, 'venue_id', candidates, *hours(2, 4))] == [idle.id]
+  assert [row.id for row in show_schedule.free(Venue, 'venue_id', candidates, *hours(3, 4))] == [venue_id, idle.id]
@@ -0,0 +1,105 @@
+#----------------------------------------------------------------------------#
+# Search term patterns, and the in-process n-gram search used outside
+# PostgreSQL.
+#----------------------------------------------------------------------------#
+
+import pytest
+import sqlalchemy as sa
+
+from models import db, Genre, Venue, Artist, venue_search, artist_search
+from search import NgramIndex, contains_pattern
+
+
+@pytest.mark.parametrize('term, matching, other', [
+  ('50%', 'Get 50% off', 'Get 500 off'),
+  ('a_b', 'the a_b club', 'the axb club'),
+  ('back\\slash', 'a back\\slash', 'a backslash'),
+])
+def test_like_wildcards_in_the_term_are_literal(term, matching, other):
+  engine = sa.create_engine('sqlite://')
+  with engine.connect() as connection:
+    def matches(value):
+      return connection.execute(sa.select(sa.literal(value).ilike(contains_pattern(term), escape='\\'))).scalar()
+
+    assert matches(matching)
+    assert matches(matching.upper())
+    assert not matches(other)
+
+
+
+VENUES = [
+  (1, 'The Musical Hop', 'the musical hop san francisco ca jazz reggae'),
+  (2, 'Park Square Live Music & Coffee', 'park square live music & coffee san francisco ca rock n roll jazz classical folk'),
+  (3, 'The Dueling Pianos Bar', 'the dueling pianos bar new york ny classical r&b hip-hop'),
+  (4, 'Musica Nova', 'musica nova austin tx classical'),
+]
+
+
+def test_misspelled_terms_rank_the_closest_names_first():
+  index = NgramIndex(VENUES)
+
+  # Name matches outrank matches elsewhere in the document
+  assert [id for id, rank in index.search('musicall')] == [1, 2, 4]
+  assert [id for id, rank in index.search('Pianoes')] == [3]
+  # Equal ranks fall back to the name, then the id
+  assert [id for id, rank in index.search('clasical')] == [4, 2, 3]
+  assert index.search('zzyzx') == []
+
+
+@pytest.fixture
+def listed(app):
+  for name, city, state, genres in (
+    ('The Musical Hop', 'San Francisco', 'CA', ['Jazz', 'Reggae']),
+    ('Park Square Live Music & Coffee', 'San Francisco', 'CA', ['Jazz', 'Classical']),
+    ('Musica Nova', 'Austin', 'TX', ['Classical']),
+  ):
+    # One at a time: Genre.lookup() only finds genres already stored
+    db.session.add(Venue(name=name, city=city, state=state, genres=Genre.lookup(genres)))
+    db.session.commit()
+  db.session.add(Artist(name='Guns N Petals', city='San Francisco', state='CA'))
+  db.session.commit()
+
+
+def names(search_engine, term):
+  count, page_rows = search_engine.search(term)
+  return [name for id, name, rank in db.session.query(page_rows).order_by(page_rows.c.rank.desc(), page_rows.c.name)]
+
+
+def test_search_page_lists_fuzzy_matches_best_first(client, listed):
+  page = client.post('/venues/search', data={'search_term': 'musicall'}).get_data(as_text=True)
+
+  positions = [page.index(name) for name in ('The Musical Hop', 'Musica Nova', 'Park Square Live Music &amp; Coffee')]
+  assert positions == sorted(positions)
+
+
+def test_venue_writes_rebuild_the_index(listed):
+  assert names(venue_search, 'musicall') == ['The Musical Hop', 'Musica Nova', 'Park Square Live Music & Coffee']
+
+  db.session.add(Venue(name='Musicall Arena', city='Austin', state='TX'))
+  db.session.commit()
+  assert names(venue_search, 'musicall')[0] == 'Musicall Arena'
+
+  venue = Venue.query.filter_by(name='Musica Nova').one()
+  venue.name = 'Nova Hall'
+  db.session.commit()
+  assert 'Musica Nova' not in names(venue_search, 'musicall')
+  assert names(venue_search, 'nova hal') == ['Nova Hall']
+
+  # A genre change alone counts as a write too
+  venue.genres = Genre.lookup(['Reggae'])
+  db.session.commit()
+  assert 'Nova Hall' in names(venue_search, 'regae')
+
+  db.session.delete(Venue.query.filter_by(name='The Musical Hop').one())
+  db.session.commit()
+  assert 'The Musical Hop' not in names(venue_search, 'musicall')
+
+
+def test_artist_writes_rebuild_the_index(listed):
+  assert names(artist_search, 'guns petal') == ['Guns N Petals']
+
+  artist = Artist.query.one()
+  artist.name = 'Matt Quevedo'
+  db.session.commit()
+  assert names(artist_search, 'guns petal') == []
+  assert names(artist_search, 'mat quevdo') == ['Matt Quevedo']
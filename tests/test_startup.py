@@ -0,0 +1,25 @@
+#----------------------------------------------------------------------------#
+# Start-up stays within its time budget and leaves the heavy, rarely needed
+# packages unimported (benchmarks/startup_benchmark.py).
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import startup_benchmark
+
+
+def test_create_app_defers_heavy_imports(tmp_path):
+  seconds, packages = startup_benchmark.run_once(cwd=tmp_path)
+
+  assert [name for name in startup_benchmark.DEFERRED.split(',') if name in packages] == []
+  # The error log is only opened once there is an error to write
+  assert not (tmp_path / 'error.log').exists()
+
+
+def test_create_app_starts_within_budget(tmp_path):
+  median, packages = startup_benchmark.median_ms(3, cwd=tmp_path)
+
+  assert median <= startup_benchmark.BUDGET_MS, 'cold start took {:.0f} ms'.format(median)
@@ -0,0 +1,282 @@
+#----------------------------------------------------------------------------#
+# Venue pages: directory, search, profile and the create/edit/delete forms.
+#
+# Forms are imported by the views that use them, which keeps wtforms out of
+# worker start-up.
+#----------------------------------------------------------------------------#
+
+import itertools
+import sys
+
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+
+from extensions import page_cache
+from models import db, Show, Genre, Venue
+from querystats import query_budget
+from replicas import replica_reads
+from conditional import conditional
+
+
+venues = Blueprint('venues', __name__)
+
+
+#  Page cache keys
+#  ----------------------------------------------------------------
+
+def venue_page_keys(venue_id):
+  # Pages showing this venue: its profile, the directory, the show listing
+  # and the profile of every artist booked there
+  artist_ids = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+  
+  return ['venues', 'shows', 'venue:{}'.format(venue_id)] + [
+    'artist:{}'.format(artist_id) for (artist_id,) in artist_ids
+  ]
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@venues.route('/venues')
+@query_budget(2)
+@replica_reads
+@conditional(Venue.directory_version)
+@page_cache.cached('venues')
+def index():
+  return render_directory(Venue.directory())
+
+
+def render_directory(directory):
+  # Areas come back from a single grouped query, already ordered by (state, city),
+  # so consecutive rows belonging to the same area can be folded together.
+  data = []
+
+  for (state, city), rows in itertools.groupby(directory, key=lambda row: (row.state, row.city)):
+      obj = {
+          "city": city, 
+          "state": state, 
+          "venues": [
+              {
+                  "id": row.id, 
+                  "name": row.name, 
+                  "num_upcoming_shows": row.num_upcoming_shows
+              } for row in rows
+          ]
+      }
+      
+      data.append(obj)
+  
+  return render_template('pages/venues.html', areas=data)
+
+
+
+
+@venues.route('/venues/search', methods=['POST'])
+@query_budget(3)
+@replica_reads
+def search_venues():
+  # TODO: implement search on venues with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  search_term=request.form.get('search_term', '').lower()
+  page = max(request.form.get('page', 1, type=int), 1)
+  per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+  
+  count, rows = Venue.search(search_term, page=page, per_page=per_page)
+  
+  return render_search(search_term, page, per_page, count, rows)
+
+
+def render_search(search_term, page, per_page, count, rows):
+  response={
+    "count": count,
+    "page": page,
+    "pages": (count + per_page - 1) // per_page,
+    "data": [
+      {
+        "id": row.id, 
+        "name": row.name, 
+        "num_upcoming_shows": row.num_upcoming_shows
+      } for row in rows
+    ]
+  }
+  
+  return render_template('pages/search_venues.html', results=response, search_term=search_term)
+
+
+
+
+@venues.route('/venues/<int:venue_id>')
+@query_budget(4)
+@replica_reads
+@conditional(lambda venue_id: Venue.profile_version(venue_id))
+@page_cache.cached('venue:{venue_id}')
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+  venue = Venue.query.get(venue_id)
+  
+  return render_profile(venue, [genre.name for genre in venue.genres], venue.shows_by_time())
+
+
+def render_profile(venue, genres, timeline):
+  # venue: the Venue or a row of its columns
+  data={
+    "id": venue.id,
+    "name": venue.name,
+    "genres": genres,
+    "address": venue.address,
+    "city": venue.city,
+    "state": venue.state,
+    "phone": venue.phone,
+    "website": venue.website_link,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking_talent,
+    "seeking_description": venue.seeking_description,
+    "image_link": venue.image_link,
+  }
+  data.update(timeline)
+  
+  # data = list(filter(lambda d: d['id'] == venue_id, [data1, data2, data3]))[0]
+  # return render_template('pages/show_venue.html', venue=data)
+  return render_template('pages/show_venue.html', venue=data)
+
+
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@venues.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  
+  return render_template('forms/new_venue.html', form=form)
+
+
+
+
+@venues.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  from forms import VenueForm
+  form = VenueForm(request.form)
+  
+  try:
+    
+    venue = Venue(
+      name=form.name.data,
+      city=form.city.data,
+      state= form.state.data,
+      address= form.address.data,
+      phone=form.phone.data,
+      genres=Genre.lookup(form.genres.data),
+      facebook_link=form.facebook_link.data,
+      image_link=form.image_link.data,
+      website_link=form.website_link.data,
+      seeking_talent=form.seeking_talent.data,
+      seeking_description=form.seeking_description.data
+    )
+    
+    db.session.add(venue)
+    db.session.commit()
+    page_cache.invalidate('venues')
+    
+    # on successful db insert, flash success
+    flash('Venue ' + form.name.data + ' was successfully listed!')
+    
+  except:
+    print(sys.exc_info())
+    db.session.rollback()
+    # TODO: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    
+    flash('An error occurred. Venue ' + form.name.data + ' could not be listed.')
+  
+  finally:
+    db.session.close()
+  
+  return render_template('pages/home.html')
+
+
+
+
+@venues.route('/venues/delete/<venue_id>', methods=['DELETE', 'GET'])
+def delete_venue(venue_id):
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  try: 
+    venue = Venue.query.get(venue_id)
+    stale_pages = venue_page_keys(venue.id)
+    db.session.delete(venue)
+    db.session.commit()
+    page_cache.invalidate(*stale_pages)
+  except:
+    db.session.rollback()
+  finally: 
+    db.session.close()
+    
+  
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return redirect(url_for('venues.index'))
+
+
+
+
+@venues.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  venue = Venue.query.get(venue_id)
+  # TODO: populate form with values from venue with ID <venue_id>
+  from forms import VenueForm
+  form = VenueForm(obj=venue)
+  form.genres.data = [genre.name for genre in venue.genres]
+  
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+
+
+@venues.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  venue = Venue.query.get(venue_id)
+  from forms import VenueForm
+  form = VenueForm(request.form)
+  
+  try:
+    venue.name=form.name.data
+    venue.city=form.city.data
+    venue.state= form.state.data
+    venue.address= form.address.data
+    venue.phone=form.phone.data
+    venue.genres=Genre.lookup(form.genres.data)
+    venue.facebook_link=form.facebook_link.data
+    venue.image_link=form.image_link.data
+    venue.website_link=form.website_link.data
+    venue.seeking_talent=form.seeking_talent.data
+    venue.seeking_description=form.seeking_description.data
+    
+    db.session.add(venue)
+    db.session.commit()
+    page_cache.invalidate(*venue_page_keys(venue_id))
+    
+    # on successful db insert, flash success
+    flash('Venue ' + form.name.data + ' was successfully update!')
+    
+  except:
+    print(sys.exc_info())
+    db.session.rollback()
+    flash('Venue ' + form.name.data + ' was not successfully update!')
+    
+  finally:
+    db.session.close()
+  
+  
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
+
+
+
@@ -0,0 +1,13 @@
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#
+#   FYYUR_ENV=production SECRET_KEY=... DATABASE_URL=postgresql://... \
+#     gunicorn -c gunicorn.conf.py wsgi:application
+#
+# Settings come from config.py and the environment; see gunicorn.conf.py for
+# the worker, thread and connection knobs.
+#----------------------------------------------------------------------------#
+
+from app import create_app
+
+application = create_app()